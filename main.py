@@ -1,11 +1,18 @@
+import argparse
+
 import pygame
 
-from src import SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE, Game, initialize_game_window
+from src import SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE, SEED, SERVER_ADDRESS, Game, initialize_game_window
 
 pygame.init()
 GAME_WINDOW = initialize_game_window(SCREEN_WIDTH, SCREEN_HEIGHT)
 Clock = pygame.time.Clock()
 
 if __name__ == "__main__":
-    battleship = Game(Clock, GAME_WINDOW, GRID_SIZE)
+    parser = argparse.ArgumentParser(description="Battleship")
+    parser.add_argument("--seed", type=int, default=SEED, help="seed of every random draw, the same seed and moves play out the same game")
+    parser.add_argument("--server", default=SERVER_ADDRESS, help="host:port of the game server online games are played on")
+    args = parser.parse_args()
+
+    battleship = Game(Clock, GAME_WINDOW, GRID_SIZE, seed=args.seed, server=args.server)
     battleship.run()
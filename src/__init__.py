@@ -1,3 +1,18 @@
-from .cell import *
-from .game import *
-from .display import *
+# The pygame front end is imported on first attribute access rather than eagerly, so the
+# pygame-free rules in src.rules can be imported on headless machines
+import importlib
+import importlib.util
+
+_FRONT_END = ("config", "cell", "game", "display")
+
+
+def __getattr__(name):
+    # `from . import submodule` looks the name up here before importing it
+    if not name.startswith("_") and importlib.util.find_spec(f"{__name__}.{name}") is not None:
+        return importlib.import_module(f".{name}", __name__)
+
+    for module_name in _FRONT_END:
+        module = importlib.import_module(f".{module_name}", __name__)
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
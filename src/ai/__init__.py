@@ -0,0 +1,15 @@
+# Pygame-free CPU strategies, which only see the shots they fired and what each one hit
+from .history import ShotHistory
+from .basic import RandomStrategy, HuntTargetStrategy
+from .density import DensityStrategy
+from .incremental import IncrementalDensityStrategy
+from .montecarlo import MonteCarloStrategy
+from .telemetry import MoveTelemetry
+
+# Every strategy by the name the CPU difficulties and the tournament use, each built as cls(size, ship_lengths, rng)
+STRATEGIES = {
+    "easy": RandomStrategy,
+    "medium": HuntTargetStrategy,
+    "density": IncrementalDensityStrategy,
+    "monte_carlo": MonteCarloStrategy,
+}
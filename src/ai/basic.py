@@ -0,0 +1,51 @@
+import random
+from typing import Optional, Sequence
+
+from ..rules.types import Coordinate, ShotResult
+from .history import ShotHistory
+
+# Neighbours of a hit tried by HuntTargetStrategy: up, right, down, left
+NEIGHBOURS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+class RandomStrategy:
+    """Fires at a random cell it has not tried yet"""
+
+    def __init__(self, size: int, ship_lengths: Sequence[int] = (), rng=random) -> None:
+        self.size = size
+        self.rng = rng
+        self.shots = ShotHistory(size)
+        self.cut_short = False  # whether the last move stopped refining at its deadline, never for these strategies
+
+    def record(self, coordinate: Coordinate, result: ShotResult, sunk: Optional[Sequence[Coordinate]] = None):
+        if result in (ShotResult.MISS, ShotResult.HIT, ShotResult.SINK):
+            self.shots.mark(coordinate)
+
+    def choose(self, deadline: Optional[float] = None) -> Optional[Coordinate]:
+        return self.shots.random_untried(self.rng)
+
+
+class HuntTargetStrategy(RandomStrategy):
+    """
+    Fires at random until it hits a ship, then at the untried neighbours of its hits until that ship sinks
+    """
+
+    def __init__(self, size: int, ship_lengths: Sequence[int] = (), rng=random) -> None:
+        super().__init__(size, ship_lengths, rng)
+        self.open_hits = []  # hits on ships which have not sunk yet, oldest first
+
+    def record(self, coordinate: Coordinate, result: ShotResult, sunk: Optional[Sequence[Coordinate]] = None):
+        super().record(coordinate, result, sunk)
+        if result in (ShotResult.HIT, ShotResult.SINK):
+            self.open_hits.append(coordinate)
+        if result == ShotResult.SINK and sunk:
+            self.open_hits = [hit for hit in self.open_hits if hit not in sunk]
+
+    def choose(self, deadline: Optional[float] = None) -> Optional[Coordinate]:
+        for hx, hy in self.open_hits:
+            for dx, dy in NEIGHBOURS:
+                x = hx + dx
+                y = hy + dy
+                if 0 <= x < self.size and 0 <= y < self.size and (x, y) not in self.shots:
+                    return (x, y)
+        return super().choose(deadline)
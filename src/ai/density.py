@@ -0,0 +1,119 @@
+import random
+from collections import Counter
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..rules.types import Coordinate, ShotResult
+
+# Once a ship has been hit but not sunk, placements are weighted by TARGET_WEIGHT for every unresolved hit they
+# cover and placements covering none are ignored, so the CPU fires along the ship it found instead of hunting
+TARGET_WEIGHT = 50.0
+
+
+def window_sums(mask: np.ndarray, length: int) -> np.ndarray:
+    """
+    Returns the sum of every horizontal run of `length` cells: element [y, x] is the sum of mask[y, x:x + length].
+    The result is length - 1 columns narrower than the mask.
+    """
+    csum = np.zeros((mask.shape[0], mask.shape[1] + 1), dtype=np.float64 if mask.dtype.kind == "f" else np.int32)
+    np.cumsum(mask, axis=1, out=csum[:, 1:])
+    return csum[:, length:] - csum[:, :-length]
+
+
+def orientations(length: int) -> Tuple[bool, ...]:
+    """
+    The orientations placements of a ship of the given length are counted in, True for vertical. A one cell
+    ship covers the same cell either way, so it is only counted once.
+    """
+    return (False,) if length == 1 else (False, True)
+
+
+def spread(weights: np.ndarray, length: int) -> np.ndarray:
+    """
+    The reverse of window_sums: adds the weight of the placement starting at every [y, x] to each of the
+    `length` cells it covers. The result is length - 1 columns wider than the weights.
+    """
+    padded = np.zeros((weights.shape[0], weights.shape[1] + 2 * (length - 1)))
+    padded[:, length - 1:length - 1 + weights.shape[1]] = weights
+    return window_sums(padded, length)
+
+
+class DensityStrategy:
+    """
+    Fires at the cell covered by the most legal placements of the ships still afloat, given the hits,
+    misses and sunk ships observed so far. A placement is legal when none of its cells is a miss or part
+    of a sunk ship, which sliding-window sums over those cells find for a whole row at once.
+    """
+
+    def __init__(self, size: int, ship_lengths: Iterable[int], rng=random) -> None:
+        self.size = size
+        self.rng = rng
+        self.remaining = Counter(ship_lengths)  # length -> ships of that length still afloat
+        self.hits = np.zeros((size, size), dtype=bool)
+        self.misses = np.zeros((size, size), dtype=bool)
+        self.sunk = np.zeros((size, size), dtype=bool)  # cells of ships known to be sunk
+        self.cut_short = False  # whether the last move stopped refining at its deadline
+
+    def record(self, coordinate: Coordinate, result: ShotResult, sunk: Optional[Sequence[Coordinate]] = None):
+        """
+        Records the result of a shot. A SINK should come with the coordinates of the ship it sank, which
+        stop counting as open hits and take that ship out of the remaining fleet.
+        """
+        x, y = coordinate
+        if result == ShotResult.MISS:
+            self.misses[y, x] = True
+        elif result in (ShotResult.HIT, ShotResult.SINK):
+            self.hits[y, x] = True
+        if result == ShotResult.SINK and sunk:
+            for sx, sy in sunk:
+                self.sunk[sy, sx] = True
+            if self.remaining[len(sunk)] > 0:
+                self.remaining[len(sunk)] -= 1
+
+    def density(self, targeting: Optional[bool] = None) -> np.ndarray:
+        """
+        Returns the weighted number of legal placements covering each cell, indexed [y, x]. Cells already
+        shot are 0. Unless told otherwise, placements are only counted through open hits while there are any.
+        """
+        blocked = self.misses | self.sunk
+        open_hits = self.hits & ~self.sunk
+        if targeting is None:
+            targeting = bool(open_hits.any())
+
+        total = np.zeros((self.size, self.size))
+        for transposed in (False, True):
+            rows_blocked = blocked.T if transposed else blocked
+            rows_hits = open_hits.T if transposed else open_hits
+            counts = np.zeros((self.size, self.size))
+            for length, ships in self.remaining.items():
+                if ships <= 0 or length > self.size or transposed not in orientations(length):
+                    continue
+                legal = window_sums(rows_blocked, length) == 0
+                if targeting:
+                    covered = window_sums(rows_hits, length)
+                    weights = np.where(legal & (covered > 0), TARGET_WEIGHT ** covered, 0.0)
+                else:
+                    weights = legal.astype(np.float64)
+                counts += ships * spread(weights, length)
+            total += counts.T if transposed else counts
+
+        total[self.hits | self.misses] = 0
+        return total
+
+    def choose(self, deadline: Optional[float] = None) -> Coordinate:
+        """
+        Returns the (x, y) coordinate of an unshot cell with the highest density, breaking ties at random.
+        A move is a single pass, so the deadline (a time.perf_counter() value) is not needed.
+        """
+        density = self.density()
+        if density.max() <= 0:
+            # The open hits could not be explained by any placement, fall back to hunting
+            density = self.density(targeting=False)
+        if density.max() <= 0:
+            # Nothing legal is left, fire at any cell not shot yet
+            density = (~(self.hits | self.misses)).astype(np.float64)
+
+        best = np.flatnonzero(density == density.max())
+        index = int(best[self.rng.randrange(len(best))])
+        return (index % self.size, index // self.size)
@@ -0,0 +1,57 @@
+import random
+from array import array
+from typing import Optional
+
+from ..rules.types import Coordinate
+
+
+class ShotHistory:
+    """
+    The cells of a board a player has shot at, with a pool of the cells not shot yet so a random untried
+    cell is picked in O(1) however full the board is.
+
+    Cells are indexed y * size + x. A shot cell is swapped with the last cell of the pool and popped,
+    `position` keeps where each cell currently sits in the pool.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.shot = bytearray(size * size)
+        self.untried = array("l", range(size * size))
+        self.position = array("l", range(size * size))
+
+    def __len__(self) -> int:
+        """Number of cells shot"""
+        return len(self.shot) - len(self.untried)
+
+    def __contains__(self, coordinate: Coordinate) -> bool:
+        x, y = coordinate
+        return 0 <= x < self.size and 0 <= y < self.size and bool(self.shot[y * self.size + x])
+
+    def mark(self, coordinate: Coordinate) -> bool:
+        """
+        Records a shot at the coordinate
+
+        Returns:
+            bool: True if the cell had not been shot before
+        """
+        x, y = coordinate
+        index = y * self.size + x
+        if self.shot[index]:
+            return False
+        self.shot[index] = 1
+
+        # Swap-remove the cell from the pool of untried cells
+        slot = self.position[index]
+        last = self.untried.pop()
+        if last != index:
+            self.untried[slot] = last
+            self.position[last] = slot
+        return True
+
+    def random_untried(self, rng=random) -> Optional[Coordinate]:
+        """Returns a random cell not shot yet, or None once every cell has been shot"""
+        if not self.untried:
+            return None
+        index = self.untried[rng.randrange(len(self.untried))]
+        return (index % self.size, index // self.size)
@@ -0,0 +1,179 @@
+import random
+import warnings
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..rules.types import Coordinate, ShotResult
+from .density import DensityStrategy, TARGET_WEIGHT, orientations, window_sums, spread
+
+# Score of cells already shot. Later count updates still add to and subtract from them, which
+# leaves them far below any real count.
+SHOT_SCORE = -(1 << 60)
+
+# Shots between comparisons of the incremental counts with a full rebuild. 0 never checks. A rebuild costs as
+# much as DensityStrategy's every shot, which the tournament can afford.
+CHECK_INTERVAL = 64
+
+
+class IncrementalDensityStrategy(DensityStrategy):
+    """
+    A DensityStrategy which keeps its placement counts between shots instead of recomputing them.
+
+    For every ship length and orientation it keeps which placements are still legal and how many of
+    them cover each cell. A miss, or a cell of a sunk ship, only takes out the few placements through
+    that cell, so a shot costs about the same on any board size. Every `check_interval` shots the
+    counts are compared with a full rebuild, which replaces them if they ever drift.
+    """
+
+    def __init__(self, size: int, ship_lengths, rng=random, check_interval: int = CHECK_INTERVAL) -> None:
+        super().__init__(size, ship_lengths, rng)
+        self.check_interval = check_interval
+        self.shots = 0
+        self.open_hits = set()  # hits on ships not known to be sunk
+        self.rebuild()
+
+    def build(self) -> Tuple[Dict, Dict, np.ndarray]:
+        """
+        Computes from scratch, for every (length, vertical) pair with ships left, the legal placements by
+        start cell and the number of them covering each cell, and the combined score of every cell
+        """
+        blocked = self.misses | self.sunk
+        legal = {}
+        cover = {}
+        score = np.zeros((self.size, self.size), dtype=np.int64)
+        for length, ships in self.remaining.items():
+            if ships <= 0 or length > self.size:
+                continue
+            for vertical in orientations(length):
+                rows = blocked.T if vertical else blocked
+                starts = window_sums(rows, length) == 0
+                counts = np.rint(spread(starts, length)).astype(np.int64)
+                # Stored the way the board is indexed, [y, x] is the placement starting at (x, y)
+                legal[(length, vertical)] = np.ascontiguousarray(starts.T if vertical else starts)
+                cover[(length, vertical)] = np.ascontiguousarray(counts.T if vertical else counts)
+                score += ships * cover[(length, vertical)]
+        score[self.hits | self.misses] = SHOT_SCORE
+        return legal, cover, score
+
+    def rebuild(self):
+        self.legal, self.cover, self.score = self.build()
+
+    def check(self) -> bool:
+        """
+        Compares the incremental counts with a full rebuild, switching to the rebuilt ones if they differ
+        """
+        legal, cover, score = self.build()
+        unshot = ~(self.hits | self.misses)
+        ok = (legal.keys() == self.legal.keys()
+              and all(np.array_equal(legal[key], self.legal[key]) for key in legal)
+              and np.array_equal(score[unshot], self.score[unshot]))
+        if not ok:
+            warnings.warn("placement counts drifted from a full rebuild, replaced by it", RuntimeWarning)
+            self.legal, self.cover, self.score = legal, cover, score
+        return ok
+
+    def placements_through(self, length: int, vertical: bool, x: int, y: int):
+        """Yields the start of every placement on the board with the given length and orientation covering (x, y)"""
+        for offset in range(length):
+            sx, sy = (x, y - offset) if vertical else (x - offset, y)
+            if 0 <= sx and 0 <= sy and (sy + length <= self.size if vertical else sx + length <= self.size):
+                yield sx, sy
+
+    def placement_cells(self, length: int, vertical: bool, sx: int, sy: int):
+        return [(sx, sy + i) if vertical else (sx + i, sy) for i in range(length)]
+
+    def block(self, x: int, y: int):
+        """
+        Takes out every legal placement through (x, y), removing it from the counts of the cells it covers
+        """
+        for (length, vertical), legal in self.legal.items():
+            ships = self.remaining[length]
+            cover = self.cover[(length, vertical)]
+            for sx, sy in self.placements_through(length, vertical, x, y):
+                if not legal[sy, sx]:
+                    continue
+                legal[sy, sx] = False
+                if vertical:
+                    cover[sy:sy + length, sx] -= 1
+                    self.score[sy:sy + length, sx] -= ships
+                else:
+                    cover[sy, sx:sx + length] -= 1
+                    self.score[sy, sx:sx + length] -= ships
+
+    def record(self, coordinate: Coordinate, result: ShotResult, sunk: Optional[Sequence[Coordinate]] = None):
+        x, y = coordinate
+        if result not in (ShotResult.MISS, ShotResult.HIT, ShotResult.SINK) or self.hits[y, x] or self.misses[y, x]:
+            return
+
+        if result == ShotResult.MISS:
+            self.block(x, y)
+        else:
+            self.open_hits.add(coordinate)
+        self.score[y, x] = SHOT_SCORE
+
+        if result == ShotResult.SINK and sunk:
+            for sx, sy in sunk:
+                if not self.sunk[sy, sx]:
+                    self.block(sx, sy)
+                self.open_hits.discard((sx, sy))
+            length = len(sunk)
+            if self.remaining[length] > 0:
+                # One ship fewer of this length covers every cell its placements cover
+                for vertical in (False, True):
+                    if (length, vertical) in self.cover:
+                        self.score -= self.cover[(length, vertical)]
+                if self.remaining[length] == 1:
+                    for vertical in (False, True):
+                        self.legal.pop((length, vertical), None)
+                        self.cover.pop((length, vertical), None)
+
+        super().record(coordinate, result, sunk)
+
+        self.shots += 1
+        if self.check_interval and self.shots % self.check_interval == 0:
+            self.check()
+
+    def target_scores(self) -> Dict[int, float]:
+        """
+        Returns the weighted count of placements through open hits covering each unshot cell, by cell index.
+        Only placements near the open hits are looked at, not the whole board.
+        """
+        scores = {}
+        for (length, vertical), legal in self.legal.items():
+            ships = self.remaining[length]
+            starts = set()
+            for hx, hy in self.open_hits:
+                for sx, sy in self.placements_through(length, vertical, hx, hy):
+                    if legal[sy, sx]:
+                        starts.add((sx, sy))
+            for sx, sy in starts:
+                cells = self.placement_cells(length, vertical, sx, sy)
+                weight = ships * TARGET_WEIGHT ** sum(cell in self.open_hits for cell in cells)
+                for cx, cy in cells:
+                    if not (self.hits[cy, cx] or self.misses[cy, cx]):
+                        index = cy * self.size + cx
+                        scores[index] = scores.get(index, 0.0) + weight
+        return scores
+
+    def choose(self, deadline: Optional[float] = None) -> Coordinate:
+        """
+        Returns the (x, y) coordinate of an unshot cell with the highest density, breaking ties at random.
+        Picks the same cells as DensityStrategy given the same random numbers.
+        """
+        if self.open_hits:
+            scores = self.target_scores()
+            if scores:
+                best = max(scores.values())
+                candidates = sorted(index for index, score in scores.items() if score == best)
+                index = candidates[self.rng.randrange(len(candidates))]
+                return (index % self.size, index // self.size)
+
+        best = self.score.max()
+        if best > 0:
+            candidates = np.flatnonzero(self.score == best)
+        else:
+            # Nothing legal is left, fire at any cell not shot yet
+            candidates = np.flatnonzero(~(self.hits | self.misses))
+        index = int(candidates[self.rng.randrange(len(candidates))])
+        return (index % self.size, index // self.size)
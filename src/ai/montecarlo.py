@@ -0,0 +1,193 @@
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..rules.fleet import mark, placement_cells, placements_through, sample_fleet
+from ..rules.types import Coordinate
+from .density import DensityStrategy
+
+# Fleet layouts sampled per move
+SAMPLE_BUDGET = 4000
+# Layouts per batch, each sampled from a seed of its own. Every move samples the same batches whatever the
+# number of workers, and small batches let a move stop close to its deadline.
+BATCH = 100
+# Jobs per worker sampling without a deadline, each a run of consecutive batches. More than one evens out
+# workers finishing at different times, few enough that submitting them costs little.
+JOBS_PER_WORKER = 2
+# Seconds before the deadline sampling stops, kept for adding up the counts and picking the cell
+FINISH_RESERVE = 0.002
+
+
+def sample_layouts(size: int, lengths: Sequence[int], blocked: bytes, open_hits: Sequence[int], samples: int, seed: int) -> np.ndarray:
+    """
+    Samples up to `samples` random layouts of ships with the given lengths and counts how many of them occupy
+    each cell. Layouts avoid the blocked cells (misses and sunk ships), do not overlap and cover every open hit.
+    Runs in a worker process with its own seeded RNG, so a given seed always gives the same counts.
+
+    Args:
+        blocked (bytes): 1 for every blocked cell, by index y * size + x
+        open_hits (Sequence[int]): Indices of hits on ships not known to be sunk
+    Returns:
+        np.ndarray: Occupancy count of every cell by index
+    """
+    rng = random.Random(seed)
+    counts = np.zeros(size * size, dtype=np.int64)
+
+    for _ in range(samples):
+        occupied = bytearray(blocked)
+        unplaced = list(lengths)
+        rng.shuffle(unplaced)
+        placed = []
+
+        # Every open hit is covered first, by a random ship placed through it
+        for hit in open_hits:
+            if occupied[hit]:
+                continue
+            options = [placement for length in set(unplaced) for placement in placements_through(size, length, hit % size, hit // size, occupied)]
+            if not options:
+                break
+            placement = options[rng.randrange(len(options))]
+            mark(placement, size, occupied)
+            unplaced.remove(placement[2])
+            placed.append(placement)
+        else:
+            # The rest go anywhere they fit
+            rest = sample_fleet(size, unplaced, rng, occupied)
+            if rest is not None:
+                for placement in placed + rest:
+                    for index in placement_cells(placement, size):
+                        counts[index] += 1
+    return counts
+
+
+def sample_batches(size: int, lengths: Sequence[int], blocked: bytes, open_hits: Sequence[int], batches: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """Adds up sample_layouts over the (samples, seed) of each batch, one job for a worker process"""
+    counts = np.zeros(size * size, dtype=np.int64)
+    for samples, seed in batches:
+        counts += sample_layouts(size, lengths, blocked, open_hits, samples, seed)
+    return counts
+
+
+class MonteCarloStrategy(DensityStrategy):
+    """
+    A "hard but fair" strategy: samples many fleet layouts consistent with the hits, misses and sunk ships
+    it has observed and fires at the unshot cell occupied in the most of them. Like every strategy it never
+    looks at the opponent's fleet.
+
+    The sample budget is split into small batches, each given its own seed drawn from this strategy's RNG,
+    so without a deadline the same RNG always fires the same shots on any machine. Batches are shared by a
+    pool of worker processes, by default one per core, and sampled in this process on a single core machine
+    or with no workers. If no layout could be sampled it falls back to the placement density.
+
+    Given a deadline it is an anytime strategy: batches are handed out one per worker at a time, only while
+    one is expected to finish by the deadline, and it fires on the batches finished by then. Which batches
+    those are depends on timing.
+    """
+
+    def __init__(self, size: int, ship_lengths, rng=random, samples: int = SAMPLE_BUDGET, workers: Optional[int] = None) -> None:
+        super().__init__(size, ship_lengths, rng)
+        self.samples = samples
+        if workers is None:
+            cores = os.cpu_count() or 1
+            workers = cores if cores > 1 else 0
+        self.workers = workers
+        self.executor = None  # see start, processes are not worth starting for a CPU never played
+        self.batch_seconds = None  # time the last batch took, to tell whether another fits before a deadline
+
+    def start(self):
+        """
+        Starts the worker processes, so a move's deadline is not spent on starting them. Moves start them
+        themselves if this was not called.
+        """
+        if self.workers > 0 and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            # Processes are only started as jobs arrive, one job each starts all of them
+            wait([self.executor.submit(time.sleep, 0.01) for _ in range(self.workers)])
+
+    def close(self):
+        """Shuts down the worker processes"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def batches(self) -> Tuple[Tuple, List[Tuple[int, int]]]:
+        """Returns the arguments of sample_layouts every batch of the move shares, and the (samples, seed) of each batch"""
+        lengths = [length for length, ships in self.remaining.items() for _ in range(ships) if length <= self.size]
+        blocked = (self.misses | self.sunk).astype(np.uint8).tobytes()
+        open_hits = [int(index) for index in np.flatnonzero(self.hits & ~self.sunk)]
+        count = max(1, -(-self.samples // BATCH))
+        shares = [self.samples // count + (i < self.samples % count) for i in range(count)]
+        return (self.size, lengths, blocked, open_hits), [(share, self.rng.getrandbits(64)) for share in shares if share]
+
+    def fits(self, deadline: Optional[float]) -> bool:
+        """Whether another batch started now is expected to finish by the deadline, always before one has been timed"""
+        return deadline is None or self.batch_seconds is None or time.perf_counter() + self.batch_seconds <= deadline
+
+    def occupancy(self, deadline: Optional[float] = None) -> np.ndarray:
+        """
+        Returns how many sampled layouts occupy each cell, indexed [y, x]. With a deadline only the batches
+        finished by then are counted, and cut_short tells whether any were left out.
+        """
+        shared, batches = self.batches()
+        if deadline is not None:
+            deadline -= FINISH_RESERVE
+        counts = np.zeros(self.size * self.size, dtype=np.int64)
+        finished = 0
+
+        if self.workers <= 0:
+            for samples, seed in batches:
+                if not self.fits(deadline):
+                    break
+                started = time.perf_counter()
+                counts += sample_layouts(*shared, samples, seed)
+                self.batch_seconds = time.perf_counter() - started
+                finished += 1
+        elif deadline is None:
+            self.start()
+            jobs = min(len(batches), self.workers * JOBS_PER_WORKER)
+            runs = [batches[i * len(batches) // jobs:(i + 1) * len(batches) // jobs] for i in range(jobs)]
+            for future in [self.executor.submit(sample_batches, *shared, run) for run in runs]:
+                counts += future.result()
+            finished = len(batches)
+        else:
+            self.start()
+            # No more batches are running than there are workers, so none waits in the queue and the few
+            # still running at the deadline are no more than one per worker
+            running = {}
+            queued = iter(batches)
+            while True:
+                while len(running) < self.workers and self.fits(deadline):
+                    batch = next(queued, None)
+                    if batch is None:
+                        break
+                    running[self.executor.submit(sample_layouts, *shared, *batch)] = time.perf_counter()
+                if not running:
+                    break
+                done, _ = wait(running, timeout=max(0.0, deadline - time.perf_counter()), return_when=FIRST_COMPLETED)
+                if not done:
+                    break  # the deadline passed, batches still running finish in the background and are dropped
+                for future in done:
+                    self.batch_seconds = time.perf_counter() - running.pop(future)
+                    counts += future.result()
+                    finished += 1
+
+        self.cut_short = finished < len(batches)
+        return counts.reshape(self.size, self.size)
+
+    def choose(self, deadline: Optional[float] = None) -> Coordinate:
+        """
+        Returns the unshot cell occupied in the most sampled layouts, sampling until the deadline (a
+        time.perf_counter() value) if one is given
+        """
+        occupancy = self.occupancy(deadline)
+        occupancy[self.hits | self.misses] = 0
+        if occupancy.max() <= 0:
+            return super().choose(deadline)
+
+        best = np.flatnonzero(occupancy == occupancy.max())
+        index = int(best[self.rng.randrange(len(best))])
+        return (index % self.size, index // self.size)
@@ -0,0 +1,43 @@
+from typing import Dict, Optional
+
+
+class MoveTelemetry:
+    """
+    How a player's moves went against its per-move time budget: how long they took, how many an anytime
+    strategy cut short at the deadline, and how many still went over the budget
+    """
+
+    def __init__(self, budget_ms: Optional[float] = None) -> None:
+        self.budget_ms = budget_ms  # None leaves moves unbounded
+        self.moves = 0
+        self.cut_short = 0
+        self.over_budget = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def deadline(self, start: float) -> Optional[float]:
+        """Returns the time.perf_counter() value a move started at `start` should finish by"""
+        if self.budget_ms is None:
+            return None
+        return start + self.budget_ms / 1000
+
+    def add(self, elapsed: float, cut_short: bool):
+        """Records a move which took `elapsed` seconds"""
+        self.moves += 1
+        self.cut_short += cut_short
+        if self.budget_ms is not None and elapsed * 1000 > self.budget_ms:
+            self.over_budget += 1
+        self.total_s += elapsed
+        self.max_s = max(self.max_s, elapsed)
+
+    def summary(self) -> Dict:
+        return {
+            "budget_ms": self.budget_ms,
+            "moves": self.moves,
+            "cut_short": self.cut_short,
+            "over_budget": self.over_budget,
+            "cut_short_rate": round(self.cut_short / self.moves, 4) if self.moves else None,
+            "over_budget_rate": round(self.over_budget / self.moves, 4) if self.moves else None,
+            "move_ms_mean": round(self.total_s / self.moves * 1000, 4) if self.moves else None,
+            "move_ms_max": round(self.max_s * 1000, 4),
+        }
@@ -1,39 +1,62 @@
 import pygame
 
-pygame.mixer.init()
+# The mixer is started and the sounds decoded on first playback rather than at import time, so the
+# game modules can be imported without a sound device. If no device is available the game stays silent.
+_sounds = None
+_channels = None
+
+
+def _load():
+    global _sounds, _channels
+    if _sounds is None:
+        try:
+            pygame.mixer.init()
+            _sounds = {
+                "hit": pygame.mixer.Sound("sound/hit.mp3"),
+                "miss": pygame.mixer.Sound("sound/miss.mp3"),
+                "sink": pygame.mixer.Sound("sound/sink.mp3"),
+                # "pickup": pygame.mixer.Sound("sound/pickup.mp3"),
+                # "use": pygame.mixer.Sound("sound/use.mp3"),
+                # "error": pygame.mixer.Sound("sound/error.mp3"),
+            }
+            _channels = {
+                "hit": pygame.mixer.Channel(0),
+                "miss": pygame.mixer.Channel(1),
+                "powerup": pygame.mixer.Channel(2),
+                "error": pygame.mixer.Channel(3),
+            }
+        except pygame.error:
+            _sounds = {}
+            _channels = {}
+    return _sounds
+
+
+def _play(channel: str, sound: str):
+    sounds = _load()
+    if sound in sounds:
+        _channels[channel].play(sounds[sound])
 
-hit_sound = pygame.mixer.Sound("sound/hit.mp3")
-miss_sound = pygame.mixer.Sound("sound/miss.mp3")
-sink_sound = pygame.mixer.Sound("sound/sink.mp3")
-# pickup_sound = pygame.mixer.Sound("sound/pickup.mp3")
-# use_sound = pygame.mixer.Sound("sound/use.mp3")
-# error_sound = pygame.mixer.Sound("sound/error.mp3")
-
-hit_channel = pygame.mixer.Channel(0)
-miss_channel = pygame.mixer.Channel(1)
-powerup_channel = pygame.mixer.Channel(2)
-error_channel = pygame.mixer.Channel(3)
 
 class Audio:
     @staticmethod
     def play_hit():
-        hit_channel.play(hit_sound)
+        _play("hit", "hit")
 
     @staticmethod
     def play_miss():
-        miss_channel.play(miss_sound)
+        _play("miss", "miss")
 
+    @staticmethod
     def play_sink():
-        hit_channel.play(sink_sound)
+        _play("hit", "sink")
 
     # @staticmethod 
     # def play_pickup():
-    #     powerup_channel.play(pickup_sound)
+    #     _play("powerup", "pickup")
 
     # def play_use():
-    #     powerup_channel.play(use_sound)
+    #     _play("powerup", "use")
     
     # @staticmethod
     # def play_error():
-    #     error_channel.play(error_sound)
-        
\ No newline at end of file
+    #     _play("error", "error")
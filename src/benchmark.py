@@ -0,0 +1,259 @@
+"""
+Headless render benchmark. Drives Game through each screen with scripted input events under SDL's dummy
+video and audio drivers, so it runs on machines without a display, and prints the results as JSON.
+
+    python -m src.benchmark [--frames 300] [--grid-sizes 10,100,1000] [--output results.json]
+"""
+import os
+
+# Must be set before pygame initialises SDL
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import contextlib
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+from .config import SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE
+from .display import initialize_game_window
+from .game import Game
+from .profiler import FrameProfiler, PHASES
+from .rules.powerups import NUKE, VOLLEY
+from .screens import FinishScreen
+from .screens.playing import TURN_TRANSITION_EVENT
+from .ship import Ship
+from .types import State, Player
+
+NUM_SHIPS = 5
+SEED = 1234
+
+
+class UncappedClock:
+    """Stands in for pygame.time.Clock so frames run back to back instead of being limited to FPS"""
+
+    def tick(self, framerate=0):
+        return 0
+
+
+def click(pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(int(pos[0]), int(pos[1])), button=1)
+
+
+def key(k):
+    return pygame.event.Event(pygame.KEYDOWN, key=k, mod=0, unicode="")
+
+
+def place_fleet(board, rng: random.Random):
+    """Places NUM_SHIPS ships, largest first, at random valid locations"""
+    for length in range(NUM_SHIPS, 0, -1):
+        while True:
+            direction = rng.choice(("VERTICAL", "HORIZONTAL"))
+            ship = Ship(rng.randrange(board.board_size), rng.randrange(board.board_size), length, direction, board.board_size)
+            if board.isValidShipLocation(ship):
+                board.mark_ship_cells(ship)
+                break
+
+
+# Each scenario has a setup, which puts a new game on the screen being measured, and a script
+# returning the input events to post before each frame.
+
+def setup_menu(game, rng):
+    pass
+
+
+def script_menu(game, frame, rng):
+    # Toggle the ship count buttons and move the mouse around between clicks
+    button = game.screens[State.START].buttons[frame // 2 % 5]
+    if frame % 2:
+        return [click((button.x, button.y))]
+    return [pygame.event.Event(pygame.MOUSEMOTION, pos=(button.x, button.y), rel=(0, 0), buttons=(0, 0, 0))]
+
+
+def setup_placement(game, rng):
+    game.set_num_ships(NUM_SHIPS)
+    game.set_state(State.SELECTION)
+
+
+PLACEMENT_KEYS = [pygame.K_RIGHT, pygame.K_DOWN, pygame.K_r, pygame.K_LEFT, pygame.K_UP, pygame.K_r]
+
+
+def script_placement(game, frame, rng):
+    # Move and rotate the first ship without ever placing it
+    return [key(PLACEMENT_KEYS[frame % len(PLACEMENT_KEYS)])]
+
+
+def setup_playing(game, rng):
+    game.set_num_ships(NUM_SHIPS)
+    place_fleet(game.player_1_board, rng)
+    place_fleet(game.player_2_board, rng)
+    game.current_player = Player.ONE
+    game.set_state(State.PLAYING)
+
+    # Shots go at every cell of player two's board except one ship's, so the game never ends
+    board = game.player_2_board
+    spared = set(board.ships[-1].coordinates)
+    game.benchmark_targets = [(x, y) for y in range(board.board_size) for x in range(board.board_size) if (x, y) not in spared]
+    rng.shuffle(game.benchmark_targets)
+
+
+def script_playing(game, frame, rng):
+    """
+    Plays player one's turns over and over: a volley highlighting four cells, a key press for a missing
+    powerup showing a message, then single shots. The turn transition is skipped so the screen stays on.
+    """
+    board = game.player_2_board
+    pygame.time.set_timer(TURN_TRANSITION_EVENT, 0)
+    game.player_can_shoot = True
+
+    step = frame % 8
+    if step == 0:
+        game.reset_shot_selection()
+        board.get_powerups()[VOLLEY] = True
+        return [key(pygame.K_4)]
+    if step == 5:
+        game.reset_shot_selection()
+        board.get_powerups()[NUKE] = False
+        return [key(pygame.K_1)]
+
+    targets = game.benchmark_targets
+    x, y = targets[frame % len(targets)]
+    return [click(((x + 0.5) * board.col_size, board.y_offset + (y + 0.5) * board.col_size))]
+
+
+def setup_finish(game, rng):
+    game.winner = Player.ONE
+    game.screens[State.END] = FinishScreen(game, 1)
+    game.set_state(State.END)
+
+
+def script_finish(game, frame, rng):
+    return [pygame.event.Event(pygame.MOUSEMOTION, pos=(frame % SCREEN_WIDTH, SCREEN_HEIGHT // 2), rel=(1, 0), buttons=(0, 0, 0))]
+
+
+def scenarios(grid_sizes):
+    """Returns (name, screen, grid size, setup, script) for every scenario to run"""
+    yield "menu", "MenuScreen", GRID_SIZE, setup_menu, script_menu
+    for size in grid_sizes:
+        yield f"placement-{size}", "SelectionScreen", size, setup_placement, script_placement
+    for size in grid_sizes:
+        yield f"playing-{size}", "PlayingScreen", size, setup_playing, script_playing
+    yield "finish", "FinishScreen", GRID_SIZE, setup_finish, script_finish
+
+
+def run_frames(game, script, rng, first, count, on_frame=None):
+    """Runs count frames, posting the script's events before each one"""
+    for frame in range(first, first + count):
+        for event in script(game, frame, rng):
+            pygame.event.post(event)
+        # Scripted frames never wait for input, even on screens that would otherwise go idle
+        game.frame_pending = True
+        if on_frame is None:
+            game.run_frame()
+        else:
+            on_frame(game.run_frame)
+    return first + count
+
+
+def run_scenario(surface, name, screen, grid_size, setup, script, frames, warmup):
+    pygame.event.clear()
+    rng = random.Random(SEED)
+    # Powerup rolls are seeded too, so every run plays the same frames
+    game = Game(UncappedClock(), surface, grid_size, seed=SEED)
+    setup(game, rng)
+    frame = run_frames(game, script, rng, 0, warmup)
+
+    # Wall time and frame time percentiles, with the game's own profiler breaking frames into phases
+    game.profiler = FrameProfiler(frames)
+    start = time.perf_counter()
+    frame = run_frames(game, script, rng, frame, frames)
+    wall = time.perf_counter() - start
+
+    # Allocations are measured in a separate pass, tracing slows every allocation down
+    peaks = []
+    blocks = []
+
+    def traced(run_frame):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        blocks_before = sys.getallocatedblocks()
+        run_frame()
+        blocks.append(sys.getallocatedblocks() - blocks_before)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+
+    tracemalloc.start()
+    try:
+        run_frames(game, script, rng, frame, frames, traced)
+    finally:
+        tracemalloc.stop()
+    pygame.time.set_timer(TURN_TRANSITION_EVENT, 0)
+
+    total = game.profiler.percentiles("total")
+    return {
+        "name": name,
+        "screen": screen,
+        "grid_size": grid_size,
+        "state": game.state.name,
+        "frames": frames,
+        "wall_s": round(wall, 4),
+        "fps": round(frames / wall, 1) if wall else None,
+        "frame_ms": {f"p{q}": round(ms, 3) for q, ms in total.items()},
+        "phase_ms": {phase: {f"p{q}": round(ms, 3) for q, ms in game.profiler.percentiles(phase).items()} for phase in PHASES},
+        "alloc": {
+            "peak_kb_mean": round(sum(peaks) / len(peaks) / 1024, 2),
+            "peak_kb_max": round(max(peaks) / 1024, 2),
+            "net_blocks_mean": round(sum(blocks) / len(blocks), 2),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=30, help="frames run before measuring")
+    parser.add_argument("--grid-sizes", default=f"{GRID_SIZE},100,1000", help="comma separated board sizes for placement and playing")
+    parser.add_argument("--only", default=None, help="only run scenarios whose name contains this")
+    parser.add_argument("--output", default=None, help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    grid_sizes = list(dict.fromkeys(int(size) for size in args.grid_sizes.split(",")))
+
+    pygame.init()
+    surface = initialize_game_window(SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    results = []
+    for name, screen, grid_size, setup, script in scenarios(grid_sizes):
+        if args.only and args.only not in name:
+            continue
+        # The game prints as it goes, keep stdout for the JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            results.append(run_scenario(surface, name, screen, grid_size, setup, script, args.frames, args.warmup))
+        print(f"{name}: {results[-1]['fps']} fps", file=sys.stderr)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "sdl": ".".join(map(str, pygame.get_sdl_version())),
+        "video_driver": pygame.display.get_driver(),
+        "platform": platform.platform(),
+        "scenarios": results,
+    }
+    pygame.quit()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,241 @@
+import random
 import pygame
 from typing import Optional
-import sys
 from pygame import Surface
-import random
 
-from .types import Coordinate
-from .config import COL_SIZE
-from .cell import Cell
-from .audio import Audio
+from .types import Coordinate, Color
+from .config import SCREEN_WIDTH, MIN_CELL_PX
+from .cell import Cell, CELL_MARGIN, CELL_GUTTER
 from .ship import Ship
+from .rules import BoardState, ShotResult, POWERUP_NAMES, roll_powerup, grant_powerup
+from .rules.bitboard import iter_bits
+from .sprites import board_background
+
+
+class _CellRow:
+    """One row of a CellGrid, indexed by x"""
+    def __init__(self, grid: "CellGrid", y: int) -> None:
+        self.grid = grid
+        self.y = y
+
+    def __getitem__(self, x: int) -> Cell:
+        return self.grid.get(x, self.y)
+
+    def __len__(self) -> int:
+        return self.grid.size
+
+    def __iter__(self):
+        return (self.grid.get(x, self.y) for x in range(self.grid.size))
+
+
+class CellGrid:
+    """
+    The cells of a board, indexed as cells[y][x]. A Cell is only built the first time it is looked up,
+    so large boards do not pay for a Cell and pygame.Rect per grid square up front.
+    """
+    def __init__(self, board: "Board") -> None:
+        self.board = board
+        self.size = board.board_size
+        self._cells = {}
+
+    def get(self, x: int, y: int) -> Cell:
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            raise IndexError(f"cell ({x}, {y}) is off the board")
+        index = y * self.size + x
+        cell = self._cells.get(index)
+        if cell is None:
+            cell = self._cells[index] = Cell(x, y, self.board)
+        return cell
+
+    def __getitem__(self, y: int) -> _CellRow:
+        if not 0 <= y < self.size:
+            raise IndexError(f"row {y} is off the board")
+        return _CellRow(self, y)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        return (_CellRow(self, y) for y in range(self.size))
+
 
 class Board:
-    def __init__(self, y_offset, board_size, ship_size) -> None:
-        self.cells = [[Cell(x, y, y_offset) for x in range(board_size)] for y in range(board_size)]
+    """
+    Pygame adapter over a rules BoardState: owns the Cells used for rendering and click handling,
+    while ships, shots and powerups are kept by the rules board.
+    """
+    def __init__(self, y_offset, board_size, ship_size, dirty=None, rng=random) -> None:
+        self.y_offset = y_offset
+        self.board_size = board_size
+        self.state = BoardState(board_size, ship_size)
+
+        #Grid geometry in px, the gutters shrink along with the cells on larger grids
+        self.col_size = SCREEN_WIDTH / board_size
+        scale = min(1, self.col_size / 40)
+        self.cell_margin = round(CELL_MARGIN * scale)
+        self.cell_gutter = round(CELL_GUTTER * scale)
+        #Cells too small to draw one by one are drawn as one pixel each on a surface scaled up to the board
+        self.compact = self.col_size < MIN_CELL_PX
+        self._pixels = None
+        self._scaled = {}
+
+        #DirtyRegions of the window the board is drawn to, marked whenever a cell changes
+        self.dirty = dirty
+        #Random number generator the powerup rolls are drawn from
+        self.rng = rng
+        #ReplayRecorder told about every placement, shot and powerup grant on the board, None when not recording
+        self.recorder = None
+
+        #Bit indexes of cells under the ship being placed and of highlighted cells
+        self.active = set()
+        self.highlighted = set()
+
+        self.cells = CellGrid(self)
 
         self.ship_size = ship_size
-        self.ships = []
-        self.powerups = [False, False, False, False, False]
+
+    @property
+    def ships(self):
+        return self.state.ships
+
+    @property
+    def powerups(self):
+        return self.state.powerups
 
     def get_powerups(self):
         """
         Returns the current state of the powerup array.
         """
-        return self.powerups
+        return self.state.powerups
     
     def set_powerups(self, powerups):
         """
         Sets the state of the powerup array.
         """
-        self.powerups = powerups
+        self.state.powerups = powerups
+
+    @property
+    def rect(self) -> pygame.Rect:
+        """The area of the window covered by the board"""
+        return pygame.Rect(0, self.y_offset, SCREEN_WIDTH, SCREEN_WIDTH)
 
     def draw(self, surface: Surface, show_ships: bool = True):
-        for row in self.cells:
-            for cell in row:
-                cell.draw(surface, show_ships)
-        for ship in self.ships:
-            ship.draw(self)
+        self.draw_region(surface, self.rect, show_ships)
+
+    def draw_region(self, surface: Surface, region: pygame.Rect, show_ships: bool = True):
+        """
+        Draws only the cells whose grid slots overlap the given area of the window
+        """
+        if self.compact:
+            return self.draw_compact(surface, show_ships)
+
+        #The cached background has every cell drawn neutral, so only the other cells need a blit
+        area = region.clip(self.rect)
+        if not area:
+            return
+        surface.blit(board_background(self), area.topleft, area.move(0, -self.y_offset))
+
+        col_size = self.col_size
+        first_x = int(area.left // col_size)
+        last_x = min(self.board_size - 1, int((area.right - 1) // col_size))
+        first_y = int((area.top - self.y_offset) // col_size)
+        last_y = min(self.board_size - 1, int((area.bottom - 1 - self.y_offset) // col_size))
+        for index in self.marked_cells(show_ships):
+            x, y = index % self.board_size, index // self.board_size
+            if first_x <= x <= last_x and first_y <= y <= last_y:
+                self.cells[y][x].draw(surface, show_ships)
+
+    def marked_cells(self, show_ships: bool = True):
+        """
+        Returns the bit indexes of every cell which may not be drawn neutral
+        """
+        bits = self.state.bits
+        if not show_ships:
+            return iter_bits(bits.hits | bits.misses)
+        return set(iter_bits(bits.hits | bits.misses | bits.ships)) | self.highlighted | self.active
+
+    def draw_compact(self, surface: Surface, show_ships: bool = True):
+        """
+        Draws the board from a surface holding one pixel per cell, scaled up to the size of the board
+        """
+        if self._pixels is None:
+            self._pixels = {visible: self.build_pixels(visible) for visible in (True, False)}
+        scaled = self._scaled.get(show_ships)
+        if scaled is None:
+            scaled = self._scaled[show_ships] = pygame.transform.scale(self._pixels[show_ships], (SCREEN_WIDTH, SCREEN_WIDTH))
+        surface.blit(scaled, (0, self.y_offset))
+
+    def build_pixels(self, show_ships: bool) -> Surface:
+        """
+        Builds the one pixel per cell surface, only visiting cells which are not neutral
+        """
+        pixels = Surface((self.board_size, self.board_size))
+        pixels.fill(Color.CELL_NEUTRAL)
+        for index in self.marked_cells(show_ships):
+            pixels.set_at((index % self.board_size, index // self.board_size), self.pixel_color(index, show_ships))
+        return pixels
+
+    def pixel_color(self, index: int, show_ships: bool) -> pygame.Color:
+        """
+        The color of a cell when drawn as a single pixel, following the same precedence as Cell.draw
+        """
+        bit = 1 << index
+        bits = self.state.bits
+        if not show_ships and not (bits.hits | bits.misses) & bit:
+            return Color.CELL_NEUTRAL
+        if index in self.highlighted:
+            return Color.YELLOW
+        if bits.hits & bit:
+            return Color.RED
+        if bits.misses & bit:
+            return Color.WHITE
+        if bits.ships & bit or index in self.active:
+            return Color.GREEN
+        return Color.CELL_NEUTRAL
+
+    def cell_changed(self, coord: Coordinate):
+        """
+        Called whenever the state of the cell at the given grid coordinate changes, so cached drawings stay current
+        """
+        if self._pixels is not None:
+            index = self.state.index(coord)
+            for visible, pixels in self._pixels.items():
+                pixels.set_at(coord, self.pixel_color(index, visible))
+            self._scaled = {}
+        if self.dirty is not None:
+            self.dirty.mark(self.slot_rect(coord))
+
+    def slot_rect(self, coord: Coordinate) -> pygame.Rect:
+        """The area of the window covered by the grid slot of a cell, gutters included"""
+        x, y = coord
+        left = int(x * self.col_size)
+        top = int(y * self.col_size + self.y_offset)
+        return pygame.Rect(left, top, int((x + 1) * self.col_size) - left + 1, int((y + 1) * self.col_size + self.y_offset) - top + 1)
+
+    def cell_at(self, coord: Coordinate) -> Optional[Cell]:
+        """
+        Maps a pixel position straight to the cell drawn under it, without searching the grid
+
+        Args:
+            coord (Tuple[int, int]): The x and y coordinate in px
+        Returns:
+            Cell or None: The Cell under the coordinate, or None if it lands outside the board or in a gutter
+        """
+        col_size = self.col_size
+        px, py = coord[0], coord[1] - self.y_offset
+        grid_x = int(px // col_size)
+        grid_y = int(py // col_size)
+        if not (0 <= grid_x < self.board_size and 0 <= grid_y < self.board_size):
+            return None
+
+        #Reject positions which fall in the gutters between cells
+        local_x = px - grid_x * col_size
+        local_y = py - grid_y * col_size
+        if not (self.cell_margin <= local_x < col_size - self.cell_gutter + self.cell_margin):
+            return None
+        if not (self.cell_margin <= local_y < col_size - self.cell_gutter + self.cell_margin):
+            return None
+        return self.cells[grid_y][grid_x]
 
     def hit_pos(self, coord: Coordinate) -> Optional[Cell]:
         """
@@ -47,181 +247,106 @@ class Board:
         Returns:
             Cell or None: The Cell hit by the coordinate, or None if no cells in the board were hit
         """
+        cell = self.cell_at(coord)
+        if cell is not None and cell.shoot():
+            self.shot_landed(cell)
+            return cell
+        return None
 
-        for row in self.cells:
-            for cell in row:
-                if cell.hit(coord, self):
-                    #print("Cell hit")
-                    self.assign_powerup_chance()
-                    return cell
+    def fire(self, coord: Coordinate) -> Optional[Cell]:
+        """
+        Like hit_pos, but takes the x and y grid coordinate of the cell instead of a position in px
+        """
+        if self.state.in_bounds(coord):
+            cell = self.cells[coord[1]][coord[0]]
+            if cell.shoot():
+                self.shot_landed(cell)
+                return cell
+        return None
 
-        print("No cell hit")
+    def shot_landed(self, cell: Cell):
+        """
+        Records the shot which just landed on the cell, then rolls for a powerup
+        """
+        if self.recorder is not None:
+            if cell.ship is None:
+                result = ShotResult.MISS
+            else:
+                result = ShotResult.SINK if cell.ship.is_sunk() else ShotResult.HIT
+            self.recorder.shot(self.state, cell.coordinate, result)
+        self.assign_powerup_chance()
 
-        return None
-    
     def assign_powerup_chance(self):
         """
-        Assign a powerup to the player with a 50% chance
-        """
-        if random.random() < 0.2:  # 10% chance
-            powerup_chance = random.random()
-            if powerup_chance < 0.2:  # 20% chance for powerup 1
-                print("Got nuke")
-                if self.powerups[0] == False:
-                    self.powerups[0] = True
-                    # Audio.play_pickup()
-                else:
-                    print("Duplicate powerup wasted")
-            elif powerup_chance < 0.2:  # 40% chance for powerup 2
-                print("Got Bombing Run (horizontal)")
-                if self.powerups[1] == False:
-                    self.powerups[1] = True
-                    # Audio.play_pickup()
-                else:
-                    print("Duplicate powerup wasted")
-            elif powerup_chance < 0.2:  # 40% chance for powerup 3
-                print("Got Bombing Run (vertical)")
-                if self.powerups[2] == False:
-                    self.powerups[2] = True
-                    # Audio.play_pickup()
-                else:
-                    print("Duplicate powerup wasted")
-            elif powerup_chance < 0.2:  # 40% chance for powerup 5
-                print("Got Radar")
-                if self.powerups[4] == False:
-                    self.powerups[4] = True
-                    # Audio.play_pickup()
-                else:
-                    print("Duplicate powerup wasted")
-            else:  # 40% chance for powerup 4
-                print("Got Volley")
-                if self.powerups[3] == False:
-                    self.powerups[3] = True
-                    # Audio.play_pickup()
-                else:
-                    print("Duplicate powerup wasted")
-
-
-    def spawnShip(self):
-        """
-        Spawns a ship on the board
-        """
-        count = 0
-        ship_size = self.ship_size
-        while count < self.ship_size:
-            self.placeShip(ship_size)
-            count += 1
-            ship_size -= 1
-
-    def placeShip(self, ship_size):
-        """
-        Places a ship on the board and allows the player to move it around
-        """
-        x = 5
-        y = 5
-        direction = ["VERTICAL", "HORIZONTAL"]
-        direction_counter = 0
-        valid_direction_counter = direction_counter
-
-        ship = Ship(x, y, ship_size, direction[valid_direction_counter])
-
-        place_ship = True
-        while place_ship:
-            events = pygame.event.get()
-            for event in events:
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_LEFT:
-                        ship.move("LEFT")
-                    elif event.key == pygame.K_RIGHT:
-                        ship.move("RIGHT")
-                    elif event.key == pygame.K_UP:
-                        ship.move("UP")
-                    elif event.key == pygame.K_DOWN:
-                        ship.move("DOWN")
-                    elif event.key == pygame.K_RETURN:
-                        if self.isValidShipLocation(ship):
-                            self.ships.append(ship)
-                            self.mark_ship_cells(ship)
-                            place_ship = False
-                    elif event.key == pygame.K_r:
-                        # cycle through the direction
-                        direction_counter = (direction_counter+1) % len(direction)
-                        if ship.isValidDirection(direction[valid_direction_counter]):
-                            valid_direction_counter = direction_counter
-                            ship.changeDirection(direction[valid_direction_counter])
-                        else:
-                            direction_counter = valid_direction_counter
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-
-            self.reset_cells()
-            ship.draw(self)
-            self.draw(pygame.display.get_surface())
-            pygame.display.update()
+        Rolls for a powerup after a successful shot and adds it to the player's inventory
+        """
+        powerup = roll_powerup(self.rng)
+        if powerup is not None:
+            print("Got", POWERUP_NAMES[powerup])
+            kept = grant_powerup(self.state.powerups, powerup)
+            if not kept:
+                print("Duplicate powerup wasted")
+            if self.recorder is not None:
+                self.recorder.granted(self.state, powerup, kept)
+            # else: Audio.play_pickup()
 
     def isValidShipLocation(self, newShip: Ship):
         """
         Checks if the new ship is in a valid location on the board and does not intersect with any other ships
         """
-        coord_newShip = set(newShip.coordinates)
-        for ship in self.ships:
-            if coord_newShip.intersection(set(ship.coordinates)):
-                return False
-        return True
+        return self.state.can_place(newShip)
 
-    def reset_cells(self):
+    def preview_ship(self, ship: Optional[Ship]):
         """
-        Resets the is_active state of all cells to False
+        Shows a ship which is still being placed by marking its cells active, or clears the preview if ship is None.
+        Only cells entering or leaving the ship's footprint are updated.
         """
-        for row in self.cells:
-            for cell in row:
-                cell.is_active = False
+        footprint = set()
+        if ship is not None:
+            footprint = {self.state.index(coord) for coord in ship.coordinates if self.state.in_bounds(coord)}
+        changed = footprint ^ self.active
+        self.active = footprint
+        for index in changed:
+            self.cell_changed((index % self.board_size, index // self.board_size))
 
     def mark_ship_cells(self, ship: Ship):
         """
-        Marks the cells occupied by the ship as having a ship
+        Places the ship on the rules board, marking the cells it occupies as having a ship
         """
-        for (x, y) in ship.coordinates:
-            self.cells[y][x].has_ship = True
+        self.state.place_ship(ship)
+        if self.recorder is not None:
+            self.recorder.placed(self.state, ship)
+        for coord in ship.coordinates:
+            self.cell_changed(coord)
 
     def all_ships_sunk(self) -> bool:
-        if len(self.ships) == self.ship_size:
-            for ship in self.ships:
-                if not self.is_ship_sunk(ship):
-                    return False
-            return True
-        return False
+        return self.state.all_ships_sunk()
 
     def check_ship_sunk(self, hit_cell: Cell) -> bool:
-        print("Checking if ship sunk", hit_cell.x // COL_SIZE, hit_cell.y // COL_SIZE)
-        print(self.ships)
-        for ship in self.ships:
-            print(ship.coordinates)
-            if (hit_cell.x // COL_SIZE, (hit_cell.y // COL_SIZE)) in ship.coordinates:
-                if not self.is_ship_sunk(ship):
-                    print("Ship sunk")
-                    Audio.play_sink()
-                    return True
-                else:
-                    print("Ship not sunk")
-        return False
+        """
+        Checks whether the ship occupying the given cell has been sunk
+        """
+        return hit_cell.ship is not None and hit_cell.ship.is_sunk()
 
     def is_ship_sunk(self, ship: Ship) -> bool:
-        for (x, y) in ship.coordinates:
-            cell = self.cells[y][x]
-            if not cell.is_hit:
-                return False
-        return True
-    
+        return ship.is_sunk()
+
     def highlight_cells(self, positions):
         """Highlights cells based on the given positions (for volley and radar)."""
-        for (x, y) in positions:
-            if 0 <= x < len(self.cells) and 0 <= y < len(self.cells[0]):
-                self.cells[y][x].highlight(True)
+        for coord in positions:
+            if self.state.in_bounds(coord):
+                self.set_highlight(coord, True)
+
+    def set_highlight(self, coord: Coordinate, highlight: bool):
+        index = self.state.index(coord)
+        if highlight:
+            self.highlighted.add(index)
+        else:
+            self.highlighted.discard(index)
+        self.cell_changed(coord)
 
     def reset_highlights(self):
         """Reset highlights for all cells."""
-        for row in self.cells:
-            for cell in row:
-                cell.highlight(False)
\ No newline at end of file
+        highlighted, self.highlighted = self.highlighted, set()
+        for index in highlighted:
+            self.cell_changed((index % self.board_size, index // self.board_size))
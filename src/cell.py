@@ -2,73 +2,85 @@ import pygame
 
 from pygame import Surface
 
-from .config import SCREEN_HEIGHT, SCREEN_WIDTH, COL_SIZE
-
 from .types import Coordinate
 from .types import Color
 from .audio import Audio
+from . import sprites
+from .rules import ShotResult
+
+#Gap in px between the edge of a grid slot and the cell drawn inside it, for a 40px grid slot
+CELL_MARGIN = 3
+#Total px of a grid slot taken up by the gutters around a cell, for a 40px grid slot
+CELL_GUTTER = 7
 
 #Offset equals either 0 or SCREEN_HEIGHT/2 to put the boards on top of each other
 class Cell:
-    def __init__(self, x: int, y: int, offset) -> None:
-        #Booleans to track the state of a given cell
-        self.is_hit: bool = False
-        self.is_active: bool = False
-        self.has_ship: bool = False
-        self.is_highlighted: bool = False  # New flag for highlighting
+    def __init__(self, x: int, y: int, board) -> None:
+        #Hit and ship state live in the rules board, highlight and placement state in the Board. The cell is a view over them for rendering
+        self.board = board
+        self.state = board.state
+        self.index = self.state.index((x, y))
+        self.bit = 1 << self.index
         self.visible = True
 
         #x & y are the coordinates of the cell while the width and height describes the shape of the cell while the offset tells pygame where to put the boards relative to each other on the y axis
         self.coordinate = (x,y)
-        self.x = x * COL_SIZE + 3
-        self.y = y * COL_SIZE + 3 + offset
-        self.width = COL_SIZE - 7
-        self.height = COL_SIZE - 7
-        self.offset = offset #Offset equals either 0 or SCREEN_HEIGHT/2 to put the boards on top of each other
+        self.x = x * board.col_size + board.cell_margin
+        self.y = y * board.col_size + board.cell_margin + board.y_offset
+        self.width = board.col_size - board.cell_gutter
+        self.height = board.col_size - board.cell_gutter
+        self.offset = board.y_offset #Offset equals either 0 or SCREEN_HEIGHT/2 to put the boards on top of each other
 
         self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
 
+    @property
+    def is_active(self) -> bool:
+        """Whether the cell is under a ship which is still being placed"""
+        return self.index in self.board.active
+
+    @property
+    def is_highlighted(self) -> bool:
+        return self.index in self.board.highlighted
+
+    @property
+    def is_hit(self) -> bool:
+        bits = self.state.bits
+        return bool((bits.hits | bits.misses) & self.bit)
+
+    @property
+    def ship(self):
+        """The ship occupying the cell, or None"""
+        return self.state.ship_at_coord(self.coordinate)
+
+    @property
+    def has_ship(self) -> bool:
+        return bool(self.state.bits.ships & self.bit)
+
     # def draw_hit(self, surface: Surface):
     #     # Position the hit marker in the center of the Cell
     #     center = (self.x + self.width/2, self.y + self.height/2)
     #     pygame.draw.circle(surface, Color.WHITE, center, 3)
 
 
-    def draw_normal(self, surface: Surface):
+    def sprite_state(self, visible: bool = True) -> str:
+        """
+        Returns which of the pre-rendered cell sprites the cell is drawn with
+        """
+        if not visible and not self.is_hit:
+            return sprites.NEUTRAL
+        if self.is_highlighted:  # Render the highlighted state differently
+            return sprites.HIGHLIGHTED
         if self.is_hit:
-            if self.has_ship:
-                color = Color.RED
-                pygame.draw.rect(surface, color, (self.x, self.y, self.width, self.height))
-                center = (self.x + self.width/2, self.y + self.height/2)
-                pygame.draw.circle(surface, Color.RED, center, 3)
-            else:
-                color = Color.BACKGROUND
-                pygame.draw.rect(surface, color, (self.x, self.y, self.width, self.height))
-                center = (self.x + self.width/2, self.y + self.height/2)
-                pygame.draw.circle(surface, Color.WHITE, center, 3)
-        elif self.has_ship:
-            color = Color.GREEN
-            pygame.draw.rect(surface, color, (self.x, self.y, self.width, self.height))
-        elif self.is_active:
-            color = Color.GREEN
-            pygame.draw.rect(surface, color, (self.x, self.y, self.width, self.height))
-        else:
-            color = Color.CELL_NEUTRAL
-            pygame.draw.rect(surface, color, (self.x, self.y, self.width, self.height))
-
-    def draw_invisible(self, surface: Surface):
-        pygame.draw.rect(surface, Color.CELL_NEUTRAL, (self.x, self.y, self.width, self.height))
-
+            return sprites.HIT if self.has_ship else sprites.MISS
+        if self.has_ship:
+            return sprites.SHIP
+        if self.is_active:
+            return sprites.ACTIVE
+        return sprites.NEUTRAL
 
     def draw(self, surface: Surface, visible: bool = True):
-        if not visible and not self.is_hit:
-            return self.draw_invisible(surface)
-
-        if self.is_highlighted:  # Render the highlighted state differently
-            color = Color.YELLOW  # Highlighted cells will be yellow
-            pygame.draw.rect(surface, color, (self.x, self.y, self.width, self.height))
-        else:
-            self.draw_normal(surface)
+        sprite = sprites.cell_sprites(self.width, self.height)[self.sprite_state(visible)]
+        surface.blit(sprite, (self.x, self.y))
 
     def hit(self, coordinate: Coordinate, board) -> bool:
         """
@@ -79,18 +91,45 @@ class Cell:
         Returns:
             bool: True if the cell was hit, False otherwise
         """
-        hit = self.rect.collidepoint(coordinate)
-
-        if hit and not self.is_hit:  # Check if it's not already hit
-            self.is_hit = True
-            if self.has_ship:
-                Audio.play_hit()
-                board.check_ship_sunk(self)
-            else:
-                Audio.play_miss()
-            return True
+        if self.rect.collidepoint(coordinate):
+            return self.shoot()
         return False
-    
+
+    def show_shot(self, result: ShotResult):
+        """
+        Marks the cell with the result of a shot resolved elsewhere, by the game server in online games where
+        the ships on the opponent's board are not known
+        """
+        bits = self.state.bits
+        if result == ShotResult.MISS:
+            bits.misses |= self.bit
+            Audio.play_miss()
+        else:
+            bits.ships |= self.bit
+            bits.hits |= self.bit
+            Audio.play_hit()
+            if result == ShotResult.SINK:
+                Audio.play_sink()
+        self.board.cell_changed(self.coordinate)
+
+    def shoot(self) -> bool:
+        """
+        "Hits" the cell without any collision check. Returns False if the cell had already been hit
+        """
+        result = self.state.fire(self.coordinate)
+        self.board.cell_changed(self.coordinate)
+        if result == ShotResult.MISS:
+            Audio.play_miss()
+        elif result == ShotResult.HIT:
+            Audio.play_hit()
+        elif result == ShotResult.SINK:
+            Audio.play_hit()
+            print("Ship sunk")
+            Audio.play_sink()
+        else:  # Already hit
+            return False
+        return True
+
     def highlight(self, highlight: bool):
         """Sets whether the cell is highlighted."""
-        self.is_highlighted = highlight
\ No newline at end of file
+        self.board.set_highlight(self.coordinate, highlight)
\ No newline at end of file
@@ -1,6 +1,28 @@
+import os
+
 # Game-Wide configurable values
 FPS = 30
+# Longest time in ms the main loop blocks waiting for input while the screen is idle
+IDLE_TIMEOUT = 1000
+# Time in ms a CPU move may take, within one frame at FPS. Anytime strategies fire on their best shot so far
+# when it runs out. None lets every move take as long as it needs, as seeded games do so they replay exactly.
+CPU_MOVE_BUDGET_MS = 25
+# Frames kept by the frame time profiler, F3 shows its HUD and F4 exports it to FRAME_TIMES_CSV
+FRAME_HISTORY = 600
+FRAME_TIMES_CSV = "frame_times.csv"
+# F5 saves a snapshot of the game here and F9 loads it back
+SAVE_FILE = "battleship.sav"
+# Seed of every random draw (powerups, CPU fleets and moves, randomized fleets), so a run can be reproduced,
+# e.g. BATTLESHIP_SEED=42. Unset, every run is seeded from the OS. main.py's --seed overrides it.
+SEED = int(os.environ["BATTLESHIP_SEED"]) if os.environ.get("BATTLESHIP_SEED") else None
+# Every game is recorded as a replay in this directory when set, see src/replay.py
+REPLAY_DIR = os.environ.get("BATTLESHIP_REPLAY_DIR")
+# "host:port" of the game server online games are played on, see src/net/server.py. main.py's --server overrides it.
+SERVER_ADDRESS = os.environ.get("BATTLESHIP_SERVER", "127.0.0.1:8765")
 SCREEN_WIDTH = 400
 SCREEN_HEIGHT = 800
-GRID_SIZE = 10
+# Cells per board side, can be overridden for stress testing e.g. BATTLESHIP_GRID_SIZE=100
+GRID_SIZE = int(os.environ.get("BATTLESHIP_GRID_SIZE", 10))
 COL_SIZE = SCREEN_WIDTH / GRID_SIZE
+# Below this many px per cell boards are drawn one pixel per cell and scaled up, instead of cell by cell
+MIN_CELL_PX = 6
@@ -3,232 +3,160 @@
 #Course: EECS 581
 #Purpose: Define the AI player class and methods to player battleship with the user
 
-from random import randint
-from . import ship, cell, board
-from .config import COL_SIZE, SCREEN_HEIGHT, GRID_SIZE
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import board
+from .ai import STRATEGIES, MoveTelemetry
+from .config import GRID_SIZE, CPU_MOVE_BUDGET_MS
+from .rules import RandomStreams, ShotResult, require_fleet
+from .rules.bitboard import iter_bits
+
+#Strategy played at each setting of the difficulty screen, hard is the fair Monte Carlo search
+DIFFICULTY_STRATEGIES = {"easy": "easy", "medium": "medium", "hard": "monte_carlo"}
 
 class CPU():
     #The CPU manages the hits, misses, ships sunk, its board, and its ships after being randomly generated
-    def __init__(self, num_ships):
+    #Every random draw comes from streams, its fleet and each strategy drawing from a stream of their own
+    def __init__(self, num_ships, grid_size=GRID_SIZE, difficulty="medium", move_budget=CPU_MOVE_BUDGET_MS, streams=None):
+        self.grid_size = grid_size
+        self.difficulty = difficulty
+        self.streams = RandomStreams() if streams is None else streams
         self.ships = []
         self.hits = []
         self.miss = []
+        #Every cell fired at in order, kept for snapshots since the strategies' picks depend on the order of their shots
+        self.shots = []
         self.ships_sunk = 0
-        self.board = board.Board(y_offset=0, board_size=GRID_SIZE, ship_size=num_ships)
-        self.create_ships()
-        self.board.ships = self.ships
+        #Only the strategy played at the difficulty is built and told about shots, the player's fleet has one ship of each length up to num_ships
+        name = DIFFICULTY_STRATEGIES[difficulty]
+        self.strategy = STRATEGIES[name](grid_size, range(1, num_ships + 1), self.streams.stream(name))
+        #Every move gets move_budget ms (None for no limit), how the moves went against it is kept for tuning difficulty
+        self.telemetry = MoveTelemetry(move_budget)
+        #Thread choosing shots in the background for start_move, started on the first one, and the future of the move under way
+        self.worker = None
+        self.move = None
+        #Draws from the strategy's stream when the move under way started, the move starts over from there after loading a snapshot
+        self.move_rng_draws = None
+        #Strategies with worker processes start them on the worker thread ahead of the first move, rather than within its budget
+        start = getattr(self.strategy, "start", None)
+        if start is not None:
+            self.worker = ThreadPoolExecutor(max_workers=1)
+            self.worker.submit(start)
+        self.board = board.Board(y_offset=0, board_size=grid_size, ship_size=num_ships)
+        self.create_ships(num_ships)
     
-    #Randomly generates and adds all of the ships to CPU's ships
+    #Takes over a game in progress, such as a loaded one: the fleet already on own_board and the shots already fired at otherBoard,
+    #replayed in the order given. Without one every shot goes by cell, with the last cell of each sunk ship fired last.
+    def take_over(self, own_board, otherBoard, shots=None):
+        self.board = own_board
+        self.ships = list(own_board.ships)
+        state = otherBoard.state
+        size = state.size
+        if shots is None:
+            fired = [(index % size, index // size) for index in iter_bits(state.bits.hits | state.bits.misses)]
+            last = {ship.coordinates[-1] for ship in state.ships if ship.is_sunk()}
+            shots = [coord for coord in fired if coord not in last] + [coord for coord in fired if coord in last]
+        #A ship sinks at the shot at the last of its cells
+        afloat = {}
+        for coord in shots:
+            self.shots.append(coord)
+            ship_at = state.ship_at_coord(coord)
+            if ship_at is None:
+                self.miss.append(coord)
+                self.strategy.record(coord, ShotResult.MISS)
+                continue
+            self.hits.append(coord)
+            afloat[id(ship_at)] = afloat.get(id(ship_at), ship_at.length) - 1
+            if afloat[id(ship_at)] == 0:
+                self.ships_sunk += 1
+                self.strategy.record(coord, ShotResult.SINK, ship_at.coordinates)
+            else:
+                self.strategy.record(coord, ShotResult.HIT)
+
+    #Randomly generates and adds all of the ships to CPU's ships, one of each length up to num_ship
+    #Raises ValueError if the fleet does not fit on the grid
     def create_ships(self, num_ship):
-        #Defines coordinates that are used
-        used_coord = []
-        shipLength = [1, 2, 3, 4, 5]
-        i = 0
-        #Iterates ship lengths until all ships are populated
-        while i < num_ship:
-            new_ship = None
-            
-            #Generates ships coordinates until a valid ship is generated
-            while new_ship == None:
-                new_ship = self.place_ships(shipLength[i], used_coord)
-            #Adds ships to CPU's ships and used coordinates
+        #Largest first, the generator backtracks if a ship has no room left
+        for new_ship in require_fleet(self.grid_size, range(num_ship, 0, -1), self.streams.stream("fleet")):
             self.ships.append(new_ship)
-            used_coord.append(new_ship.coordinates)
             self.board.mark_ship_cells(new_ship)
 
-    def record_hit(self, coord_cell, otherBoard):
-        coord = coord_cell.coordinate
-        #Checks if the shoot is a hit or miss
-        if coord_cell.hit(coord, otherBoard):
-            self.hits.append(coord)
-        else:
+    #Has the strategy choose its next shot within the move budget, runs on the worker thread for start_move
+    def choose_shot(self, strategy):
+        start = time.perf_counter()
+        coord = strategy.choose(self.telemetry.deadline(start))
+        self.telemetry.add(time.perf_counter() - start, strategy.cut_short)
+        return coord
+
+    #Starts choosing the next shot on the worker thread, so the game keeps drawing frames meanwhile
+    #The choice is made there, poll_move fires the shot on the game's thread once it is ready
+    def start_move(self):
+        if self.worker is None:
+            self.worker = ThreadPoolExecutor(max_workers=1)
+        self.move_rng_draws = self.strategy.rng.draws()
+        self.move = self.worker.submit(self.choose_shot, self.strategy)
+
+    def thinking(self):
+        return self.move is not None
+
+    #Draws from the strategy's stream for a snapshot, as they were before the move under way since only the shots between moves are saved
+    def rng_draws(self):
+        return self.move_rng_draws if self.move is not None else self.strategy.rng.draws()
+
+    #Fires the shot chosen by start_move at otherBoard if it is ready, returns whether it fired
+    def poll_move(self, otherBoard):
+        if self.move is None or not self.move.done():
+            return False
+        coord = self.move.result()
+        self.move = None
+        self.fire_at(coord, otherBoard)
+        return True
+
+    #Drops the move under way, a shot already being chosen finishes on the worker thread and is never fired
+    def cancel_move(self):
+        if self.move is not None:
+            self.move.cancel()
+            self.move = None
+
+    #Fires at coord and tells the strategy what the shot did. Once there is a worker thread the strategy's bookkeeping runs
+    #on it rather than holding up a frame, and since it runs one job at a time the next choice still sees the shot
+    def fire_at(self, coord, otherBoard):
+        if coord is None:
+            return
+        coord_cell = otherBoard.fire(coord)
+        if coord_cell is None:
+            return
+        self.shots.append(coord)
+
+        #Works out what the shot did, a sunk ship's coordinates are revealed to the strategy
+        sunk = None
+        if not coord_cell.has_ship:
             self.miss.append(coord)
-
-    #Generates coordinates for ships and either returns a valid ship or None
-    def place_ships(size, used_coord):
-        #Determines direction of ship
-        direction = randint(0, 1)
-        
-        #Creates head of ship
-        x = randint(0, 9)
-        y = randint(0, 9)
-
-        #Vertical direction
-        if direction == 0:
-            #Sets direction and head of ship coordinates
-            direction = 'VERTICAL'
-            if (y + size) > 9:
-                y -= size
-            #Generates coordinates generated by this ship placement
-            ship_coord = [(x,i) for i in range(y,y+size)]
-        #Horizontal direction
-        elif direction == 1:
-            #Sets direction and head of ship coordinates
-            direction = 'HORIZONTAL'
-            if (x + size) > 9:
-                x -= size
-            #Generates coordinates generated by this ship placement
-            ship_coord = [(n,y) for n in range(x,x+size)]
-        
-        #Checks if ship coordinates are already in use
-        for coord in ship_coord:
-            if coord in used_coord:
-                return None
-
-        #Returns a valid ship
-        return ship.Ship(x, y, direction)
-    
-    def easy_attack(self, otherBoard):
-        #Generates random points to attack that has not been used yet
-        cond = True
-        while cond:
-            #Generate coordinates
-            x = randint(0, 9)
-            y = randint(0, 9)
-            coord = (x,y)
-
-            #Checks if coordinates have been used to continue generation
-            if coord in self.miss or coord in self.hits:
-                continue
-            #Break loop
-            cond = False
-
-        #Gets cell and coordinate from board array
-        coord_cell = otherBoard.cells[coord[1],coord[0]]
-
-        #Checks if the shoot is a hit or miss
-        self.record_hit(coord_cell, otherBoard)
-        #Checks if ship was sunk
-        if otherBoard.check_ship_sunk(coord_cell):
+            result = ShotResult.MISS
+        elif otherBoard.check_ship_sunk(coord_cell):
+            self.hits.append(coord)
             self.ships_sunk += 1
-
-    def medium_attack(self, otherBoard):
-        #Sets up variable to track which ship is currently being attacked
-        global cur_hits 
-        cur_hits = []
-
-        #Random hits mode
-        if len(cur_hits) == 0:
-            #Generates random points to attack that has not been used yet
-            cond = True
-            while cond:
-                #Generate coordinates
-                x = randint(0, 9)
-                y = randint(0, 9)
-                coord = (x,y)
-
-                #Checks if coordinates have been used to continue generation
-                if coord in self.miss or coord in self.hits:
-                    continue
-                #Break loop
-                cond = False
-
-            #Gets cell and coordinate from board array
-            coord_cell = otherBoard.cells[coord[1], coord[0]]
-
-            #Checks if the shoot is a hit or miss
-            self.record_hit(coord_cell, otherBoard)
-            cur_hits.append(coord)
-
-        #Targeted attack mode
+            result = ShotResult.SINK
+            sunk = coord_cell.ship.coordinates
         else:
-            #Generates coordinate from generated cell index
-            coord = cur_hits[0]
-            #Gets cell and coordinate from board array
-            coord_cell = otherBoard.cells[coord[1], coord[0]]
-            #Finds direction after intial hit
-            if len(cur_hits) == 1:
-                #Checks coord of cell above 
-                if (coord[1] - 1) >= 0 and coord != self.miss:
-                    #Checks if the shoot is a hit or miss
-                    self.record_hit(coord_cell, otherBoard)
-                    cur_hits.append(coord)
-                    
-                #Checks coord of cell to the right
-                elif (coord[0] + 1) % 10 != 0 and coord != self.miss:
-                    #Checks if the shoot is a hit or miss
-                    self.record_hit(coord_cell, otherBoard)
-                    cur_hits.append(coord)
-                    
-                #Checks coord of cell below
-                elif (coord[1] + 1) <= 9 and coord != self.miss:
-                    #Checks if the shoot is a hit or miss
-                    self.record_hit(coord_cell, otherBoard)
-                    cur_hits.append(coord)
-                    
-                #Checks coord of cell to the left
-                elif (coord[0] - 1) >= 0 and coord != self.miss:
-                    #Checks if the shoot is a hit or miss
-                    self.record_hit(coord_cell, otherBoard)
-                    cur_hits.append(coord)
-                    
-            elif len(cur_hits) > 1:
-                #Ship verticle
-                if cur_hits[0][0] == cur_hits[1][0]:
-                    #Checks upper bound
-                    if coord[1] == 0:
-                        coord = (coord[0], len(cur_hits))
-                        self.record_hit(otherBoard.cells[coord[1]][coord[0]], otherBoard)
-                        cur_hits.append(coord)
-                        
-                    #Checks lower bound
-                    elif coord[1] == 9:
-                        coord = (coord[0], 10-len(cur_hits))
-                        self.record_hit(otherBoard.cells[coord[1]][coord[0]], otherBoard)
-                        cur_hits.append(coord)
-                        
-                    #Attacks down the ship before going up
-                    else:
-                        x = coord[0]
-                        y = coord[1]
-                        if y + len(cur_hits) <= 9 and (x,y+len(cur_hits)) not in self.miss:
-                            coord = (coord[0], y+len(cur_hits))
-                        else:
-                            coord = (coord[0], y-len(cur_hits))
-                        self.record_hit(otherBoard.cells[coord[1]][coord[0]], otherBoard)
-                        cur_hits.append(coord)
-                        
-                #Ship horizontal
-                elif coord[1] == cur_hits[1][1]:
-                    #Checks upper bound
-                    if coord[0] == 0:
-                        coord = (coord[0], len(cur_hits))
-                        self.record_hit(otherBoard.cells[coord[1]][coord[0]], otherBoard)
-                        cur_hits.append(coord)
-                        
-                    #Checks lower bound
-                    elif coord[0] == 9:
-                        coord = (cur_hits[0][0], 10-len(cur_hits))
-                        self.record_hit(otherBoard.cells[coord[1]][coord[0]], otherBoard)
-                        cur_hits.append(coord)
-                        
-                    #Attacks down the ship before going up
-                    else:
-                        x = coord[0]
-                        y = coord[1]
-                        if x + len(cur_hits) <= 9 and (x+len(cur_hits),y) not in self.miss:
-                            coord = (x+len(cur_hits), y)
-                        else:
-                            coord = (x-len(cur_hits), y)
-                        self.record_hit(otherBoard.cells[coord[1]][coord[0]], otherBoard)
-                        cur_hits.append(coord)
-        #Checks if ship was sunk
-        coord_cell = otherBoard.cells[coord[1],coord[0]]
-        if otherBoard.check_ship_sunk(coord_cell):
-            self.ships_sunk += 1
-            cur_hits = []
-
-    #Attack function that knows where all of the ships are
-    #This mode utilizes the self.hits differently than the other functions as hits will be used to store the locations of all of the player ships
-    def hard_attack(self, otherBoard):
-        #Populates self.hits of the coordinates of the player's ships
-        if len(self.hits) == 0 and self.ships_sunk == 0:
-            for ship in otherBoard.ships:
-                self.hits.append(ship.coordinates)
+            self.hits.append(coord)
+            result = ShotResult.HIT
+        if self.worker is not None:
+            self.worker.submit(self.strategy.record, coord, result, sunk)
+        else:
+            self.strategy.record(coord, result, sunk)
+
+    #Cancels any move under way and stops the worker thread and the worker processes of the Monte Carlo strategy
+    #without waiting, the processes are stopped on the worker thread once it is done with a move still being chosen
+    def close(self):
+        self.cancel_move()
+        close_strategy = getattr(self.strategy, "close", None)
+        if self.worker is None:
+            if close_strategy is not None:
+                close_strategy()
         else:
-            if len(self.hits) != 0:
-                hit = self.hits[0]
-                coord_cell = otherBoard.cells[hit[1]][hit[0]]
-                coord_cell.hit(hit)
-                self.hits.pop(0)
-            
\ No newline at end of file
+            if close_strategy is not None:
+                self.worker.submit(close_strategy)
+            self.worker.shutdown(wait=False)
+            self.worker = None
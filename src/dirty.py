@@ -0,0 +1,53 @@
+import pygame
+
+from typing import List
+
+# Past this many separate regions a single full-screen update is cheaper than many small ones
+MAX_REGIONS = 64
+
+
+class DirtyRegions:
+    """
+    Tracks which areas of the window changed, so screens redraw and present only those areas.
+
+    Changes are marked as they happen, a screen takes the pending regions when it renders and the
+    game presents the regions rendered that frame with pygame.display.update(rects).
+    """
+
+    def __init__(self, bounds: pygame.Rect) -> None:
+        self.bounds = pygame.Rect(bounds)
+        self.pending: List[pygame.Rect] = []
+        self.rendered: List[pygame.Rect] = []
+        self.full = True
+
+    def mark(self, rect):
+        """Marks an area of the window as needing a redraw"""
+        if self.full:
+            return
+        rect = self.bounds.clip(pygame.Rect(rect))
+        if rect.width and rect.height:
+            self.pending.append(rect)
+            if len(self.pending) > MAX_REGIONS:
+                self.mark_all()
+
+    def mark_all(self):
+        """Marks the whole window as needing a redraw"""
+        self.full = True
+        self.pending = []
+
+    def take(self) -> List[pygame.Rect]:
+        """
+        Returns the regions a screen should redraw this frame and queues them to be presented
+        """
+        regions = [self.bounds.copy()] if self.full else self.pending
+        self.full = False
+        self.pending = []
+        self.rendered.extend(regions)
+        return regions
+
+    def flush(self) -> List[pygame.Rect]:
+        """
+        Returns the regions rendered since the last present and clears them
+        """
+        rendered, self.rendered = self.rendered, []
+        return rendered
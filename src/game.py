@@ -1,20 +1,33 @@
+import os
 import sys
 import pygame
 from typing import List
 
-from .config import FPS, SCREEN_HEIGHT, GRID_SIZE
+from .config import FPS, SCREEN_HEIGHT, IDLE_TIMEOUT, FRAME_HISTORY, FRAME_TIMES_CSV, SAVE_FILE, REPLAY_DIR, SEED, SERVER_ADDRESS, CPU_MOVE_BUDGET_MS
 
 from .board import Board
+from .cpu import CPU
+from .dirty import DirtyRegions
+from .net.client import RemoteGame
+from .profiler import FrameProfiler, PHASES
+from .rules import RandomStreams
+from . import snapshot
+from .replay import ReplayRecorder, replay_path
+from .text import get_font, render_text
+from .types import Color
 from .types import State, Player
 
-from .screens import MenuScreen, PlayingScreen, FinishScreen, SelectionScreen, TurnTransition, BeginGameScreen
+from .screens import MenuScreen, PlayingScreen, FinishScreen, SelectionScreen, TurnTransition, BeginGameScreen, GameModeScreen, DifficultyScreen
+from .screens.playing import TURN_TRANSITION_EVENT
 
 HALF_HEIGHT = SCREEN_HEIGHT / 2
 
 class Game:
-    def __init__(self, clock, surface: pygame.Surface, grid_size: int) -> None:
+    def __init__(self, clock, surface: pygame.Surface, grid_size: int, seed=SEED, server=SERVER_ADDRESS) -> None:
         self._running = True
         self.clock = clock
+        self.grid_size = grid_size
+        self.server = server  # "host:port" of the game server online games are played on
         self.num_ships = 1
 
         self.current_player = Player.ONE
@@ -23,13 +36,37 @@ class Game:
         self.shot_selection = "single" #tracks player's powerup shot selection - can be "single", "carpet", "run_h", "run_v"
         self.powerup_activity = False #tracks if a powerup is selected so it can only happen once per turn
 
+        # Every random draw of the game comes from its own stream of these, the same seed plays out the same
+        self.streams = RandomStreams(seed)
+        # Powerup rolls are drawn from it, its state is small enough to save in every snapshot
+        self.rng = self.streams.stream("powerups")
+        # A seeded game's CPU moves without a time budget, a budget would make its moves depend on timing
+        self.seeded = seed is not None
+
         self.surface = surface
+        self.dirty = DirtyRegions(surface.get_rect())
+        self.frame_pending = True  # the first frame is drawn before the loop may go idle
+
+        self.profiler = FrameProfiler(FRAME_HISTORY)
+        self.show_hud = False
+        self.hud_lines = []
         self.player_1_board = None
         self.player_2_board = None
 
         self.winner = None
         self.game_over = False
 
+        # Player two's CPU in games against the AI, None in two player games
+        self.cpu = None
+        self.ai_difficulty = None  # "easy", "medium" or "hard", set by the difficulty screen
+        self.cpus_created = 0  # each CPU draws from streams of its own, named after its number
+
+        # Connection to the game server in online games, where player two is the opponent on the other end
+        self.remote = None
+
+        # Writes the game's replay while it is being recorded, see start_recording
+        self.recorder = None
+
         self.message = None
 
         self.state: State = State.START
@@ -39,21 +76,95 @@ class Game:
             State.TURN_TRANSITION: TurnTransition(self),
             State.PLAYING: PlayingScreen(self),
             State.END: FinishScreen(self, self.winner),
-            State.BEGIN_GAME: BeginGameScreen(self)
+            State.BEGIN_GAME: BeginGameScreen(self),
+            State.GAME_MODE: GameModeScreen(self),
+            State.AI_DIFFICULTY: DifficultyScreen(self)
         }
 
     def set_state(self, new_state):
         self.state = new_state
+        self.dirty.mark_all()
 
     def set_num_ships(self, num_ships):
         print("set num ships: ", num_ships)
         self.num_ships = num_ships
         print(self.num_ships)
 
-        self.player_1_board = Board(y_offset=SCREEN_HEIGHT / 2, board_size=GRID_SIZE, ship_size=self.num_ships)
-        self.player_2_board = Board(y_offset=0, board_size=GRID_SIZE, ship_size=self.num_ships)
+        self.stop_recording()
+        self.player_1_board = Board(y_offset=SCREEN_HEIGHT / 2, board_size=self.grid_size, ship_size=self.num_ships, dirty=self.dirty, rng=self.rng)
+        self.player_2_board = Board(y_offset=0, board_size=self.grid_size, ship_size=self.num_ships, dirty=self.dirty, rng=self.rng)
+        if REPLAY_DIR and self.num_ships:
+            self.start_recording(replay_path(REPLAY_DIR))
+
+    def start_recording(self, path: str):
+        """
+        Records the game on the current boards as a replay at path, from the first ship placed until it
+        ends or the boards are replaced
+        """
+        self.stop_recording()
+        self.recorder = ReplayRecorder(path, (self.player_1_board.state, self.player_2_board.state), self.rng)
+        self.player_1_board.recorder = self.player_2_board.recorder = self.recorder
+
+    def stop_recording(self):
+        """Closes the replay being recorded, if any, writing its turn index"""
+        if self.recorder is not None:
+            self.recorder.close()
+            for board in (self.player_1_board, self.player_2_board):
+                if board is not None and board.recorder is self.recorder:
+                    board.recorder = None
+            self.recorder = None
+
+    def start_ai_game(self):
+        """
+        Starts a game against the CPU as player two. It places its fleet on player two's board at once, so
+        only player one goes through ship placement.
+        """
+        self.cpu = self.new_cpu()
+        for ship in self.cpu.ships:
+            self.player_2_board.mark_ship_cells(ship)
+        self.current_player = Player.ONE
+        self.set_state(State.SELECTION)
+
+    def start_online_game(self):
+        """
+        Starts a game against an opponent on the game server. Player one is the local player, who places
+        their fleet while the server looks for an opponent. The server resolves every shot, so an online
+        game is not recorded.
+        """
+        self.close_remote()
+        self.stop_recording()
+        host, _, port = self.server.rpartition(":")
+        self.remote = RemoteGame(host, int(port), self.grid_size, self.num_ships)
+        self.current_player = Player.ONE
+        self.set_state(State.SELECTION)
+
+    def close_remote(self):
+        """Disconnects from the game server, forfeiting a game under way"""
+        if self.remote is not None:
+            self.remote.close()
+            self.remote = None
+
+    def new_cpu(self, number=None) -> CPU:
+        """
+        A CPU player for the current game at its difficulty, with random streams of its own for its fleet and
+        strategy. Given a number it rebuilds the CPU of that number on the same streams, as for a loaded game.
+        """
+        if number is None:
+            self.cpus_created += 1
+            number = self.cpus_created
+        move_budget = None if self.seeded else CPU_MOVE_BUDGET_MS
+        return CPU(self.num_ships, self.grid_size, self.ai_difficulty, move_budget, streams=self.streams.spawn(f"cpu:{number}"))
+
+    def close_cpu(self):
+        """Cancels the CPU's move under way, if any, and stops its workers without waiting for them"""
+        if self.cpu is not None:
+            self.cpu.close()
+            self.cpu = None
 
     def rotate_shot_selection(self, selection = int):
+        if self.recorder is not None:
+            target = self.player_2_board if self.current_player == Player.ONE else self.player_1_board
+            self.recorder.used(target.state, selection - 1)
         if selection == 1:
             self.shot_selection = "nuke"
             print("NUKE")
@@ -79,34 +190,45 @@ class Game:
 
     def run(self):
         while self._running:
-            if self.game_over:
-                self.state = State.END
-                while self.game_over:
-                    events = pygame.event.get()
-                    self.screens[self.state].render(self.surface)
-                    self.screens[self.state].handle_events(events)
-                    self.screens[self.state].update()
-                    pygame.display.update()
-                    self.clock.tick(FPS)
-
-                    result = self.screens[self.state].handle_events(events)
-                    if result == 'restart':
-                        self.reset_game()
-                        break
-                    elif result is None:
-                        continue
+            self.run_frame()
 
-            events = pygame.event.get()
-            self.screens[self.state].render(self.surface)
-            self.screens[self.state].handle_events(events)
-            self.screens[self.state].update()
+    def run_frame(self):
+        """
+        Runs one frame: handles this frame's events once, updates, renders into the back buffer and presents it.
+        Screens only draw to the surface, presenting happens exactly once per frame in handle_global_update.
+        """
+        self.profiler.begin_frame(self.state.name)
+        events = self.get_events()
+        self.profiler.lap("idle")
+        self.screens[self.state].handle_events(events)
+        self.handle_global_events(events)
+        self.profiler.lap("events")
 
-            self.handle_global_events(events)
-            self.handle_global_update()
+        # Events may have changed the state, the rest of the frame works on the screen they switched to
+        self.screens[self.state].update()
+        # In online games the server says when the game is over
+        if self.player_1_board != None and self.player_2_board != None and not self.game_over and self.remote is None:
+            self.check_end_game()
+        self.profiler.lap("update")
+        self.screens[self.state].render(self.surface)
+        self.profiler.lap("render")
 
-            if self.player_1_board != None and self.player_2_board != None:
-                self.check_end_game()
+        self.handle_global_update()
+        self.profiler.end_frame()
 
+    def get_events(self) -> List[pygame.event.Event]:
+        """
+        Returns this frame's events. While the screen is idle this blocks until an event arrives
+        (or IDLE_TIMEOUT passes) instead of spinning at the full frame rate.
+        """
+        if self.frame_pending or self.dirty.pending or not self.screens[self.state].is_idle():
+            events = pygame.event.get()
+        else:
+            event = pygame.event.wait(IDLE_TIMEOUT)
+            events = ([] if event.type == pygame.NOEVENT else [event]) + pygame.event.get()
+
+        self.frame_pending = False
+        return events
 
     def handle_global_events(self, events: List[pygame.event.Event]):
         """
@@ -114,34 +236,151 @@ class Game:
         """
         for event in events:
             if event.type == pygame.QUIT:
+                self.close_cpu()
+                self.close_remote()
+                self.stop_recording()
                 self._running = False
                 pygame.quit()
                 sys.exit()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.show_hud = not self.show_hud
+                self.dirty.mark_all()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                self.profiler.export_csv(FRAME_TIMES_CSV)
+                print("Frame times written to", FRAME_TIMES_CSV)
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_F5, pygame.K_F9) and self.remote is not None:
+                print("Online games cannot be saved or loaded")
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                self.save(SAVE_FILE)
+                print("Game saved to", SAVE_FILE)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                if os.path.exists(SAVE_FILE):
+                    try:
+                        self.load(SAVE_FILE)
+                        print("Game loaded from", SAVE_FILE)
+                    except snapshot.SnapshotError as error:
+                        print("Could not load", SAVE_FILE + ":", error)
 
     def handle_global_update(self):
         """
         Handles advancing the game state
         """
-        pygame.display.update()
+        if self.show_hud:
+            self.dirty.rendered.append(self.draw_hud())
+
+        if self.screens[self.state].tracks_dirty:
+            # Only push the regions the screen redrew this frame
+            rendered = self.dirty.flush()
+            if rendered:
+                pygame.display.update(rendered)
+        else:
+            self.dirty.take()
+            self.dirty.flush()
+            pygame.display.update()
+        self.profiler.lap("present")
         self.clock.tick(FPS)
+        self.profiler.lap("tick")
+
+    def draw_hud(self) -> pygame.Rect:
+        """
+        Draws the p50/p95/p99 time of each frame phase in the current state over the screen, returning the area drawn
+        """
+        # Percentiles are recomputed about once a second rather than every frame
+        if self.profiler.frames % FPS == 0 or not self.hud_lines:
+            state = self.state.name
+            self.hud_lines = [f"{state} frames: {len(self.profiler)}   p50 / p95 / p99 ms"]
+            for phase in PHASES + ("total",):
+                p = self.profiler.percentiles(phase, state)
+                self.hud_lines.append(f"{phase:>8} {p[50]:7.2f} {p[95]:7.2f} {p[99]:7.2f}")
+
+        font = get_font('couriernew', 14)
+        line_height = font.get_linesize()
+        rect = pygame.Rect(0, 0, 300, line_height * len(self.hud_lines) + 8)
+        self.surface.fill(Color.BLACK, rect)
+        for i, line in enumerate(self.hud_lines):
+            self.surface.blit(render_text(line, font, Color.WHITE), (4, 4 + i * line_height))
+        return rect
 
     def check_end_game(self):
         """
         Check if the game has ended and set the winner.
         """
         if self.player_1_board.all_ships_sunk():
-            self.game_over = True
-            self.winner = Player.TWO
-            # Update the FinishScreen instance in self.screens
-            self.screens[State.END] = FinishScreen(self, 2)
+            self.declare_winner(Player.TWO)
         elif self.player_2_board.all_ships_sunk():
-            self.game_over = True
-            self.winner = Player.ONE
-            # Update the FinishScreen instance in self.screens
-            self.screens[State.END] = FinishScreen(self, 1)
+            self.declare_winner(Player.ONE)
+
+    def declare_winner(self, winner: Player):
+        """Ends the game and shows the finish screen for the winner"""
+        self.game_over = True
+        self.winner = winner
+        # Update the FinishScreen instance in self.screens
+        self.screens[State.END] = FinishScreen(self, winner.value)
+        self.set_state(State.END)
+        self.finish_recording()
+
+    def finish_recording(self):
+        """Records the winner of the game and closes its replay"""
+        if self.recorder is not None:
+            self.recorder.finish(self.winner.value)
+            self.stop_recording()
+
+    def snapshot(self) -> bytes:
+        """Returns a compact binary snapshot of the game, see src/snapshot.py for its layout"""
+        return snapshot.encode(self)
+
+    def restore(self, data: bytes):
+        """
+        Replaces the game with the one in the snapshot. Raises snapshot.SnapshotError if the data is not
+        a snapshot this version can read, in which case the game carries on as it was.
+        """
+        state, cpu_thinking, cpu_state = snapshot.decode(self, data)
+        # Only once the snapshot has been read does the game in progress stop
+        self.close_cpu()
+        pygame.time.set_timer(TURN_TRANSITION_EVENT, 0)
+        # A replay starts from an empty board, a loaded game is not recorded
+        self.stop_recording()
+        self.screens[State.PLAYING].reset_volley()
+
+        if self.ai_difficulty is not None and self.player_1_board is not None:
+            # The saved CPU's streams and shots in the order it fired them, so it carries on drawing where that
+            # CPU left off
+            self.cpu = self.new_cpu(self.cpus_created)
+            shots = None
+            if cpu_state is not None:
+                draws, shots = cpu_state
+                self.cpu.strategy.rng.set_draws(draws)
+            self.cpu.take_over(self.player_2_board, self.player_1_board, shots)
+        if state == State.END and self.winner is not None:
+            self.screens[State.END] = FinishScreen(self, self.winner.value)
+        self.set_state(state)
+
+        # Carry on with a turn that was under way
+        if state == State.PLAYING and cpu_thinking and self.cpu is not None:
+            self.cpu.start_move()
+        elif state == State.PLAYING and not self.player_can_shoot:
+            pygame.time.set_timer(TURN_TRANSITION_EVENT, self.screens[State.PLAYING].TURN_TRANSITION_DELAY, loops=1)
+
+    def save(self, path: str) -> bytes:
+        """Writes a snapshot of the game to the file at path and returns it"""
+        data = self.snapshot()
+        with open(path, "wb") as file:
+            file.write(data)
+        return data
+
+    def load(self, path: str):
+        """Replaces the game with the snapshot in the file at path"""
+        with open(path, "rb") as file:
+            self.restore(file.read())
 
     def reset_game(self):
         self.game_over = False
         self.winner = None
+        # A CPU move or turn change still pending belongs to the old game
+        self.close_cpu()
+        self.close_remote()
+        self.ai_difficulty = None
+        pygame.time.set_timer(TURN_TRANSITION_EVENT, 0)
+        self.screens[State.PLAYING].reset_volley()
         self.set_state(State.START)  # Reset to the starting state
         self.set_num_ships(self.num_ships)  # Reinitialize ship count and other game components
\ No newline at end of file
@@ -0,0 +1,2 @@
+# Networked multiplayer: an asyncio game server, its binary protocol, clients and a load generator.
+# Pygame-free like rules/, the front end only uses RemoteGame.
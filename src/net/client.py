@@ -0,0 +1,181 @@
+import asyncio
+import queue
+import threading
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+from ..rules import Ship
+from . import protocol
+from .protocol import FrameProtocol
+
+
+class GameClient(FrameProtocol):
+    """
+    A connection to the game server. Decodes every message and calls the matching on_ method, which
+    subclasses override. Sending is batched like the server's.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.seat = 0
+        self.size = 0
+
+    def join(self, size: int, fleet_size: int):
+        self.send(protocol.frame(protocol.JOIN, protocol.JOIN_MESSAGE.pack(size, fleet_size)))
+
+    def place(self, ships: Sequence[Ship]):
+        self.send(protocol.encode_place(ships, self.size))
+
+    def fire(self, selection: str, cells: Sequence[int]):
+        self.send(protocol.encode_fire(selection, cells))
+
+    def frame_received(self, kind: int, payload: bytes):
+        if kind == protocol.RESULT:
+            self.on_result(*protocol.decode_result(payload))
+        elif kind == protocol.STARTED:
+            self.on_started(payload[0])
+        elif kind == protocol.MATCHED:
+            self.seat, self.size, fleet_size = protocol.MATCHED_MESSAGE.unpack(payload)
+            self.on_matched(self.seat, self.size, fleet_size)
+        elif kind == protocol.WAITING:
+            self.on_waiting()
+        elif kind == protocol.GAME_OVER:
+            self.on_game_over(*protocol.GAME_OVER_MESSAGE.unpack(payload))
+        elif kind == protocol.ERROR:
+            self.on_error(payload[0])
+
+    def connection_lost(self, exc):
+        self.transport = None
+        self.on_closed()
+
+    def on_waiting(self):
+        pass
+
+    def on_matched(self, seat: int, size: int, fleet_size: int):
+        pass
+
+    def on_started(self, first: int):
+        pass
+
+    def on_result(self, shooter: int, selection: str, powerups: int, results: List[Tuple[int, int]], revealed: List[int]):
+        pass
+
+    def on_game_over(self, winner: int, reason: int):
+        pass
+
+    def on_error(self, code: int):
+        pass
+
+    def on_closed(self):
+        pass
+
+
+class _QueuedClient(GameClient):
+    """Passes every message on to the game's thread through a queue, as (name, arguments...) tuples"""
+
+    def __init__(self, events: queue.SimpleQueue) -> None:
+        super().__init__()
+        self.events = events
+        self.fleet: Optional[List[Ship]] = None  # placed before an opponent was found, sent once matched
+
+    def on_waiting(self):
+        self.events.put(("waiting",))
+
+    def on_matched(self, seat, size, fleet_size):
+        if self.fleet is not None:
+            self.place(self.fleet)
+        self.events.put(("matched", seat))
+
+    def on_started(self, first):
+        self.events.put(("started", first))
+
+    def on_result(self, shooter, selection, powerups, results, revealed):
+        self.events.put(("result", shooter, selection, powerups, results, revealed))
+
+    def on_game_over(self, winner, reason):
+        self.events.put(("game_over", winner, reason))
+
+    def on_error(self, code):
+        self.events.put(("error", code))
+
+    def on_closed(self):
+        self.events.put(("closed",))
+
+
+class RemoteGame:
+    """
+    A game against an opponent on the game server, for the pygame front end. The connection runs on an
+    asyncio event loop in a background thread, so the game's frames never wait on the network: the game
+    sends through the methods here and polls for what the server said each frame.
+    """
+
+    def __init__(self, host: str, port: int, size: int, fleet_size: int) -> None:
+        self.size = size
+        self.seat = 0
+        self.events: "queue.SimpleQueue[Tuple]" = queue.SimpleQueue()
+        self.pending = deque()  # events taken off the queue and not handled yet
+        self.client = _QueuedClient(self.events)
+        self.loop = asyncio.new_event_loop()
+        # Created before the thread starts, so close can cancel it however early it is called
+        self.connecting = self.loop.create_task(self.loop.create_connection(lambda: self.client, host, port))
+        self.thread = threading.Thread(target=self.run, args=(fleet_size,), daemon=True)
+        self.thread.start()
+
+    def run(self, fleet_size: int):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.connecting)
+            # A close since the connection was made has closed the transport and left the loop's stop queued
+            self.client.join(self.size, fleet_size)
+            self.loop.run_forever()
+        except OSError as error:
+            self.events.put(("closed", str(error)))
+        except asyncio.CancelledError:
+            pass  # closed while still connecting
+        finally:
+            self.loop.close()
+
+    def call(self, method, *args):
+        """Runs the client's method on the event loop's thread"""
+        try:
+            self.loop.call_soon_threadsafe(method, *args)
+        except RuntimeError:
+            pass  # the loop has stopped, the connection is gone
+
+    def place(self, ships: Sequence[Ship]):
+        """Sends the fleet, at once if an opponent has been found or as soon as one is"""
+        def send():
+            self.client.fleet = list(ships)
+            if self.client.seat:
+                self.client.place(self.client.fleet)
+        self.call(send)
+
+    def fire(self, selection: str, coords: Sequence[Tuple[int, int]]):
+        self.call(self.client.fire, selection, [y * self.size + x for x, y in coords])
+
+    def peek(self) -> Optional[Tuple]:
+        """The next message from the server, left in place so it can wait until the game is ready for it"""
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "matched":
+                self.seat = event[1]
+            self.pending.append(event)
+        return self.pending[0] if self.pending else None
+
+    def pop(self) -> Tuple:
+        return self.pending.popleft()
+
+    def close(self):
+        """Disconnects, which forfeits a game under way, without waiting for the thread"""
+        def stop():
+            # Stopping the loop would break off run_until_complete, so a connection still being made is cancelled
+            if not self.connecting.done():
+                self.connecting.cancel()
+                return
+            if self.client.transport is not None:
+                self.client.transport.close()
+            self.loop.call_soon(self.loop.stop)  # after the transport has closed its socket
+        self.call(stop)
@@ -0,0 +1,256 @@
+"""
+Load generator for the game server. Plays many games at once over localhost with bots which place a
+random fleet and fire at random untried cells, then prints the moves per second the server sustained and
+the latency of each move as JSON.
+
+    python -m src.net.loadgen [--spawn-server] [--games 5000] [--concurrency 200] [--processes 1] [--target 10000]
+
+With --spawn-server it starts one server process of its own on a free port, otherwise it plays against
+the server at --host and --port. With --processes the bots are spread over that many processes, each with
+an event loop of its own, so the bots are not held to one core.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence
+
+from ..config import GRID_SIZE
+from ..rules import RandomStreams, ShotResult, require_fleet
+from . import protocol
+from .client import GameClient
+from .server import DEFAULT_HOST, DEFAULT_PORT
+
+NUM_SHIPS = 5
+# Move latencies kept for the percentiles, a sample is enough for p50 and p99
+LATENCY_SAMPLES = 100000
+MISS = ShotResult.MISS.value
+
+
+class Stats:
+    def __init__(self, games: int, latency_samples: int = LATENCY_SAMPLES) -> None:
+        self.games_wanted = games
+        self.games_joined = 0
+        self.games = 0
+        self.moves = 0
+        self.errors = 0
+        self.latency_samples = latency_samples
+        self.latencies: List[float] = []
+        self.done = asyncio.get_running_loop().create_future()
+
+
+def latency_ms(latencies: Sequence[float], q: int) -> float:
+    ordered = sorted(latencies)
+    return round(ordered[min(len(ordered) - 1, len(ordered) * q // 100)] * 1000, 3) if ordered else None
+
+
+class Bot(GameClient):
+    """Joins games one after another until the stats have all the games they want, firing at random"""
+
+    def __init__(self, stats: Stats, size: int, fleet_size: int, rng) -> None:
+        super().__init__()
+        self.stats = stats
+        self.fleet_size = fleet_size
+        self.wanted_size = size
+        self.rng = rng
+        self.cells: List[int] = []
+        self.afloat = 0  # cells of the bot's own fleet not hit yet
+        self.fired_at = 0.0
+
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        self.next_game()
+
+    def next_game(self):
+        if self.stats.games_joined >= self.stats.games_wanted:
+            self.transport.close()
+            return
+        # Two bots join each game
+        self.stats.games_joined += 0.5
+        self.join(self.wanted_size, self.fleet_size)
+
+    def on_matched(self, seat, size, fleet_size):
+        self.cells = list(range(size * size))
+        self.rng.shuffle(self.cells)
+        fleet = require_fleet(size, range(fleet_size, 0, -1), self.rng)
+        self.afloat = sum(ship.length for ship in fleet)
+        self.place(fleet)
+
+    def on_started(self, first):
+        if first == self.seat:
+            self.move()
+
+    def move(self):
+        self.fired_at = time.perf_counter()
+        self.fire("single", [self.cells.pop()])
+
+    def frame_received(self, kind, payload):
+        if kind != protocol.RESULT:
+            return super().frame_received(kind, payload)
+        # A bot only needs the shooter and the opponent's hits, read straight from the payload to keep the
+        # bots' share of the CPU small
+        stats = self.stats
+        if payload[0] == self.seat:
+            stats.moves += 1
+            if len(stats.latencies) < stats.latency_samples:
+                stats.latencies.append(time.perf_counter() - self.fired_at)
+            return
+        count = protocol.COUNT.unpack_from(payload, 3)[0]
+        cells = protocol.RESULT_HEAD.size
+        step = protocol.CELL_RESULT.size
+        self.afloat -= sum(1 for i in range(cells + 4, cells + count * step, step) if payload[i] != MISS)
+        if self.afloat > 0:
+            self.move()
+
+    def on_game_over(self, winner, reason):
+        # Each bot counts half of the game like it joined half of it, the other half may have been played by a
+        # bot in another process
+        self.stats.games += 0.5
+        if self.stats.games >= self.stats.games_wanted and not self.stats.done.done():
+            self.stats.done.set_result(None)
+        self.seat = 0
+        self.next_game()
+
+    def on_error(self, code):
+        self.stats.errors += 1
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((DEFAULT_HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(host: str, port: int, timeout: float = 10.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def play(args, games: int, concurrency: int, first_bot: int) -> Dict:
+    """Plays a share of the games with bots numbered from first_bot, returns the counts and when it started and ended"""
+    loop = asyncio.get_running_loop()
+    stats = Stats(games, LATENCY_SAMPLES // args.processes)
+    streams = RandomStreams(args.seed)
+    bots = []
+    # Wall clock time, so the shares played in different processes add up to one span
+    start = time.time()
+    for i in range(2 * min(concurrency, games)):
+        bot = Bot(stats, args.size, args.ships, streams.stream(f"bot:{first_bot + i}"))
+        await loop.create_connection(lambda: bot, args.host, args.port)
+        bots.append(bot)
+    await stats.done
+    end = time.time()
+    for bot in bots:
+        if bot.transport is not None:
+            bot.transport.close()
+    return {"games": stats.games, "moves": stats.moves, "errors": stats.errors, "latencies": stats.latencies, "start": start, "end": end}
+
+
+def play_share(args, games: int, concurrency: int, first_bot: int) -> Dict:
+    """Plays a share of the games on an event loop of its own, run in a worker process when there are several"""
+    return asyncio.run(play(args, games, concurrency, first_bot))
+
+
+def shares(total: int, parts: int) -> List[int]:
+    return [total // parts + (i < total % parts) for i in range(parts)]
+
+
+def run(args) -> Dict:
+    # Every process gets at least one game and one game's pair of bots
+    args.processes = max(1, min(args.processes, args.games, args.concurrency))
+    jobs = []
+    first_bot = 0
+    for games, concurrency in zip(shares(args.games, args.processes), shares(args.concurrency, args.processes)):
+        jobs.append((args, games, concurrency, first_bot))
+        first_bot += 2 * min(concurrency, games)
+    if len(jobs) == 1:
+        results = [play_share(*jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+            results = list(executor.map(play_share, *zip(*jobs)))
+
+    wall = max(result["end"] for result in results) - min(result["start"] for result in results)
+    games = round(sum(result["games"] for result in results))
+    moves = sum(result["moves"] for result in results)
+    latencies = [latency for result in results for latency in result["latencies"]]
+    moves_per_s = moves / wall if wall else None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "size": args.size,
+        "ships": args.ships,
+        "concurrency": args.concurrency,
+        "processes": args.processes,
+        "games": games,
+        "moves": moves,
+        "errors": sum(result["errors"] for result in results),
+        "wall_s": round(wall, 3),
+        "games_per_s": round(games / wall, 1) if wall else None,
+        "moves_per_s": round(moves_per_s, 1) if moves_per_s else None,
+        "move_latency_ms": {f"p{q}": latency_ms(latencies, q) for q in (50, 90, 99)},
+        "target_moves_per_s": args.target,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.net.loadgen", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST, help="server address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="server port")
+    parser.add_argument("--spawn-server", action="store_true", help="start a server process on a free port and play against it")
+    parser.add_argument("--games", type=int, default=5000, help="games to play in total")
+    parser.add_argument("--concurrency", type=int, default=200, help="games played at the same time")
+    parser.add_argument("--processes", type=int, default=1, help="processes the bots are spread over, each playing a share of the games")
+    parser.add_argument("--size", type=int, default=GRID_SIZE, help="cells per board side")
+    parser.add_argument("--ships", type=int, default=NUM_SHIPS, help="ships per fleet, one of each length from 1")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the bots' fleets and shots")
+    parser.add_argument("--target", type=float, default=10000, help="moves per second the server has to sustain, the exit status is 1 below it")
+    parser.add_argument("--output", default=None, help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    server = None
+    server_cpu = None
+    if args.spawn_server:
+        args.port = free_port()
+        server = subprocess.Popen([sys.executable, "-m", "src.net.server", "--host", args.host, "--port", str(args.port), "--quiet"])
+    try:
+        if server is not None:
+            asyncio.run(wait_for_server(args.host, args.port))
+        report = run(args)
+    finally:
+        if server is not None:
+            server.terminate()
+            _, _, usage = os.wait4(server.pid, 0)
+            server.returncode = 0
+            server_cpu = usage.ru_utime + usage.ru_stime
+
+    # The target is judged on the moves per second served, wall-clock. The moves per second of a spawned
+    # server's own CPU time are reported beside it for information only.
+    if server_cpu is not None:
+        report["server_cpu_s"] = round(server_cpu, 3)
+        report["moves_per_server_cpu_s"] = round(report["moves"] / server_cpu, 1) if server_cpu else None
+    report["target_met"] = report["moves_per_s"] is not None and report["moves_per_s"] >= args.target
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if not report["target_met"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+The binary protocol between the game server and its clients. Every message is a frame: its length u16,
+then its kind u8 and the payload, integers big-endian. Cells are sent as their index y * size + x.
+
+    client to server
+    JOIN       grid size u16, ships per fleet u8: wait for an opponent wanting the same game
+    PLACE      ship count u8, then each ship's head cell u32, length u16, vertical u8
+    FIRE       shot selection u8, cell count u8, then the cells: one, or up to four for a volley
+
+    server to client
+    WAITING    no payload, queued until an opponent joins
+    MATCHED    seat u8 (1 or 2), grid size u16, ships per fleet u8: place the fleet
+    STARTED    seat u8 of the player who shoots first, once both fleets are placed
+    RESULT     shooter's seat u8, shot selection u8, shooter's powerups u8 (one bit each) after the shot,
+               cell count u16, then each cell u32 and its ShotResult value u8, then radar cells count u16
+               and the cells. Sent to both players, after it the turn passes to the other one.
+    GAME_OVER  winner's seat u8, reason u8
+    ERROR      code u8, the message was rejected and nothing changed
+"""
+import asyncio
+import struct
+from typing import List, Sequence, Tuple
+
+from ..rules import Ship
+
+FRAME = struct.Struct(">HB")
+MAX_FRAME = (1 << 16) - 1
+
+JOIN = 1
+PLACE = 2
+FIRE = 3
+
+WAITING = 10
+MATCHED = 11
+STARTED = 12
+RESULT = 13
+GAME_OVER = 14
+ERROR = 15
+
+JOIN_MESSAGE = struct.Struct(">HB")
+SHIP = struct.Struct(">IHB")
+FIRE_HEAD = struct.Struct(">BB")
+MATCHED_MESSAGE = struct.Struct(">BHB")
+RESULT_HEAD = struct.Struct(">BBBH")
+CELL_RESULT = struct.Struct(">IB")
+CELL = struct.Struct(">I")
+COUNT = struct.Struct(">H")
+GAME_OVER_MESSAGE = struct.Struct(">BB")
+
+# Shot selections by their number on the wire, the same as in snapshots
+SELECTIONS = ["single", "nuke", "run_h", "run_v", "volley", "radar"]
+VOLLEY_SHOTS = 4
+
+# Reasons a game ends
+FLEET_SUNK = 0
+OPPONENT_LEFT = 1
+
+# Error codes
+BAD_MESSAGE = 1
+NOT_YOUR_TURN = 2
+ILLEGAL_FLEET = 3
+ILLEGAL_SHOT = 4
+POWERUP_UNAVAILABLE = 5
+
+ERRORS = {
+    BAD_MESSAGE: "bad message",
+    NOT_YOUR_TURN: "not your turn",
+    ILLEGAL_FLEET: "illegal fleet",
+    ILLEGAL_SHOT: "illegal shot",
+    POWERUP_UNAVAILABLE: "powerup not available",
+}
+
+
+class ProtocolError(ValueError):
+    """Raised for a message which cannot be decoded"""
+
+
+def frame(kind: int, payload: bytes = b"") -> bytes:
+    if len(payload) >= MAX_FRAME:
+        raise ProtocolError("message is too long for a frame")
+    return FRAME.pack(len(payload) + 1, kind) + payload
+
+
+def pack_powerups(powerups: Sequence[bool]) -> int:
+    return sum(1 << i for i, available in enumerate(powerups) if available)
+
+
+def unpack_powerups(bits: int, count: int) -> List[bool]:
+    return [bool(bits >> i & 1) for i in range(count)]
+
+
+def encode_place(ships: Sequence[Ship], size: int) -> bytes:
+    payload = bytearray([len(ships)])
+    for ship in ships:
+        x, y = ship.coordinates[0]
+        payload += SHIP.pack(y * size + x, ship.length, ship.direction == "VERTICAL")
+    return frame(PLACE, bytes(payload))
+
+
+def decode_place(payload: bytes, size: int) -> List[Ship]:
+    """Returns the ships of a PLACE message, raising ProtocolError if it is malformed or a head is off the board"""
+    if not payload or len(payload) != 1 + payload[0] * SHIP.size:
+        raise ProtocolError("fleet has the wrong length")
+    ships = []
+    for head, length, vertical in SHIP.iter_unpack(payload[1:]):
+        if head >= size * size or not 0 < length <= size:
+            raise ProtocolError("ship is off the board")
+        ships.append(Ship(head % size, head // size, length, "VERTICAL" if vertical else "HORIZONTAL", size))
+    return ships
+
+
+def encode_fire(selection: str, cells: Sequence[int]) -> bytes:
+    return frame(FIRE, FIRE_HEAD.pack(SELECTIONS.index(selection), len(cells)) + b"".join(CELL.pack(cell) for cell in cells))
+
+
+def decode_fire(payload: bytes) -> Tuple[str, List[int]]:
+    if len(payload) < FIRE_HEAD.size:
+        raise ProtocolError("shot is truncated")
+    selection, count = FIRE_HEAD.unpack_from(payload)
+    if selection >= len(SELECTIONS) or len(payload) != FIRE_HEAD.size + count * CELL.size:
+        raise ProtocolError("shot is malformed")
+    return SELECTIONS[selection], [cell for cell, in CELL.iter_unpack(payload[FIRE_HEAD.size:])]
+
+
+def encode_result(shooter: int, selection: str, powerups: int, results: Sequence[Tuple[int, int]], revealed: Sequence[int] = ()) -> bytes:
+    payload = bytearray(RESULT_HEAD.pack(shooter, SELECTIONS.index(selection), powerups, len(results)))
+    for cell, result in results:
+        payload += CELL_RESULT.pack(cell, result)
+    payload += COUNT.pack(len(revealed))
+    for cell in revealed:
+        payload += CELL.pack(cell)
+    return frame(RESULT, bytes(payload))
+
+
+def decode_result(payload: bytes) -> Tuple[int, str, int, List[Tuple[int, int]], List[int]]:
+    """Returns the shooter's seat, the selection, the shooter's powerup bits, (cell, result) pairs and the radar cells"""
+    try:
+        shooter, selection, powerups, count = RESULT_HEAD.unpack_from(payload)
+        offset = RESULT_HEAD.size
+        results = [CELL_RESULT.unpack_from(payload, offset + i * CELL_RESULT.size) for i in range(count)]
+        offset += count * CELL_RESULT.size
+        revealed_count, = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+        revealed = [CELL.unpack_from(payload, offset + i * CELL.size)[0] for i in range(revealed_count)]
+    except struct.error:
+        raise ProtocolError("result is truncated") from None
+    return shooter, SELECTIONS[selection], powerups, results, revealed
+
+
+class FrameProtocol(asyncio.Protocol):
+    """
+    Splits the byte stream into frames, passing each to frame_received, and batches outgoing frames so
+    everything sent during one pass of the event loop goes out in a single write
+    """
+
+    def __init__(self) -> None:
+        self.transport = None
+        self.loop = None
+        self.buffer = bytearray()
+        self.outgoing: List[bytes] = []
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.loop = asyncio.get_running_loop()
+
+    def data_received(self, data: bytes):
+        # Reads usually hold whole frames, the buffer is only for a frame split across reads
+        if self.buffer:
+            self.buffer += data
+            data = bytes(self.buffer)
+            self.buffer.clear()
+        offset = 0
+        end = len(data)
+        while end - offset >= FRAME.size:
+            length, kind = FRAME.unpack_from(data, offset)
+            if length == 0:
+                self.protocol_error("empty frame")
+                return
+            if end - offset - 2 < length:
+                break
+            start = offset + FRAME.size
+            offset = start + length - 1
+            self.frame_received(kind, data[start:offset])
+            if self.transport is None or self.transport.is_closing():
+                return
+        if offset < end:
+            self.buffer += data[offset:]
+
+    def frame_received(self, kind: int, payload: bytes):
+        raise NotImplementedError
+
+    def protocol_error(self, reason: str):
+        """The peer sent something which is not a frame, the connection is dropped"""
+        if self.transport is not None:
+            self.transport.abort()
+
+    def send(self, data: bytes):
+        """Queues one or more frames, written together at the end of this pass of the event loop"""
+        if not self.outgoing:
+            self.loop.call_soon(self.flush)
+        self.outgoing.append(data)
+
+    def flush(self):
+        if self.outgoing and self.transport is not None and not self.transport.is_closing():
+            self.transport.write(b"".join(self.outgoing))
+        self.outgoing.clear()
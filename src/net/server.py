@@ -0,0 +1,238 @@
+"""
+Asyncio game server hosting any number of concurrent two-player games on the rules engine. Players are
+paired in the order they join, by grid size and fleet size. The server holds both fleets and resolves
+every shot, so clients only ever learn what their own shots reveal.
+
+    python -m src.net.server [--host 127.0.0.1] [--port 8765] [--seed 42]
+"""
+import argparse
+import asyncio
+import struct
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+from ..rules import BoardState, Match, POWERUP_SHOTS, RandomStreams, shot_pattern, use_powerup
+from ..rules.match import LANDED
+from . import protocol
+from .protocol import FrameProtocol, ProtocolError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Largest grid a client may ask for, every cell of a board is a bit of an int so large grids are cheap
+MAX_GRID_SIZE = 1000
+# Seconds between the stats lines the server prints
+STATS_INTERVAL = 10.0
+
+
+class ServerGame:
+    """One game between two connections, placing fleets until both are in and then taking turns"""
+
+    def __init__(self, size: int, fleet_size: int, players: Dict[int, "Connection"], rng) -> None:
+        self.match = Match(size, fleet_size, rng)
+        self.players = players
+        self.placed = set()
+        self.over = False
+
+    def started(self) -> bool:
+        return len(self.placed) == 2
+
+
+class Connection(FrameProtocol):
+    """A client's connection, in the lobby until it joins, then seated in one game at a time"""
+
+    def __init__(self, server: "GameServer") -> None:
+        super().__init__()
+        self.server = server
+        self.game: Optional[ServerGame] = None
+        self.seat = 0
+        self.wants: Optional[Tuple[int, int]] = None  # (grid size, fleet size) while waiting for an opponent
+
+    def frame_received(self, kind: int, payload: bytes):
+        try:
+            if kind == protocol.FIRE:
+                self.server.fire(self, payload)
+            elif kind == protocol.PLACE:
+                self.server.place(self, payload)
+            elif kind == protocol.JOIN:
+                self.server.join(self, payload)
+            else:
+                self.error(protocol.BAD_MESSAGE)
+        except ProtocolError:
+            self.error(protocol.BAD_MESSAGE)
+
+    def error(self, code: int):
+        self.send(protocol.frame(protocol.ERROR, bytes([code])))
+
+    def connection_lost(self, exc):
+        self.transport = None
+        self.server.leave(self)
+
+
+class GameServer:
+    def __init__(self, seed=None) -> None:
+        self.streams = RandomStreams(seed)
+        self.waiting: Dict[Tuple[int, int], Connection] = {}
+        self.games_started = 0
+        self.games_active = 0
+        self.moves = 0
+        self.server = None
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        loop = asyncio.get_running_loop()
+        self.server = await loop.create_server(lambda: Connection(self), host, port, backlog=4096)
+        return self.server
+
+    def join(self, connection: Connection, payload: bytes):
+        if connection.game is not None and not connection.game.over or connection.wants is not None:
+            return connection.error(protocol.BAD_MESSAGE)
+        try:
+            size, fleet_size = protocol.JOIN_MESSAGE.unpack(payload)
+        except struct.error:
+            raise ProtocolError("join is malformed") from None
+        if not 0 < size <= MAX_GRID_SIZE or not 0 < fleet_size <= size:
+            return connection.error(protocol.BAD_MESSAGE)
+
+        key = (size, fleet_size)
+        opponent = self.waiting.pop(key, None)
+        if opponent is None:
+            connection.wants = key
+            self.waiting[key] = connection
+            connection.send(protocol.frame(protocol.WAITING))
+            return
+
+        # Every game rolls its powerups from a stream of its own, the same seed replays the same games
+        self.games_started += 1
+        self.games_active += 1
+        rng = self.streams.spawn(f"game:{self.games_started}").stream("powerups")
+        opponent.wants = None
+        game = ServerGame(size, fleet_size, {1: opponent, 2: connection}, rng)
+        for seat, player in game.players.items():
+            player.game = game
+            player.seat = seat
+            player.send(protocol.frame(protocol.MATCHED, protocol.MATCHED_MESSAGE.pack(seat, size, fleet_size)))
+
+    def place(self, connection: Connection, payload: bytes):
+        game = connection.game
+        if game is None or game.over or connection.seat in game.placed:
+            return connection.error(protocol.BAD_MESSAGE)
+        match = game.match
+        ships = protocol.decode_place(payload, match.size)
+        # One ship of each length up to the fleet size, as in the game
+        if sorted(ship.length for ship in ships) != list(range(1, match.fleet_size + 1)):
+            return connection.error(protocol.ILLEGAL_FLEET)
+        board = BoardState(match.size, match.fleet_size)
+        for ship in ships:
+            if not board.can_place(ship):
+                return connection.error(protocol.ILLEGAL_FLEET)
+            board.place_ship(ship)
+
+        match.boards[connection.seat] = board
+        game.placed.add(connection.seat)
+        if game.started():
+            message = protocol.frame(protocol.STARTED, bytes([game.match.current_player]))
+            for player in game.players.values():
+                player.send(message)
+
+    def fire(self, connection: Connection, payload: bytes):
+        game = connection.game
+        selection, cells = protocol.decode_fire(payload)
+        if game is None or game.over or not game.started():
+            return connection.error(protocol.BAD_MESSAGE)
+        match = game.match
+        if match.current_player != connection.seat:
+            return connection.error(protocol.NOT_YOUR_TURN)
+        board = match.target()
+        size = board.size
+        if selection == "single":
+            # Most shots, checked without building the pattern
+            if len(cells) != 1 or cells[0] >= size * size or (board.bits.hits | board.bits.misses) >> cells[0] & 1:
+                return connection.error(protocol.ILLEGAL_SHOT)
+            shots = [((cells[0] % size, cells[0] // size), selection)]
+        else:
+            if len(cells) != (protocol.VOLLEY_SHOTS if selection == "volley" else 1) or any(cell >= size * size for cell in cells):
+                return connection.error(protocol.ILLEGAL_SHOT)
+            targets = [(cell % size, cell // size) for cell in cells]
+            if selection == "volley":
+                shots = [(target, "single") for target in targets]
+            else:
+                shots = [(targets[0], selection)]
+            # As on a shared screen, a shot only counts if at least one cell it covers has not been shot yet
+            covered = [coord for target, pattern in shots for coord in shot_pattern(pattern, target)]
+            if not any(board.in_bounds(coord) and not board.is_shot(coord) for coord in covered):
+                return connection.error(protocol.ILLEGAL_SHOT)
+            if not use_powerup(board.powerups, POWERUP_SHOTS.index(selection)):
+                return connection.error(protocol.POWERUP_UNAVAILABLE)
+
+        results = []
+        for target, pattern in shots:
+            for (x, y), result in match.fire(target, pattern):
+                if result in LANDED:
+                    results.append((y * size + x, result.value))
+        # Radar shows the shooter the first ship of the fleet
+        revealed = []
+        if selection == "radar" and board.ships:
+            revealed = [board.index(coord) for coord in board.ships[0].coordinates]
+        self.moves += 1
+
+        message = protocol.encode_result(connection.seat, selection, protocol.pack_powerups(board.powerups), results, revealed)
+        for player in game.players.values():
+            player.send(message)
+        if match.winner is not None:
+            self.end(game, match.winner, protocol.FLEET_SUNK)
+        else:
+            match.end_turn()
+
+    def end(self, game: ServerGame, winner: int, reason: int):
+        game.over = True
+        self.games_active -= 1
+        message = protocol.frame(protocol.GAME_OVER, protocol.GAME_OVER_MESSAGE.pack(winner, reason))
+        for player in game.players.values():
+            if player.transport is not None:
+                player.send(message)
+
+    def leave(self, connection: Connection):
+        """A connection closed: it leaves the queue, or forfeits the game it was playing"""
+        if connection.wants is not None and self.waiting.get(connection.wants) is connection:
+            del self.waiting[connection.wants]
+        game = connection.game
+        if game is not None and not game.over:
+            self.end(game, 2 if connection.seat == 1 else 1, protocol.OPPONENT_LEFT)
+
+    async def report(self, interval: float = STATS_INTERVAL):
+        """Prints the games under way and the moves per second every interval seconds"""
+        moves = self.moves
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            print(f"{self.games_active} games active, {self.games_started} started, "
+                  f"{(self.moves - moves) / (now - last):.0f} moves/s", file=sys.stderr)
+            moves, last = self.moves, now
+
+
+async def serve(host: str, port: int, seed=None, stats: bool = True):
+    server = GameServer(seed)
+    listener = await server.start(host, port)
+    print(f"Serving battleship on {host}:{port}", file=sys.stderr)
+    if stats:
+        asyncio.get_running_loop().create_task(server.report())
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.net.server", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument("--seed", type=int, default=None, help="seed of every game's powerup rolls")
+    parser.add_argument("--quiet", action="store_true", help="do not print stats every few seconds")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.seed, not args.quiet))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
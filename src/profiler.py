@@ -0,0 +1,76 @@
+import csv
+import time
+
+from array import array
+from typing import Dict, List, Optional
+
+# Phases of a frame in the order Game.run goes through them. "idle" is time spent polling or
+# blocking for events, "events" is time spent handling them.
+PHASES = ("idle", "events", "update", "render", "present", "tick")
+
+
+class FrameProfiler:
+    """
+    Records how long each phase of every frame took into fixed-size ring buffers, tagged with the
+    game state the frame was drawn in. Only the last `capacity` frames are kept.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.times = {phase: array("d", bytes(8 * capacity)) for phase in PHASES}
+        self.states: List[Optional[str]] = [None] * capacity
+        self.frames = 0  # frames recorded in total, the next frame goes in slot frames % capacity
+        self._state = None
+        self._last = 0.0
+
+    def begin_frame(self, state: str):
+        self._state = state
+        slot = self.frames % self.capacity
+        for phase in PHASES:
+            self.times[phase][slot] = 0.0
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        """Adds the time since the previous lap (or the start of the frame) to the given phase"""
+        now = time.perf_counter()
+        self.times[phase][self.frames % self.capacity] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        self.states[self.frames % self.capacity] = self._state
+        self.frames += 1
+
+    def __len__(self) -> int:
+        return min(self.frames, self.capacity)
+
+    def _slots(self):
+        """Ring buffer slots from the oldest to the newest recorded frame"""
+        if self.frames <= self.capacity:
+            return range(self.frames)
+        start = self.frames % self.capacity
+        return [(start + i) % self.capacity for i in range(self.capacity)]
+
+    def percentiles(self, phase: str, state: Optional[str] = None, quantiles=(50, 95, 99)) -> Dict[int, float]:
+        """
+        Returns the nearest-rank percentiles in ms of a phase (or "total") over the recorded frames,
+        optionally only over frames drawn in the given state
+        """
+        values = sorted(self.frame_time(slot, phase) for slot in self._slots() if state is None or self.states[slot] == state)
+        if not values:
+            return {q: 0.0 for q in quantiles}
+        return {q: values[min(len(values) - 1, max(0, -(-q * len(values) // 100) - 1))] * 1000 for q in quantiles}
+
+    def frame_time(self, slot: int, phase: str) -> float:
+        if phase == "total":
+            return sum(self.times[p][slot] for p in PHASES)
+        return self.times[phase][slot]
+
+    def export_csv(self, path: str):
+        """Writes every recorded frame, oldest first, with each phase's time in ms"""
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame", "state"] + [f"{phase}_ms" for phase in PHASES] + ["total_ms"])
+            first = self.frames - len(self)
+            for number, slot in enumerate(self._slots(), first):
+                row = [self.times[phase][slot] * 1000 for phase in PHASES]
+                writer.writerow([number, self.states[slot]] + [f"{ms:.3f}" for ms in row] + [f"{sum(row):.3f}"])
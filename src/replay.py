@@ -0,0 +1,522 @@
+"""
+Shot-level replays. A game is recorded as an append-only stream of records as it is played, with a
+keyframe of both boards every few turns and, once the recording is closed, an index of where every turn
+starts. Playback seeks straight to any turn: the index gives the turn's keyframe and at most
+KEYFRAME_INTERVAL turns of records are replayed on top of it. Pygame-free, so replays verify headless.
+
+    python -m src.replay verify FILE... [--workers 4]
+    python -m src.replay show FILE [--turn 12]
+
+Layout of version 1, integers big-endian:
+
+    header   magic "BR", version u8, grid size u16, ships per fleet u8, keyframe interval u8, RNG state u64
+    records  kind u8, payload length u32, then the payload:
+             PLACE     board u8, head cell index u32, length u16, vertical u8
+             TURN      turn u32, board u8 shot at during the turn
+             SHOT      board u8, cell index u32, result u8 (a ShotResult value)
+             GRANT     board u8, powerup u8, kept u8 (0 if a duplicate was wasted)
+             USE       board u8, powerup u8
+             KEYFRAME  turn u32, RNG state u64, both boards packed as in snapshots (src/rules/packing.py)
+             END       winner u8
+             INDEX     offset u64 of every turn's first record, its keyframe if it has one
+    trailer  offset u64 of the INDEX record, magic "BRIX", only once the recording is closed
+
+Boards are numbered 1 and 2 after the player who owns them. A turn starts whenever play switches to the
+other board, and its keyframe holds the boards and RNG state from before it. Sinks are SHOT records with
+the SINK result, and a grant always directly follows the shot that rolled it.
+"""
+import argparse
+import itertools
+import json
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from .rules import BoardState, ShotResult, Ship, SplitMix64, roll_powerup, grant_powerup, use_powerup
+from .rules.packing import SnapshotError, pack_board, unpack_board
+
+MAGIC = b"BR"
+INDEX_MAGIC = b"BRIX"
+VERSION = 1
+# Turns between keyframes, playback replays at most this many turns of records after seeking
+KEYFRAME_INTERVAL = 8
+
+HEADER = struct.Struct(">2sBHBBQ")
+RECORD = struct.Struct(">BI")
+TRAILER = struct.Struct(">Q4s")
+
+PLACE = 1
+TURN = 2
+SHOT = 3
+GRANT = 4
+USE = 5
+KEYFRAME = 6
+END = 7
+INDEX = 8
+
+PLACE_RECORD = struct.Struct(">BIHB")
+TURN_RECORD = struct.Struct(">IB")
+SHOT_RECORD = struct.Struct(">BIB")
+GRANT_RECORD = struct.Struct(">BBB")
+USE_RECORD = struct.Struct(">BB")
+KEYFRAME_RECORD = struct.Struct(">IQ")
+END_RECORD = struct.Struct(">B")
+OFFSET = struct.Struct(">Q")
+
+_names = itertools.count(1)
+
+
+class ReplayError(ValueError):
+    """Raised for a replay which cannot be read, or whose records do not play out as recorded"""
+
+
+def replay_path(directory: str) -> str:
+    """A new file name in the directory for the next game's replay"""
+    return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_names)}.bsr")
+
+
+class ReplayRecorder:
+    """
+    Writes a game's replay as it is played, hooked into the boards and the game. The file is only created
+    with the first record, so games abandoned before a ship is placed leave nothing behind.
+    """
+
+    def __init__(self, path: str, boards: Sequence[BoardState], rng, keyframe_interval: int = KEYFRAME_INTERVAL) -> None:
+        self.path = path
+        self.boards = list(boards)  # player one's board, then player two's
+        self.rng = rng  # the game's powerup RNG, kept in the header and every keyframe
+        self.keyframe_interval = keyframe_interval
+        self.file = None
+        self.closed = False
+        self.offset = 0
+        self.turn_offsets: List[int] = []
+        self.target = None  # board shot at during the current turn
+
+    def number(self, state: BoardState) -> int:
+        return 1 if state is self.boards[0] else 2
+
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "wb")
+        header = HEADER.pack(MAGIC, VERSION, self.boards[0].size, self.boards[0].fleet_size, self.keyframe_interval, self.rng.getstate())
+        self.file.write(header)
+        self.offset = len(header)
+
+    def write(self, kind: int, payload: bytes):
+        if self.closed:
+            return
+        if self.file is None:
+            self.open()
+        self.file.write(RECORD.pack(kind, len(payload)) + payload)
+        self.offset += RECORD.size + len(payload)
+
+    def start_turn(self, board: int, shot: int = 0):
+        """
+        Starts the next turn if play has switched boards, after a keyframe every keyframe_interval turns.
+        The hooks run once a shot has landed, so the mask of a shot which starts the turn is left out of it.
+        """
+        if board == self.target or self.closed:
+            return
+        self.target = board
+        turn = len(self.turn_offsets)
+        if self.file is None:
+            self.open()
+        self.turn_offsets.append(self.offset)
+        if turn % self.keyframe_interval == 0:
+            payload = bytearray(KEYFRAME_RECORD.pack(turn, self.rng.getstate()))
+            for number, state in enumerate(self.boards, 1):
+                bits = state.bits
+                pack_board(payload, state, shots=(bits.hits | bits.misses) & ~shot if number == board else None)
+            self.write(KEYFRAME, bytes(payload))
+        self.write(TURN, TURN_RECORD.pack(turn, board))
+
+    def placed(self, state: BoardState, ship: Ship):
+        x, y = ship.coordinates[0]
+        self.write(PLACE, PLACE_RECORD.pack(self.number(state), y * state.size + x, ship.length, ship.direction == "VERTICAL"))
+
+    def shot(self, state: BoardState, coord: Tuple[int, int], result: ShotResult):
+        board = self.number(state)
+        index = state.index(coord)
+        self.start_turn(board, 1 << index)
+        self.write(SHOT, SHOT_RECORD.pack(board, index, result.value))
+
+    def granted(self, state: BoardState, powerup: int, kept: bool):
+        self.write(GRANT, GRANT_RECORD.pack(self.number(state), powerup, kept))
+
+    def used(self, state: BoardState, powerup: int):
+        board = self.number(state)
+        self.start_turn(board)
+        self.write(USE, USE_RECORD.pack(board, powerup))
+
+    def finish(self, winner: int):
+        """Records the winner and closes the recording"""
+        self.write(END, END_RECORD.pack(winner))
+        self.close()
+
+    def close(self):
+        """Writes the turn index and closes the file, the replay is complete without an END if the game was abandoned"""
+        if self.closed:
+            return
+        if self.file is not None:
+            index_offset = self.offset
+            self.write(INDEX, b"".join(OFFSET.pack(offset) for offset in self.turn_offsets))
+            self.file.write(TRAILER.pack(index_offset, INDEX_MAGIC))
+            self.file.close()
+        self.closed = True
+
+
+def read_header(data: bytes) -> Tuple[int, int, int, int]:
+    """Returns the grid size, ships per fleet, keyframe interval and initial RNG state of the replay"""
+    if len(data) < HEADER.size:
+        raise ReplayError("replay is truncated")
+    magic, version, size, fleet_size, interval, rng_state = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ReplayError("not a battleship replay")
+    if version != VERSION:
+        raise ReplayError(f"replay version {version} is not supported, expected {VERSION}")
+    if not size or not fleet_size or not interval:
+        raise ReplayError("replay has invalid header fields")
+    return size, fleet_size, interval, rng_state
+
+
+def iter_records(data: bytes, offset: int = HEADER.size) -> Iterator[Tuple[int, int, bytes]]:
+    """Yields (offset, kind, payload) for every record from offset up to the INDEX record or the end of the data"""
+    end = len(data)
+    unpack = RECORD.unpack_from
+    while offset < end:
+        if offset + RECORD.size > end:
+            raise ReplayError(f"record at {offset} is truncated")
+        kind, length = unpack(data, offset)
+        start = offset + RECORD.size
+        if start + length > end:
+            raise ReplayError(f"record at {offset} is truncated")
+        if kind == INDEX:
+            return
+        yield offset, kind, data[start:start + length]
+        offset = start + length
+
+
+class Replayer:
+    """
+    Two rules boards with a replay's records applied to them in order. Every record is checked against
+    the rules as it is applied: shots must resolve as recorded, grants must be what the game's RNG rolls
+    and keyframes must match the boards replayed so far.
+    """
+
+    def __init__(self, size: int, fleet_size: int, rng_state: int) -> None:
+        self.size = size
+        self.fleet_size = fleet_size
+        self.boards = {1: BoardState(size, fleet_size), 2: BoardState(size, fleet_size)}
+        self.rng = SplitMix64()
+        self.rng.setstate(rng_state)
+        self.turn = -1
+        self.target = None
+        self.rolled = None  # (board, powerup) the last shot rolled, until its GRANT record
+        self.shots = 0
+        self.winner = None
+
+    def board(self, number: int) -> BoardState:
+        try:
+            return self.boards[number]
+        except KeyError:
+            raise ReplayError(f"no board {number}") from None
+
+    def run(self, data: bytes, offset: int = HEADER.size, until_turn: int = None) -> int:
+        """
+        Applies the records of data from offset up to the INDEX record, the end of the data or the TURN
+        record of until_turn, returning the offset it stopped at. Shots, most of any replay, are unpacked
+        in place rather than going through apply.
+        """
+        end = len(data)
+        unpack_record = RECORD.unpack_from
+        unpack_shot = SHOT_RECORD.unpack_from
+        unpack_turn = TURN_RECORD.unpack_from
+        apply_shot = self.apply_shot
+        try:
+            while offset < end:
+                if offset + RECORD.size > end:
+                    raise ReplayError("record is truncated")
+                kind, length = unpack_record(data, offset)
+                start = offset + RECORD.size
+                if start + length > end:
+                    raise ReplayError("record is truncated")
+                if self.rolled is not None and kind != GRANT:
+                    raise ReplayError(f"missing grant of powerup {self.rolled[1]} to board {self.rolled[0]}")
+                if kind == SHOT and length == SHOT_RECORD.size:
+                    apply_shot(*unpack_shot(data, start))
+                elif kind == TURN and length == TURN_RECORD.size:
+                    turn, board = unpack_turn(data, start)
+                    if turn == until_turn:
+                        break
+                    self.apply_turn(turn, board)
+                elif kind == INDEX:
+                    break
+                else:
+                    self.apply(kind, data[start:start + length])
+                offset = start + length
+        except ReplayError as error:
+            raise ReplayError(f"at offset {offset}: {error}") from None
+        return offset
+
+    def apply(self, kind: int, payload: bytes):
+        try:
+            if kind == SHOT:
+                self.apply_shot(*SHOT_RECORD.unpack(payload))
+            elif kind == GRANT:
+                self.apply_grant(*GRANT_RECORD.unpack(payload))
+            elif kind == TURN:
+                self.apply_turn(*TURN_RECORD.unpack(payload))
+            elif kind == USE:
+                board, powerup = USE_RECORD.unpack(payload)
+                if powerup >= len(self.board(board).powerups) or not use_powerup(self.board(board).powerups, powerup):
+                    raise ReplayError(f"powerup {powerup} used on board {board} was not available")
+            elif kind == PLACE:
+                self.apply_place(*PLACE_RECORD.unpack(payload))
+            elif kind == KEYFRAME:
+                self.check_keyframe(payload)
+            elif kind == END:
+                winner, = END_RECORD.unpack(payload)
+                loser = 2 if winner == 1 else 1
+                if winner not in (1, 2) or not self.boards[loser].all_ships_sunk():
+                    raise ReplayError(f"player {winner} is recorded as the winner before winning")
+                self.winner = winner
+            else:
+                raise ReplayError(f"unknown record kind {kind}")
+        except struct.error:
+            raise ReplayError(f"record of kind {kind} has the wrong length") from None
+
+    def apply_place(self, board: int, head: int, length: int, vertical: int):
+        state = self.board(board)
+        ship = Ship(head % self.size, head // self.size, length, "VERTICAL" if vertical else "HORIZONTAL", self.size)
+        if head >= self.size * self.size or not state.can_place(ship) or len(state.ships) >= self.fleet_size:
+            raise ReplayError(f"ship placed at cell {head} of board {board} is not legal")
+        state.place_ship(ship)
+
+    def apply_turn(self, turn: int, board: int):
+        if turn != self.turn + 1 or board == self.target or board not in self.boards:
+            raise ReplayError(f"turn {turn} on board {board} is out of order")
+        self.turn = turn
+        self.target = board
+
+    def apply_shot(self, board: int, index: int, result: int):
+        if board != self.target:
+            raise ReplayError(f"shot at board {board} during a turn on board {self.target}")
+        state = self.board(board)
+        coord = (index % self.size, index // self.size)
+        replayed = state.fire(coord) if index < self.size * self.size else ShotResult.INVALID
+        if replayed.value != result:
+            raise ReplayError(f"shot at {coord} on board {board} was recorded as {result}, replays as {replayed.name}")
+        self.shots += 1
+        powerup = roll_powerup(self.rng)
+        if powerup is not None:
+            self.rolled = (board, powerup)
+
+    def apply_grant(self, board: int, powerup: int, kept: int):
+        if self.rolled != (board, powerup):
+            raise ReplayError(f"grant of powerup {powerup} to board {board} was not rolled")
+        self.rolled = None
+        if grant_powerup(self.boards[board].powerups, powerup) != bool(kept):
+            raise ReplayError(f"grant of powerup {powerup} to board {board} recorded as {'kept' if kept else 'wasted'}")
+
+    def keyframe(self, turn: int) -> bytes:
+        payload = bytearray(KEYFRAME_RECORD.pack(turn, self.rng.getstate()))
+        for number in (1, 2):
+            pack_board(payload, self.boards[number])
+        return bytes(payload)
+
+    def check_keyframe(self, payload: bytes):
+        turn, _ = KEYFRAME_RECORD.unpack_from(payload)
+        if payload != self.keyframe(turn):
+            raise ReplayError(f"keyframe of turn {turn} does not match the replayed boards")
+
+    def load_keyframe(self, payload: bytes):
+        """Replaces the boards with the keyframe's, ready for the TURN record following it"""
+        turn, rng_state = KEYFRAME_RECORD.unpack_from(payload)
+        offset = KEYFRAME_RECORD.size
+        self.boards = {1: BoardState(self.size, self.fleet_size), 2: BoardState(self.size, self.fleet_size)}
+        try:
+            for number in (1, 2):
+                offset, _ = unpack_board(payload, offset, self.boards[number])
+        except SnapshotError as error:
+            raise ReplayError(f"keyframe of turn {turn}: {error}") from None
+        self.rng.setstate(rng_state)
+        self.turn = turn - 1
+        self.target = None
+        self.rolled = None
+
+
+def verify(data: bytes) -> Dict:
+    """
+    Replays every record from the start, raising ReplayError at the first one which does not play out as
+    recorded. Returns the game's turns, shots and winner.
+    """
+    size, fleet_size, _, rng_state = read_header(data)
+    replayer = Replayer(size, fleet_size, rng_state)
+    replayer.run(data)
+    if replayer.rolled is not None:
+        raise ReplayError("replay ends before the last powerup grant")
+    return {"turns": replayer.turn + 1, "shots": replayer.shots, "winner": replayer.winner}
+
+
+class ReplayFile:
+    """
+    A replay on disk, opened for seeking. The turn index is read through the trailer of a closed recording,
+    or built with one pass over the records of one which was cut off, such as by a crash.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.file = open(path, "rb")
+        self.size, self.fleet_size, self.keyframe_interval, self.rng_state = read_header(self.file.read(HEADER.size))
+        self.end = self.file.seek(0, os.SEEK_END)
+        self.index_offset = None
+        self.offsets: List[int] = []
+        if self.end >= HEADER.size + TRAILER.size:
+            index_offset, magic = TRAILER.unpack(self.read_at(self.end - TRAILER.size, TRAILER.size))
+            if magic == INDEX_MAGIC and index_offset + RECORD.size <= self.end - TRAILER.size:
+                kind, length = RECORD.unpack(self.read_at(index_offset, RECORD.size))
+                if kind == INDEX:
+                    self.index_offset = index_offset
+                    self.end = index_offset
+                    self.turns = length // OFFSET.size
+        if self.index_offset is None:
+            self.scan()
+
+    def scan(self):
+        """Lists where every turn starts, up to the last whole record"""
+        data = self.read_at(0, self.end)
+        previous = None  # (offset, kind) of the record before
+        try:
+            for offset, kind, payload in iter_records(data):
+                if kind == TURN:
+                    self.offsets.append(previous[0] if previous and previous[1] == KEYFRAME else offset)
+                previous = (offset, kind)
+                self.end = offset + RECORD.size + len(payload)
+        except ReplayError:
+            pass
+        self.turns = len(self.offsets)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        self.file.seek(offset)
+        data = self.file.read(length)
+        if len(data) != length:
+            raise ReplayError(f"replay is truncated at {offset}")
+        return data
+
+    def turn_offset(self, turn: int) -> int:
+        """Where the turn's first record is, a constant-time lookup in the index"""
+        if self.index_offset is None:
+            return self.offsets[turn]
+        offset, = OFFSET.unpack(self.read_at(self.index_offset + RECORD.size + turn * OFFSET.size, OFFSET.size))
+        return offset
+
+    def state_at(self, turn: int) -> Replayer:
+        """
+        Returns the boards as they were at the start of the turn, or at the end of the game for turn == turns.
+        Seeks to the keyframe before the turn and replays at most keyframe_interval turns of records after it.
+        """
+        if not 0 <= turn <= self.turns:
+            raise IndexError(f"turn {turn} is not in the replay, it has {self.turns}")
+        replayer = Replayer(self.size, self.fleet_size, self.rng_state)
+        if self.turns == 0:
+            return replayer
+        first = min(turn, self.turns - 1)
+        first -= first % self.keyframe_interval
+        start = self.turn_offset(first)
+        after = first + self.keyframe_interval
+        stop = self.turn_offset(after) if after < self.turns else self.end
+        data = self.read_at(start, stop - start)
+
+        kind, length = RECORD.unpack_from(data)
+        if kind != KEYFRAME:
+            raise ReplayError(f"turn {first} does not start with a keyframe")
+        replayer.load_keyframe(data[RECORD.size:RECORD.size + length])
+        replayer.run(data, RECORD.size + length, turn)
+        return replayer
+
+
+def verify_file(path: str) -> Dict:
+    """Verifies the replay at path, returning its summary with an "error" instead if it does not verify"""
+    try:
+        with open(path, "rb") as file:
+            return {"path": path, **verify(file.read())}
+    except (OSError, ReplayError) as error:
+        return {"path": path, "error": str(error)}
+
+
+def verify_files(paths: Sequence[str], workers: int = 0) -> Iterator[Dict]:
+    if workers <= 0:
+        yield from map(verify_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(verify_file, paths, chunksize=64)
+
+
+def render_board(state: BoardState) -> List[str]:
+    """The board as text, one line per row: ~ water, S ship, X hit, o miss"""
+    bits = state.bits
+    rows = []
+    for y in range(state.size):
+        row = []
+        for x in range(state.size):
+            bit = bits.bit((x, y))
+            row.append("X" if bits.hits & bit else "o" if bits.misses & bit else "S" if bits.ships & bit else "~")
+        rows.append(" ".join(row))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.replay", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("verify", help="replay every record of each file and check it plays out as recorded")
+    check.add_argument("paths", nargs="+", metavar="FILE")
+    check.add_argument("--workers", type=int, default=0, help="worker processes, 0 verifies every file in this process")
+    show = commands.add_parser("show", help="print both boards at the start of a turn")
+    show.add_argument("path", metavar="FILE")
+    show.add_argument("--turn", type=int, default=None, help="turn to seek to, the end of the game by default")
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        with ReplayFile(args.path) as replay:
+            turn = replay.turns if args.turn is None else args.turn
+            if not 0 <= turn <= replay.turns:
+                parser.error(f"--turn must be between 0 and {replay.turns}")
+            state = replay.state_at(turn)
+        print(f"turn {turn} of {replay.turns}")
+        for number in (1, 2):
+            board = state.boards[number]
+            held = [str(i + 1) for i, available in enumerate(board.powerups) if available]
+            print(f"\nplayer {number}'s board, powerups held against it: {', '.join(held) or 'none'}")
+            print("\n".join(render_board(board)))
+        return
+
+    start = time.perf_counter()
+    games = failed = 0
+    for result in verify_files(args.paths, args.workers):
+        games += 1
+        if "error" in result:
+            failed += 1
+            print(f"{result['path']}: {result['error']}", file=sys.stderr)
+    wall = time.perf_counter() - start
+    json.dump({"games": games, "failed": failed, "wall_s": round(wall, 3),
+               "games_per_s": round(games / wall, 1) if wall else None}, sys.stdout, indent=2)
+    print()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
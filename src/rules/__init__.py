@@ -0,0 +1,10 @@
+# Pygame-free game rules, importable on headless machines for simulation
+from .types import Coordinate, ShotResult
+from .bitboard import BitBoard
+from .ship import Ship
+from .board import BoardState
+from .fleet import sample_fleet, random_fleet, require_fleet
+from .shots import shot_pattern, SHOT_PATTERNS
+from .powerups import POWERUP_NAMES, POWERUP_SHOTS, roll_powerup, grant_powerup, use_powerup
+from .match import Match
+from .rng import SplitMix64, RandomStreams
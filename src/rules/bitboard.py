@@ -0,0 +1,75 @@
+from typing import Iterable, Iterator
+
+from .types import Coordinate
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """
+    Yields the index of every set bit in the mask, lowest first. The scan for set bits runs in C
+    over the binary string, so large sparse masks cost little more than their set bits.
+    """
+    bits = bin(mask)[:1:-1]  # lowest bit first, without the '0b' prefix
+    index = bits.find("1")
+    while index != -1:
+        yield index
+        index = bits.find("1", index + 1)
+
+
+class BitBoard:
+    """
+    Integer bitboards tracking the ships, hits and misses of a single board.
+
+    The cell at (x, y) is stored in bit ``y * size + x`` of each mask, so a shot and the
+    checks for ships and earlier shots are each a handful of bitwise operations instead of a walk over cells.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.ships = 0   # occupancy of every placed ship
+        self.hits = 0    # shots which landed on a ship
+        self.misses = 0  # shots which landed in open water
+
+    def bit(self, coordinate: Coordinate) -> int:
+        """Returns the single-bit mask for the given (x, y) grid coordinate"""
+        x, y = coordinate
+        return 1 << (y * self.size + x)
+
+    def mask(self, coordinates: Iterable[Coordinate]) -> int:
+        """Returns the mask covering every given (x, y) grid coordinate"""
+        mask = 0
+        for x, y in coordinates:
+            mask |= 1 << (y * self.size + x)
+        return mask
+
+    def add_ship(self, coordinates: Iterable[Coordinate]) -> int:
+        """
+        Marks the given coordinates as occupied by a ship
+
+        Returns:
+            int: The mask of the ship
+        """
+        mask = self.mask(coordinates)
+        self.ships |= mask
+        return mask
+
+    def has_ship(self, coordinate: Coordinate) -> bool:
+        return bool(self.ships & self.bit(coordinate))
+
+    def is_shot(self, coordinate: Coordinate) -> bool:
+        return bool((self.hits | self.misses) & self.bit(coordinate))
+
+    def fire(self, coordinate: Coordinate) -> bool:
+        """
+        Records a shot at the given coordinate as a hit or a miss
+
+        Returns:
+            bool: True if the cell had not been shot before, False otherwise
+        """
+        bit = self.bit(coordinate)
+        if (self.hits | self.misses) & bit:
+            return False
+        if self.ships & bit:
+            self.hits |= bit
+        else:
+            self.misses |= bit
+        return True
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional
+
+from .bitboard import BitBoard
+from .ship import Ship
+from .types import Coordinate, ShotResult
+from .powerups import new_inventory
+
+
+class BoardState:
+    """
+    The rules-level state of one player's board: placed ships, shots taken against it and the
+    powerup inventory of the player shooting at it. Holds no rendering or sound state.
+    """
+
+    def __init__(self, size: int, fleet_size: int) -> None:
+        self.size = size
+        self.fleet_size = fleet_size
+        self.bits = BitBoard(size)
+        self.ships: List[Ship] = []
+        self.ship_at: Dict[int, Ship] = {}  # bit index -> ship occupying that cell
+        self.ships_afloat = 0
+        self.powerups = new_inventory()
+
+    def index(self, coordinate: Coordinate) -> int:
+        x, y = coordinate
+        return y * self.size + x
+
+    def in_bounds(self, coordinate: Coordinate) -> bool:
+        x, y = coordinate
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def ship_at_coord(self, coordinate: Coordinate) -> Optional[Ship]:
+        return self.ship_at.get(self.index(coordinate))
+
+    def is_shot(self, coordinate: Coordinate) -> bool:
+        return self.bits.is_shot(coordinate)
+
+    def can_place(self, ship: Ship) -> bool:
+        """
+        Checks if the ship lies on the board and does not intersect with any placed ship
+        """
+        if not all(self.in_bounds(coord) for coord in ship.coordinates):
+            return False
+        return not self.bits.ships & self.bits.mask(ship.coordinates)
+
+    def place_ship(self, ship: Ship):
+        """
+        Adds the ship to the board, indexing every cell it occupies
+        """
+        self.bits.add_ship(ship.coordinates)
+        for coord in ship.coordinates:
+            self.ship_at[self.index(coord)] = ship
+        ship.remaining = ship.length
+        self.ships.append(ship)
+        self.ships_afloat += 1
+
+    def fire(self, coordinate: Coordinate) -> ShotResult:
+        """
+        Resolves a single shot against the board
+
+        Args:
+            coordinate (Tuple[int, int]): The x and y grid coordinate of the shot
+        Returns:
+            ShotResult: What the shot did, REPEAT and INVALID shots leave the board untouched
+        """
+        if not self.in_bounds(coordinate):
+            return ShotResult.INVALID
+        if not self.bits.fire(coordinate):
+            return ShotResult.REPEAT
+
+        ship = self.ship_at.get(self.index(coordinate))
+        if ship is None:
+            return ShotResult.MISS
+        ship.remaining -= 1
+        if ship.remaining == 0:
+            self.ships_afloat -= 1
+            return ShotResult.SINK
+        return ShotResult.HIT
+
+    def set_shots(self, shots: int):
+        """
+        Replaces every shot taken against the board with the cells of the mask, by bit index y * size + x,
+        working out which were hits and what is left of each ship. Used when loading a saved game.
+        """
+        bits = self.bits
+        bits.hits = shots & bits.ships
+        bits.misses = shots & ~bits.ships
+        self.ships_afloat = 0
+        for ship in self.ships:
+            ship.remaining = ship.length - bin(bits.mask(ship.coordinates) & bits.hits).count("1")
+            if ship.remaining > 0:
+                self.ships_afloat += 1
+
+    def all_ships_sunk(self) -> bool:
+        return len(self.ships) == self.fleet_size and self.ships_afloat == 0
@@ -0,0 +1,170 @@
+import random
+from typing import List, Optional, Sequence, Tuple
+
+from .ship import Ship
+
+# A ship's position as Ship takes it: the head (x, y), its length and whether it is vertical. Vertical ships
+# extend up from the head, horizontal ones to the right.
+Placement = Tuple[int, int, int, bool]
+
+# Uniform random draws from every placement of a ship tried before listing only the legal ones. On sparse
+# boards a draw is almost always legal, listing them is only needed once the board fills up.
+PLACEMENT_TRIES = 16
+# Ships moved elsewhere after a later ship found no room before starting over, and attempts before giving up.
+# Backtracking only ever moves the latest ships, on crowded boards starting over gets out of dead ends faster.
+MAX_BACKTRACKS = 50
+MAX_ATTEMPTS = 20
+
+
+def placement_cells(placement: Placement, size: int) -> List[int]:
+    """Returns the index y * size + x of every cell the placement covers"""
+    x, y, length, vertical = placement
+    if vertical:
+        return [(y - i) * size + x for i in range(length)]
+    return [y * size + x + i for i in range(length)]
+
+
+def cells_slice(placement: Placement, size: int) -> slice:
+    """Returns the slice of a board's cells, by index y * size + x, which the placement covers"""
+    x, y, length, vertical = placement
+    if vertical:
+        return slice((y - length + 1) * size + x, y * size + x + 1, size)
+    return slice(y * size + x, y * size + x + length)
+
+
+def is_free(placement: Placement, size: int, occupied: bytearray) -> bool:
+    x, y, length, vertical = placement
+    index = y * size + x
+    if not vertical:
+        return occupied.find(1, index, index + length) == -1
+    for _ in range(length):
+        if occupied[index]:
+            return False
+        index -= size
+    return True
+
+
+def random_placement(size: int, length: int, occupied: bytearray, rng=random, tries: int = PLACEMENT_TRIES) -> Optional[Placement]:
+    """
+    Draws placements of the ship uniformly from all of them on the board, returning the first one clear of
+    the occupied cells, or None if all the tries were occupied
+    """
+    span = size - length + 1
+    per_direction = size * span
+    for _ in range(tries):
+        draw = rng.randrange(2 * per_direction)
+        vertical = draw >= per_direction
+        line, offset = divmod(draw % per_direction, span)
+        placement = (line, length - 1 + offset, length, True) if vertical else (offset, line, length, False)
+        if is_free(placement, size, occupied):
+            return placement
+    return None
+
+
+def legal_placements(size: int, length: int, occupied: bytearray) -> List[Placement]:
+    """Returns every placement of the ship on the board which is clear of the occupied cells"""
+    legal = []
+    for line in range(size):
+        for offset in range(size - length + 1):
+            for placement in ((offset, line, length, False), (line, length - 1 + offset, length, True)):
+                if is_free(placement, size, occupied):
+                    legal.append(placement)
+    return legal
+
+
+def placements_through(size: int, length: int, x: int, y: int, occupied: bytearray) -> List[Placement]:
+    """Returns every placement of the ship covering (x, y) which is clear of the occupied cells"""
+    through = []
+    for i in range(length):
+        for placement in ((x - i, y, length, False), (x, y + i, length, True)):
+            hx, hy = placement[0], placement[1]
+            if 0 <= hx and hy < size and (hy - length + 1 >= 0 if placement[3] else hx + length <= size):
+                if is_free(placement, size, occupied):
+                    through.append(placement)
+    return through
+
+
+def mark(placement: Placement, size: int, occupied: bytearray, value: int = 1):
+    occupied[cells_slice(placement, size)] = bytes([value]) * placement[2]
+
+
+def sample_fleet(size: int, lengths: Sequence[int], rng=random, occupied: Optional[bytearray] = None) -> Optional[List[Placement]]:
+    """
+    Places ships of the given lengths, in order, each uniformly at random among its placements clear of the
+    cells already occupied. When a ship has no room left the ship before it is moved to another of its
+    placements, backtracking as far as needed. After MAX_BACKTRACKS moves it starts over.
+
+    Args:
+        occupied (bytearray): Cells ships may not use, by index y * size + x. Updated in place with the fleet.
+    Returns:
+        List[Placement] or None: The placement of each ship, or None if the fleet could not be placed
+    """
+    if occupied is None:
+        occupied = bytearray(size * size)
+    if any(length > size for length in lengths):
+        return None
+
+    for _ in range(MAX_ATTEMPTS):
+        chosen = place_ships(size, lengths, rng, occupied)
+        if chosen is not None:
+            return chosen
+    return None
+
+
+def place_ships(size: int, lengths: Sequence[int], rng, occupied: bytearray) -> Optional[List[Placement]]:
+    """One attempt of sample_fleet, leaving the occupied cells as they were if it fails"""
+    chosen: List[Placement] = []
+    options: List[Optional[List[Placement]]] = []  # untried legal placements of each placed ship, None until listed
+    backtracks = 0
+    while len(chosen) < len(lengths):
+        i = len(chosen)
+        if len(options) == i:
+            placement = random_placement(size, lengths[i], occupied, rng)
+            if placement is not None:
+                options.append(None)
+                mark(placement, size, occupied)
+                chosen.append(placement)
+                continue
+            options.append(legal_placements(size, lengths[i], occupied))
+
+        candidates = options[i]
+        if candidates:
+            pick = rng.randrange(len(candidates))
+            candidates[pick], candidates[-1] = candidates[-1], candidates[pick]
+            placement = candidates.pop()
+            mark(placement, size, occupied)
+            chosen.append(placement)
+            continue
+
+        # No room for this ship, move the one before it
+        options.pop()
+        if not chosen or backtracks >= MAX_BACKTRACKS:
+            for placement in chosen:
+                mark(placement, size, occupied, 0)
+            return None
+        backtracks += 1
+        previous = chosen.pop()
+        mark(previous, size, occupied, 0)
+        if options[-1] is None:
+            options[-1] = [placement for placement in legal_placements(size, previous[2], occupied) if placement != previous]
+    return chosen
+
+
+def random_fleet(size: int, lengths: Sequence[int], rng=random, occupied: Optional[bytearray] = None) -> Optional[List[Ship]]:
+    """
+    Returns ships of the given lengths at random non-overlapping positions, or None if they do not fit
+    """
+    placements = sample_fleet(size, lengths, rng, occupied)
+    if placements is None:
+        return None
+    return [Ship(x, y, length, "VERTICAL" if vertical else "HORIZONTAL", size) for x, y, length, vertical in placements]
+
+
+def require_fleet(size: int, lengths: Sequence[int], rng=random, occupied: Optional[bytearray] = None) -> List[Ship]:
+    """
+    Like random_fleet, but raises ValueError naming the grid size and the fleet if the ships do not fit
+    """
+    ships = random_fleet(size, lengths, rng, occupied)
+    if ships is None:
+        raise ValueError(f"no room for ships of lengths {', '.join(map(str, lengths))} on a {size}x{size} grid")
+    return ships
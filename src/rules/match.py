@@ -0,0 +1,67 @@
+import random
+from typing import List, Optional, Tuple
+
+from .board import BoardState
+from .powerups import roll_powerup, grant_powerup, use_powerup, POWERUP_SHOTS
+from .shots import shot_pattern
+from .types import Coordinate, ShotResult
+
+# Results which count as a shot actually landing on the board
+LANDED = (ShotResult.MISS, ShotResult.HIT, ShotResult.SINK)
+
+
+class Match:
+    """
+    A headless two-player game on the rules engine. Players 1 and 2 take turns firing at each
+    other's boards until one fleet is sunk.
+    """
+
+    def __init__(self, size: int, fleet_size: int, rng=random) -> None:
+        self.size = size
+        self.fleet_size = fleet_size
+        self.rng = rng
+        self.boards = {1: BoardState(size, fleet_size), 2: BoardState(size, fleet_size)}
+        self.current_player = 1
+        self.winner: Optional[int] = None
+        self.turns = 0
+
+    def opponent(self, player: Optional[int] = None) -> int:
+        player = self.current_player if player is None else player
+        return 2 if player == 1 else 1
+
+    def target(self, player: Optional[int] = None) -> BoardState:
+        """Returns the board the given player (default: the current player) shoots at"""
+        return self.boards[self.opponent(player)]
+
+    def use_powerup(self, powerup: int) -> Optional[str]:
+        """
+        Consumes one of the current player's powerups. Returns the shot selection it grants, or None if unavailable
+        """
+        if use_powerup(self.target().powerups, powerup):
+            return POWERUP_SHOTS[powerup]
+        return None
+
+    def fire(self, target: Coordinate, selection: str = "single") -> List[Tuple[Coordinate, ShotResult]]:
+        """
+        Fires the current player's shot at the opponent's board. Every shot which lands rolls for a powerup.
+
+        Returns:
+            List[Tuple[Coordinate, ShotResult]]: The result of each cell covered by the shot
+        """
+        board = self.target()
+        results = []
+        for coord in shot_pattern(selection, target):
+            result = board.fire(coord)
+            if result in LANDED:
+                powerup = roll_powerup(self.rng)
+                if powerup is not None:
+                    grant_powerup(board.powerups, powerup)
+            results.append((coord, result))
+
+        if self.winner is None and board.all_ships_sunk():
+            self.winner = self.current_player
+        return results
+
+    def end_turn(self):
+        self.current_player = self.opponent()
+        self.turns += 1
@@ -0,0 +1,122 @@
+from typing import Iterable, Tuple
+
+from .board import BoardState
+from .powerups import POWERUP_NAMES
+from .ship import Ship
+
+
+class SnapshotError(ValueError):
+    """Raised for packed data which is not valid or not a version this code can read"""
+
+
+def byte_width(value: int) -> int:
+    """Bytes needed to store integers from 0 to value"""
+    return max(1, (value.bit_length() + 7) // 8)
+
+
+def pack_varint(out: bytearray, value: int):
+    """Appends the non-negative integer 7 bits a byte, least significant first, the high bit set on all but the last"""
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def unpack_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Reads an integer packed by pack_varint at offset, returns it and the offset after it"""
+    value = 0
+    for shift in range(0, 70, 7):
+        if offset >= len(data):
+            raise SnapshotError("data is truncated")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+    raise SnapshotError("integer is too long")
+
+
+def pack_board(out: bytearray, state: BoardState, highlighted: Iterable[int] = None, shots: int = None, with_shots: bool = True):
+    """
+    Appends the board to out: its powerups as one bit each, the ship count, each ship's head cell index and
+    length in as few bytes as the grid size needs, one direction bit per ship set for vertical ships, then
+    the shot cells (the board's own unless a mask is given, left out without with_shots) and, if given, the
+    highlighted cells as bitfields by index y * size + x, little-endian
+    """
+    size = state.size
+    cells = size * size
+    mask_bytes = (cells + 7) // 8
+    index_bytes = byte_width(cells - 1)
+    length_bytes = byte_width(size)
+
+    out.append(sum(1 << i for i, available in enumerate(state.powerups) if available))
+    out.append(len(state.ships))
+    directions = 0
+    for i, ship in enumerate(state.ships):
+        x, y = ship.coordinates[0]
+        out += (y * size + x).to_bytes(index_bytes, "big")
+        out += ship.length.to_bytes(length_bytes, "big")
+        if ship.direction == "VERTICAL":
+            directions |= 1 << i
+    out += directions.to_bytes((len(state.ships) + 7) // 8, "little")
+
+    if with_shots:
+        if shots is None:
+            shots = state.bits.hits | state.bits.misses
+        out += shots.to_bytes(mask_bytes, "little")
+    if highlighted is not None:
+        out += sum(1 << index for index in highlighted).to_bytes(mask_bytes, "little")
+
+
+def unpack_board(data: bytes, offset: int, state: BoardState, highlights: bool = False, with_shots: bool = True) -> Tuple[int, int]:
+    """
+    Fills the empty board from data packed by pack_board at offset, with no shots if it was packed without
+    them. Raises SnapshotError if the data is truncated or has ships off the board or overlapping.
+
+    Returns:
+        Tuple[int, int]: The offset after the board, and the mask of highlighted cells (0 without highlights)
+    """
+    size = state.size
+    cells = size * size
+    mask_bytes = (cells + 7) // 8
+    index_bytes = byte_width(cells - 1)
+    length_bytes = byte_width(size)
+    try:
+        powerups = data[offset]
+        count = data[offset + 1]
+        offset += 2
+        heads = []
+        for _ in range(count):
+            index = int.from_bytes(data[offset:offset + index_bytes], "big")
+            length = int.from_bytes(data[offset + index_bytes:offset + index_bytes + length_bytes], "big")
+            heads.append((index, length))
+            offset += index_bytes + length_bytes
+        direction_bytes = (count + 7) // 8
+        directions = int.from_bytes(data[offset:offset + direction_bytes], "little")
+        offset += direction_bytes
+        shots = 0
+        if with_shots:
+            shots = int.from_bytes(data[offset:offset + mask_bytes], "little")
+            offset += mask_bytes
+        highlighted = 0
+        if highlights:
+            highlighted = int.from_bytes(data[offset:offset + mask_bytes], "little")
+            offset += mask_bytes
+    except IndexError:
+        raise SnapshotError("data is truncated") from None
+    if offset > len(data):
+        raise SnapshotError("data is truncated")
+
+    state.powerups = [bool(powerups >> i & 1) for i in range(len(POWERUP_NAMES))]
+    bits = state.bits
+    for i, (index, length) in enumerate(heads):
+        x, y = index % size, index // size
+        vertical = directions >> i & 1
+        if index >= cells or length < 1 or (y - length + 1 < 0 if vertical else x + length > size):
+            raise SnapshotError("a ship is off the board")
+        ship = Ship(x, y, length, "VERTICAL" if vertical else "HORIZONTAL", size)
+        if bits.ships & bits.mask(ship.coordinates):
+            raise SnapshotError("ships overlap")
+        state.place_ship(ship)
+    state.set_shots(shots & ((1 << cells) - 1))
+    return offset, highlighted & ((1 << cells) - 1)
@@ -0,0 +1,60 @@
+import random
+from typing import List, Optional
+
+NUKE = 0
+RUN_H = 1
+RUN_V = 2
+VOLLEY = 3
+RADAR = 4
+
+POWERUP_NAMES = ["Nuke", "Horizontal Bombing Run", "Vertical Bombing Run", "Volley", "Radar"]
+
+# Shot selection each powerup switches the player to
+POWERUP_SHOTS = ["nuke", "run_h", "run_v", "volley", "radar"]
+
+# Chance of rolling any powerup after a successful shot
+POWERUP_CHANCE = 0.2
+
+# Thresholds checked in order against a second roll, anything above them grants a volley.
+# Every threshold is 0.2 so only nukes and volleys can currently be rolled.
+POWERUP_ODDS = [(0.2, NUKE), (0.2, RUN_H), (0.2, RUN_V), (0.2, RADAR)]
+
+
+def new_inventory() -> List[bool]:
+    return [False] * len(POWERUP_NAMES)
+
+
+def roll_powerup(rng=random) -> Optional[int]:
+    """
+    Rolls for a powerup after a successful shot
+
+    Returns:
+        int or None: The index of the powerup rolled, or None if nothing was rolled
+    """
+    if rng.random() >= POWERUP_CHANCE:
+        return None
+    powerup_chance = rng.random()
+    for threshold, powerup in POWERUP_ODDS:
+        if powerup_chance < threshold:
+            return powerup
+    return VOLLEY
+
+
+def grant_powerup(powerups: List[bool], powerup: int) -> bool:
+    """
+    Adds the powerup to the inventory. Returns False if it was already held and the duplicate is wasted
+    """
+    if powerups[powerup]:
+        return False
+    powerups[powerup] = True
+    return True
+
+
+def use_powerup(powerups: List[bool], powerup: int) -> bool:
+    """
+    Consumes the powerup from the inventory. Returns False if it was not available
+    """
+    if not powerups[powerup]:
+        return False
+    powerups[powerup] = False
+    return True
@@ -0,0 +1,21 @@
+from typing import List
+
+from .types import Coordinate
+
+# Grid offsets from the targeted cell hit by each shot selection, the targeted cell always comes first
+SHOT_PATTERNS = {
+    "single": [(0, 0)],
+    "nuke": [(0, 0), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)],
+    "run_h": [(0, 0), (1, 0), (2, 0), (-1, 0), (-2, 0)],
+    "run_v": [(0, 0), (0, 1), (0, 2), (0, -1), (0, -2)],
+    "radar": [(0, 0)],
+}
+
+
+def shot_pattern(selection: str, target: Coordinate) -> List[Coordinate]:
+    """
+    Returns the grid coordinates hit by a shot of the given selection aimed at the target.
+    Coordinates may fall off the board, resolving them is left to the board.
+    """
+    x, y = target
+    return [(x + dx, y + dy) for dx, dy in SHOT_PATTERNS.get(selection, SHOT_PATTERNS["single"])]
@@ -0,0 +1,12 @@
+from typing import Tuple
+from enum import Enum
+
+Coordinate = Tuple[int, int]
+
+
+class ShotResult(Enum):
+    MISS = 1
+    HIT = 2
+    SINK = 3
+    REPEAT = 4   # the cell had already been shot
+    INVALID = 5  # the coordinate is off the board
@@ -3,4 +3,6 @@ from .playing import PlayingScreen
 from .finish import FinishScreen
 from .selection import SelectionScreen
 from .turn_transition import TurnTransition
-from .begin_game import BeginGameScreen
\ No newline at end of file
+from .begin_game import BeginGameScreen
+from .game_mode import GameModeScreen
+from .difficulty_screen import DifficultyScreen
@@ -2,14 +2,23 @@ import pygame
 
 from typing import List
 
+from ..text import get_font, render_text
+
 class Screen:
+    """
+    One state of the game. Every frame the game calls handle_events, update and then render, which only draws
+    to the surface: screens never call pygame.display.flip or update, the game presents each frame once.
+    """
+    # Screens which set this only redraw the regions marked in game.dirty and have only those presented
+    tracks_dirty = False
+
     def __init__(self, game) -> None:
         self.game = game
 
         # Load the font
-        self.font_sm = pygame.font.SysFont('impact', 20)
-        self.font_md = pygame.font.SysFont('impact', 45)
-        self.font_lg = pygame.font.SysFont('impact', 65)
+        self.font_sm = get_font('impact', 20)
+        self.font_md = get_font('impact', 45)
+        self.font_lg = get_font('impact', 65)
 
     def handle_events(self, events: List[pygame.event.Event]):
         pass
@@ -17,11 +26,18 @@ class Screen:
     def update(self):
         pass
 
+    def is_idle(self) -> bool:
+        """
+        Whether the screen has no animation or timers running, so nothing changes until the next event.
+        The game loop sleeps until input arrives while this is True.
+        """
+        return True
+
     def render(self, surface: pygame.Surface):
         pass
 
     def write(self, text: str, font: pygame.font.Font, color: tuple, surface: pygame.Surface, x: int, y: int, center=False):
-        text = font.render(text, True, color)
+        text = render_text(text, font, color)
         if center:
             rect = text.get_rect(center=(x, y))
         else:
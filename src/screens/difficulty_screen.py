@@ -29,12 +29,10 @@ class DifficultyScreen(Screen):
             button.update(mouse_pos)
             button.draw(surface)
 
-        pygame.display.flip()
-
     def handle_events(self, events: List[pygame.event.Event]):
         for event in events:
             if event.type == pygame.MOUSEBUTTONUP:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = event.pos
                 for i, button in enumerate(self.buttons):
                     if button.is_clicked(mouse_pos):
                         if i == 0:  # Easy
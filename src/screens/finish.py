@@ -2,6 +2,7 @@ import pygame
 import sys
 from ._screen import Screen
 from ..types import Color
+from ..text import get_font, render_text
 
 class FinishScreen(Screen):
     def __init__(self, game, winner):
@@ -9,22 +10,20 @@ class FinishScreen(Screen):
         self.winner = winner
 
     def render(self, surface):
-        font = pygame.font.SysFont("Impact", 38)
-        small_font = pygame.font.SysFont("Impact", 26)
+        font = get_font("Impact", 38)
+        small_font = get_font("Impact", 26)
 
         text = f"Player {self.winner} Wins!"
-        text_surface = font.render(text, True, pygame.Color('white'))
+        text_surface = render_text(text, font, pygame.Color('white'))
 
         instructions = "Press Q to Quit or R to Play Again"
-        instructions_surface = small_font.render(instructions, True, pygame.Color('white'))
+        instructions_surface = render_text(instructions, small_font, pygame.Color('white'))
 
         surface.fill(Color.BACKGROUND)
 
         surface.blit(text_surface, (surface.get_width() // 2 - text_surface.get_width() // 2, surface.get_height() // 2 - text_surface.get_height() // 2 - 50))
         surface.blit(instructions_surface, (surface.get_width() // 2 - instructions_surface.get_width() // 2, surface.get_height() // 2 - instructions_surface.get_height() // 2 + 50))
 
-        pygame.display.flip()
-
     def handle_events(self, events):
         for event in events:
             if event.type == pygame.QUIT:
@@ -37,6 +36,5 @@ class FinishScreen(Screen):
                     sys.exit()
                 elif event.key == pygame.K_r:
                     print('restart')
-                    return 'restart'
-
-        return None
\ No newline at end of file
+                    self.game.reset_game()
+                    return
\ No newline at end of file
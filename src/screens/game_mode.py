@@ -11,14 +11,15 @@ class GameModeScreen(Screen):
         button_bg_color = Color.BUTTON_BG
         button_hover_color = Color.BUTTON_HOVER
 
-        # Create buttons for Player vs Player and Player vs AI
+        # Create buttons for Player vs Player, Player vs AI and an online game against another player
         self.buttons = [
             Button("Player vs Player", (SCREEN_WIDTH // 2) - 100, 200, self.font_sm, button_text_color, button_bg_color, button_hover_color, True),
-            Button("    Player vs AI     ", (SCREEN_WIDTH // 2) + 75, 200, self.font_sm, button_text_color, button_bg_color, button_hover_color, True)
+            Button("    Player vs AI     ", (SCREEN_WIDTH // 2) + 75, 200, self.font_sm, button_text_color, button_bg_color, button_hover_color, True),
+            Button("Online", SCREEN_WIDTH // 2, 300, self.font_sm, button_text_color, button_bg_color, button_hover_color, True)
         ]
 
         self.start_game_button = Button('START', SCREEN_WIDTH // 2, 400, self.font_md, button_text_color, button_bg_color, button_hover_color, True, False)
-        self.selected_mode = None  # Stores whether Player vs Player or Player vs AI is selected
+        self.selected_mode = None  # Stores whether Player vs Player, Player vs AI or Online is selected
 
     def render(self, surface):
         surface.fill(Color.BACKGROUND)
@@ -36,12 +37,10 @@ class GameModeScreen(Screen):
         self.start_game_button.update(mouse_pos)
         self.start_game_button.draw(surface)
 
-        pygame.display.flip()
-
     def handle_events(self, events):
         for event in events:
             if event.type == pygame.MOUSEBUTTONUP:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = event.pos
                 for button in self.buttons:
                     if button.is_clicked(mouse_pos):
                         # Set the selected mode based on button clicked
@@ -49,6 +48,8 @@ class GameModeScreen(Screen):
                             self.selected_mode = "PvP"
                         elif button.text == "    Player vs AI     ":
                             self.selected_mode = "PvAI"
+                        elif button.text == "Online":
+                            self.selected_mode = "Online"
 
                         # Uncheck other buttons
                         for other_button in self.buttons:
@@ -63,3 +64,5 @@ class GameModeScreen(Screen):
                             self.game.set_state(State.SELECTION)  # Move to player selection
                         elif self.selected_mode == "PvAI":
                             self.game.set_state(State.AI_DIFFICULTY)  # Transition to the difficulty selection
+                        elif self.selected_mode == "Online":
+                            self.game.start_online_game()  # Place the fleet while the server finds an opponent
@@ -41,8 +41,6 @@ class MenuScreen(Screen):
         self.start_game_button.update(mouse_pos)
         self.start_game_button.draw(surface)
 
-        pygame.display.flip()
-
     def handle_events(self, events):
         for event in events:
             if event.type == pygame.QUIT:
@@ -50,7 +48,7 @@ class MenuScreen(Screen):
                 pygame.quit()
                 exit()
             elif event.type == pygame.MOUSEBUTTONUP:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = event.pos
                 for i, button in enumerate(self.buttons):
                     if button.is_clicked(mouse_pos):
                         if button.is_checked:
@@ -70,5 +68,5 @@ class MenuScreen(Screen):
 
                 if self.start_game_button.is_clicked(mouse_pos):
                     if self.selected_ships is not None:
-                        self.game.set_state(State.SELECTION)
+                        self.game.set_state(State.GAME_MODE)
 
@@ -1,21 +1,36 @@
 import pygame
+from typing import Optional
 
 from ._screen import Screen
 from ..types import Color, Player, State
-from ..config import SCREEN_WIDTH, SCREEN_HEIGHT, COL_SIZE
+from ..config import SCREEN_WIDTH, SCREEN_HEIGHT
 from ..audio import Audio
+from ..rules import shot_pattern, POWERUP_NAMES, ShotResult
+from ..net import protocol
+from ..text import get_font, render_text, render_icon
 
 TURN_TRANSITION_EVENT = pygame.USEREVENT + 1
 
+# Height in px of the strip of the screen redrawn when a message appears or disappears
+MESSAGE_HEIGHT = 50
+INVENTORY_HEIGHT = 80
+# ms between steps of the dots after "CPU is thinking" while the CPU chooses its shot, or "Waiting for opponent"
+THINKING_STEP = 300
+
 class PlayingScreen(Screen):
+    tracks_dirty = True
+
     def __init__(self, game: "Game") -> None:
         super().__init__(game)
         self.TURN_TRANSITION_DELAY = 1000
-        self.volley_shot_clicks = 0
-        self.volley_positions = []
+        self.volley_positions = []  # grid coordinates of the cells picked for a volley so far
         self.message = None
         self.message_timer = 0
         self.MESSAGE_DISPLAY_DURATION = 2000
+        self.drawn_powerups = None  # inventory shown in the last frame, to notice when it changes
+        self.thinking_dots = None  # dots of the thinking indicator shown in the last frame, None when hidden
+        self.thinking_text = None  # what the thinking indicator says
+        self.showing_shot = False  # a shot from the game server is on screen until the turn transition
         self.powerup_icons = {
             "Nuke": pygame.image.load("images/nuke_icon.png").convert_alpha(),
             "Horizontal Bombing Run": pygame.image.load("images/horizontal_icon.png").convert_alpha(),
@@ -24,55 +39,81 @@ class PlayingScreen(Screen):
             "Radar": pygame.image.load("images/radar_icon.png").convert_alpha(),
         }
 
+    def show_message(self, message):
+        """Shows a message (or clears it with None), marking the message strip for redraw"""
+        self.game.dirty.mark(self.message_rect())
+        self.message = message
+        self.message_timer = pygame.time.get_ticks()
+
+    def viewer(self) -> Player:
+        """The player whose ships, messages and powerups are shown, always player one against the CPU or online"""
+        if self.game.cpu is not None or self.game.remote is not None:
+            return Player.ONE
+        return self.game.current_player
+
+    def opponent_turn(self) -> bool:
+        """Whether player two is the CPU or an online opponent, and it is their turn"""
+        return (self.game.cpu is not None or self.game.remote is not None) and self.game.current_player == Player.TWO
+
+    def message_rect(self) -> pygame.Rect:
+        # determine message location per player
+        if self.viewer() == Player.ONE:
+            message_y = SCREEN_HEIGHT // 4
+        else:
+            message_y = (SCREEN_HEIGHT // 4) * 3
+        return pygame.Rect(0, message_y, SCREEN_WIDTH, MESSAGE_HEIGHT)
+
+    def thinking_rect(self) -> pygame.Rect:
+        return self.message_rect().move(0, MESSAGE_HEIGHT)
+
+    def inventory_rect(self) -> pygame.Rect:
+        # determine inventory location per player
+        if self.viewer() == Player.ONE:
+            inventory_y = SCREEN_HEIGHT // 2
+        else:
+            inventory_y = SCREEN_HEIGHT // 2 - INVENTORY_HEIGHT
+        return pygame.Rect(0, inventory_y, SCREEN_WIDTH, INVENTORY_HEIGHT)
+
+    def current_powerups(self):
+        """Returns the powerup inventory of the player being shown"""
+        if self.viewer() == Player.ONE:
+            return self.game.player_2_board.get_powerups()
+        return self.game.player_1_board.get_powerups()
+
     def draw_message(self, surface):
 
         if self.message:
             
-            # determine message location per player
-            if self.game.current_player == Player.ONE:
-                message_x = SCREEN_WIDTH // 2
-                message_y = SCREEN_HEIGHT // 4
-            else:
-                message_x = SCREEN_WIDTH // 2
-                message_y = (SCREEN_HEIGHT // 4) * 3
+            message_y = self.message_rect().y
             
             # render the message
-            font = pygame.font.SysFont('impact', 32)
-            message_surface = font.render(self.message, True, Color.RED)
+            message_surface = render_text(self.message, get_font('impact', 32), Color.RED)
             message_width = message_surface.get_width()
             message_x = (SCREEN_WIDTH - message_width) // 2
             surface.blit(message_surface, (message_x, message_y))
-            if pygame.time.get_ticks() - self.message_timer > self.MESSAGE_DISPLAY_DURATION:
-                self.message = None
+
+    def draw_thinking(self, surface):
+        thinking_surface = render_text(self.thinking_text + "." * self.thinking_dots, get_font('impact', 32), Color.WHITE)
+        surface.blit(thinking_surface, ((SCREEN_WIDTH - thinking_surface.get_width()) // 2, self.thinking_rect().y))
     
     def draw_inventory(self, surface):
-        # determine inventory location per player
-        if self.game.current_player == Player.ONE:
-            inventory_x = 0
-            inventory_y = SCREEN_HEIGHT // 2
-        else:
-            inventory_x = 0
-            inventory_y = SCREEN_HEIGHT // 2 - 80
+        inventory_x, inventory_y = self.inventory_rect().topleft
 
         # make background
-        inventory_surface = pygame.Surface((SCREEN_WIDTH, 80), pygame.SRCALPHA)
-        inventory_surface.fill((0, 0, 0, 100))
-        surface.blit(inventory_surface, (inventory_x, inventory_y))
+        if not hasattr(self, 'inventory_background'):
+            self.inventory_background = pygame.Surface((SCREEN_WIDTH, INVENTORY_HEIGHT), pygame.SRCALPHA)
+            self.inventory_background.fill((0, 0, 0, 100))
+        surface.blit(self.inventory_background, (inventory_x, inventory_y))
 
         # get powerups for the current player
-        if self.game.current_player == Player.ONE:
-            powerups = self.game.player_2_board.get_powerups()
-        else:
-            powerups = self.game.player_1_board.get_powerups()
+        powerups = self.current_powerups()
 
-        font = pygame.font.SysFont('impact', 16)
-        for index, (powerup, available) in enumerate(zip(["Nuke", "Horizontal Bombing Run", "Vertical Bombing Run", "Volley", "Radar"], powerups)):
+        font = get_font('impact', 16)
+        for index, (powerup, available) in enumerate(zip(POWERUP_NAMES, powerups)):
            
             icon_color = (255, 255, 255) if available else (100, 100, 100)
-            icon = self.powerup_icons[powerup]
-            icon = pygame.transform.scale(icon, (60, 60))  # scale icons to a fixed size
-            tinted_icon = icon.copy()
-            tinted_icon.fill(icon_color, special_flags=pygame.BLEND_RGBA_MULT)
+            # scale icons to a fixed size and tint unavailable ones grey
+            tinted_icon = render_icon(powerup, self.powerup_icons[powerup], (60, 60), icon_color)
 
             # Draw the icon
             icon_x = inventory_x + index * 80  # space icons horizontally
@@ -80,116 +121,235 @@ class PlayingScreen(Screen):
             surface.blit(tinted_icon, (icon_x, icon_y))
 
             # Display key bind under the icon
-            key_bind_text = font.render(f"({index + 1})", True, icon_color)
+            key_bind_text = render_text(f"({index + 1})", font, icon_color)
             key_bind_x = icon_x + 40  # center the key bind below the icon
             key_bind_y = inventory_y + 40
             surface.blit(key_bind_text, (key_bind_x, key_bind_y))
 
     def render(self, surface):
-        surface.fill(Color.BACKGROUND)
-
         # Create overlay if it doesn't exist
         if not hasattr(self, 'overlay'):
             self.overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT // 2), pygame.SRCALPHA)
             self.overlay.fill((0, 0, 0, 100))  # Semi-transparent red
 
+        # Only the regions marked dirty since the last frame are redrawn (the whole screen after a state change)
+        for region in self.game.dirty.take():
+            surface.set_clip(region)
+            self.draw_region(surface, region)
+        surface.set_clip(None)
+
+    def draw_region(self, surface, region: pygame.Rect):
+        """Redraws everything overlapping the region, the surface should be clipped to it"""
+        surface.fill(Color.BACKGROUND, region)
+
+        viewer = self.viewer()
+        self.game.player_1_board.draw_region(surface, region, viewer == Player.ONE)
+        self.game.player_2_board.draw_region(surface, region, viewer == Player.TWO)
+        if self.game.current_player == Player.ONE:
+            # Apply overlay to bottom half (Player 1's board)
+            overlay_pos = (0, SCREEN_HEIGHT // 2)
+        else:
+            # Apply overlay to top half (Player 2's board)
+            overlay_pos = (0, 0)
+        if region.colliderect(self.overlay.get_rect(topleft=overlay_pos)):
+            surface.blit(self.overlay, overlay_pos)
+
+        if region.colliderect(self.message_rect()):
+            self.draw_message(surface)
+        if region.colliderect(self.inventory_rect()):
+            self.draw_inventory(surface)
+        if self.thinking_dots is not None and region.colliderect(self.thinking_rect()):
+            self.draw_thinking(surface)
+
+    def is_idle(self) -> bool:
+        # A showing message has to be cleared when its timer runs out, the turn transition timer posts an event.
+        # While the CPU thinks every frame checks whether its shot is ready, online every frame checks the server.
+        return self.message is None and not (self.game.cpu is not None and self.game.cpu.thinking()) and self.game.remote is None
+
+    def update(self):
+        if self.message and pygame.time.get_ticks() - self.message_timer > self.MESSAGE_DISPLAY_DURATION:
+            self.show_message(None)
+
+        # Redraw the inventory bar when a powerup is gained or used
+        powerups = tuple(self.current_powerups())
+        if powerups != self.drawn_powerups:
+            self.drawn_powerups = powerups
+            self.game.dirty.mark(self.inventory_rect())
+
+        self.update_cpu()
+        self.update_remote()
+        self.update_thinking()
+
+    def update_cpu(self):
+        """Fires the CPU's shot once its worker thread has chosen it"""
+        cpu = self.game.cpu
+        if cpu is not None and cpu.poll_move(self.game.player_1_board):
+            # Leave the shot on screen for a moment before handing the turn back
+            pygame.time.set_timer(TURN_TRANSITION_EVENT, self.TURN_TRANSITION_DELAY, loops=1)
+
+    def update_remote(self):
+        """
+        Applies what the game server sent in an online game. Like the CPU's, every shot stays on screen for
+        the turn transition delay, so messages after it wait until the turn has passed.
+        """
+        remote = self.game.remote
+        while remote is not None and not self.showing_shot:
+            event = remote.peek()
+            if event is None:
+                return
+            kind = event[0]
+            if kind == "result" and (Player.ONE if event[1] == remote.seat else Player.TWO) != self.game.current_player:
+                return
+            remote.pop()
+
+            if kind == "started":
+                self.game.current_player = Player.ONE if event[1] == remote.seat else Player.TWO
+                self.game.player_can_shoot = self.game.current_player == Player.ONE
+                self.game.dirty.mark_all()
+            elif kind == "result":
+                self.show_result(*event[2:])
+            elif kind == "error":
+                print("Server rejected the shot:", protocol.ERRORS.get(event[1], event[1]))
+                self.show_message("Not Available" if event[1] == protocol.POWERUP_UNAVAILABLE else "Not Valid")
+                self.game.player_can_shoot = True
+            elif kind == "game_over":
+                if event[2] == protocol.OPPONENT_LEFT:
+                    print("Opponent left the game")
+                winner = Player.ONE if event[1] == remote.seat else Player.TWO
+                self.game.close_remote()
+                self.game.declare_winner(winner)
+                return
+            elif kind == "closed":
+                print("Connection to the game server lost", *event[1:])
+                self.show_message("Connection lost")
+                self.game.player_can_shoot = False
+                self.game.close_remote()
+                return
+
+    def show_result(self, selection: str, powerups: int, results, revealed):
+        """Shows a shot the server resolved, on the opponent's board if it was player one's and on player one's if not"""
+        size = self.game.grid_size
         if self.game.current_player == Player.ONE:
-            self.game.player_1_board.draw(surface)
-            self.game.player_2_board.draw(surface, False)
-            # Apply overlay to bottom half (Player 2's board)
-            surface.blit(self.overlay, (0, SCREEN_HEIGHT // 2))
-        elif self.game.current_player == Player.TWO:
-            self.game.player_1_board.draw(surface, False)
-            self.game.player_2_board.draw(surface)
-            # Apply overlay to top half (Player 1's board)
-            surface.blit(self.overlay, (0, 0))
+            board = self.game.player_2_board
+            for index, result in results:
+                board.cells[index // size][index % size].show_shot(ShotResult(result))
+            # The server keeps the powerups, what the shot used and rolled comes back with it
+            board.set_powerups(protocol.unpack_powerups(powerups, len(POWERUP_NAMES)))
+            if revealed:
+                coords = [(index % size, index // size) for index in revealed]
+                self.show_message("Ship detected at " + str(coords))
+                board.highlight_cells(coords)
+        else:
+            board = self.game.player_1_board
+            for index, _ in results:
+                board.cells[index // size][index % size].shoot()
+        self.showing_shot = True
+        pygame.time.set_timer(TURN_TRANSITION_EVENT, self.TURN_TRANSITION_DELAY, loops=1)
 
-        self.draw_message(surface)
-        self.draw_inventory(surface)
+    def waiting_text(self) -> Optional[str]:
+        """What the thinking indicator says while player two chooses their shot, None when it is hidden"""
+        if self.game.cpu is not None and self.game.cpu.thinking():
+            return "CPU is thinking"
+        if self.game.remote is not None and not self.game.player_can_shoot and not self.showing_shot:
+            return "Waiting for opponent"
+        return None
 
+    def update_thinking(self):
+        """Animates the thinking indicator while the CPU or the online opponent chooses a shot"""
+        text = self.waiting_text()
+        dots = pygame.time.get_ticks() // THINKING_STEP % 4 if text is not None else None
+        if dots != self.thinking_dots or text != self.thinking_text:
+            self.thinking_dots = dots
+            self.thinking_text = text
+            self.game.dirty.mark(self.thinking_rect())
 
-    def get_grid_position(self, mouse_pos):
-        """Converts mouse position to grid coordinates."""
-        grid_x = int(mouse_pos[0] // COL_SIZE)  # Convert to int to avoid float issues
-        grid_y = int(mouse_pos[1] // COL_SIZE)  # Convert to int to avoid float issues
-        return (grid_x, grid_y)
+    def switch_opponent_turn(self):
+        """
+        Passes the turn between player one and the CPU or online opponent, which needs no transition screen.
+        On the CPU's turn it starts choosing its shot in the background.
+        """
+        self.game.current_player = Player.TWO if self.game.current_player == Player.ONE else Player.ONE
+        self.game.reset_shot_selection()
+        self.game.dirty.mark_all()
+        self.showing_shot = False
+        if self.game.current_player == Player.TWO:
+            self.game.player_can_shoot = False
+            if self.game.cpu is not None:
+                self.game.cpu.start_move()
+        else:
+            self.game.player_can_shoot = True
+
+    def reset_volley(self):
+        """Forgets the cells picked for a volley, when the game is reset or another is loaded"""
+        self.volley_positions = []
+
+    def fire_remote(self, mouse_pos):
+        """Sends player one's shot to the game server, its result comes back through update_remote"""
+        board = self.game.player_2_board
+        cell = board.cell_at(mouse_pos)
+        if cell is None or (self.game.shot_selection == "single" and cell.is_hit):
+            self.show_message("Not Valid")
+            return
+        if self.game.shot_selection == "volley":
+            # The four cells of a volley are sent together once all are picked
+            self.volley_positions.append(cell.coordinate)
+            board.highlight_cells([cell.coordinate])
+            if len(self.volley_positions) < protocol.VOLLEY_SHOTS:
+                return
+            board.reset_highlights()
+            coords, self.volley_positions = self.volley_positions, []
+        else:
+            coords = [cell.coordinate]
+        self.game.player_can_shoot = False
+        self.game.remote.fire(self.game.shot_selection, coords)
 
 
     def handle_events(self, events):
         for event in events:
-            if event.type == pygame.MOUSEBUTTONUP and self.game.player_can_shoot:
+            if event.type == pygame.MOUSEBUTTONUP and self.game.player_can_shoot and self.game.remote is not None:
+                self.fire_remote(event.pos)
+
+            elif event.type == pygame.MOUSEBUTTONUP and self.game.player_can_shoot:
+
+                mouse_pos = event.pos
+                if self.game.current_player == Player.ONE:
+                    target_board = self.game.player_2_board
+                elif self.game.current_player == Player.TWO:
+                    target_board = self.game.player_1_board
 
-                mouse_pos = pygame.mouse.get_pos()
-                grid_pos = self.get_grid_position(mouse_pos)  # Convert to grid position
                 # Check if we're using the Volley Shot
                 if self.game.shot_selection == "volley":
-                    # Append mouse positions
-                    self.volley_positions.append(mouse_pos)
-                    self.volley_shot_clicks += 1
-                    if self.game.current_player == Player.ONE:
-                        self.game.player_2_board.highlight_cells([grid_pos])
-                        self.render(self.game.surface)
-                    elif self.game.current_player == Player.TWO:
-                        self.game.player_1_board.highlight_cells([grid_pos])
-                        self.render(self.game.surface)
-
-                    # Check if 4 clicks have been made
-                    if self.volley_shot_clicks == 4:
+                    target_cell = target_board.cell_at(mouse_pos)
+                    if target_cell is None:
+                        self.show_message("Not Valid")
+                        continue
+                    self.volley_positions.append(target_cell.coordinate)
+                    target_board.highlight_cells([target_cell.coordinate])
+
+                    # Check if all the volley's cells have been picked
+                    if len(self.volley_positions) == protocol.VOLLEY_SHOTS:
                         # Reset highlights after processing
-                        if self.game.current_player == Player.ONE:
-                            self.game.player_2_board.reset_highlights()
-                        elif self.game.current_player == Player.TWO:
-                            self.game.player_1_board.reset_highlights()
-                        # Process all 4 shots
+                        target_board.reset_highlights()
+                        # Fire at each of the picked cells
                         for position in self.volley_positions:
-                            if self.game.current_player == Player.ONE:
-                                hit = self.game.player_2_board.hit_pos(position)
-                            elif self.game.current_player == Player.TWO:
-                                hit = self.game.player_1_board.hit_pos(position)
+                            target_board.fire(position)
 
                         # Reset for next turn
                         self.game.player_can_shoot = False  # Disable shooting
                         pygame.time.set_timer(TURN_TRANSITION_EVENT, self.TURN_TRANSITION_DELAY, loops=1)
-                        self.volley_shot_clicks = 0
                         self.volley_positions = []
 
                 else:
-                    mouse_pos = [mouse_pos]
-                    if self.game.shot_selection == "nuke":  #adds mouse positions for all nuke tiles
-                        mouse_pos.append((mouse_pos[0][0], mouse_pos[0][1]+COL_SIZE))
-                        mouse_pos.append((mouse_pos[0][0]+COL_SIZE, mouse_pos[0][1]+COL_SIZE))
-                        mouse_pos.append((mouse_pos[0][0]+COL_SIZE, mouse_pos[0][1]))
-                        mouse_pos.append((mouse_pos[0][0]+COL_SIZE, mouse_pos[0][1]-COL_SIZE))
-                        mouse_pos.append((mouse_pos[0][0], mouse_pos[0][1]-COL_SIZE))
-                        mouse_pos.append((mouse_pos[0][0]-COL_SIZE, mouse_pos[0][1]-COL_SIZE))
-                        mouse_pos.append((mouse_pos[0][0]-COL_SIZE, mouse_pos[0][1]))
-                        mouse_pos.append((mouse_pos[0][0]-COL_SIZE, mouse_pos[0][1]+COL_SIZE))
-                    elif self.game.shot_selection == "run_h":   #adds mouse postions for all horizontal bombing run tiles
-                        mouse_pos.append((mouse_pos[0][0]+COL_SIZE, mouse_pos[0][1]))
-                        mouse_pos.append((mouse_pos[0][0]+COL_SIZE+COL_SIZE, mouse_pos[0][1]))
-                        mouse_pos.append((mouse_pos[0][0]-COL_SIZE, mouse_pos[0][1]))
-                        mouse_pos.append((mouse_pos[0][0]-COL_SIZE-COL_SIZE, mouse_pos[0][1]))
-                    elif self.game.shot_selection == "run_v":   #adds mouse positions for all vertical bombing run tiles
-                        mouse_pos.append((mouse_pos[0][0], mouse_pos[0][1]+COL_SIZE))
-                        mouse_pos.append((mouse_pos[0][0], mouse_pos[0][1]+COL_SIZE+COL_SIZE))
-                        mouse_pos.append((mouse_pos[0][0], mouse_pos[0][1]-COL_SIZE))
-                        mouse_pos.append((mouse_pos[0][0], mouse_pos[0][1]-COL_SIZE-COL_SIZE))
-                    elif self.game.shot_selection == "radar":   #adds mouse positions for all vertical bombing run tiles
-                        if self.game.current_player == Player.ONE:
-                            self.message = "Ship detected at " + str(self.game.player_2_board.ships[0].coordinates)
-                            self.message_timer = pygame.time.get_ticks()
-                            self.game.player_2_board.highlight_cells(self.game.player_2_board.ships[0].coordinates)
-                        elif self.game.current_player == Player.TWO:
-                            self.message = "Ship detected at " + str(self.game.player_1_board.ships[0].coordinates)
-                            self.message_timer = pygame.time.get_ticks()
-                            self.game.player_2_board.highlight_cells(self.game.player_2_board.ships[0].coordinates)
-
-
-                    for position in mouse_pos:
-                        if self.game.current_player == Player.ONE:
-                            hit = self.game.player_2_board.hit_pos(position)
-                        elif self.game.current_player == Player.TWO:
-                            hit = self.game.player_1_board.hit_pos(position)
+                    if self.game.shot_selection == "radar":   #reveals the location of the first enemy ship
+                        self.show_message("Ship detected at " + str(target_board.ships[0].coordinates))
+                        target_board.highlight_cells(target_board.ships[0].coordinates)
+
+                    #resolves the grid cells covered by the selected shot (single, nuke or bombing run) around the clicked cell
+                    target_cell = target_board.cell_at(mouse_pos)
+                    positions = shot_pattern(self.game.shot_selection, target_cell.coordinate) if target_cell else [None]
+
+                    for position in positions:
+                        hit = target_board.fire(position) if position is not None else None
 
                         if hit:
                             # Disable shooting after the first valid shot
@@ -197,16 +357,18 @@ class PlayingScreen(Screen):
                             # Set a timer for turn transition
                             pygame.time.set_timer(TURN_TRANSITION_EVENT, self.TURN_TRANSITION_DELAY, loops=1)
                         else:
-                            self.message = "Not Valid"
-                            self.message_timer = pygame.time.get_ticks()
+                            self.show_message("Not Valid")
                             # Audio.play_error()
 
+            elif event.type == TURN_TRANSITION_EVENT and (self.game.cpu is not None or self.game.remote is not None):
+                self.switch_opponent_turn()
+
             elif event.type == TURN_TRANSITION_EVENT:
                 self.game.player_can_shoot = True
                 # This event will be triggered after the delay
                 self.game.set_state(State.TURN_TRANSITION)
 
-            elif (event.type == pygame.KEYDOWN) and (self.game.powerup_activity == False):             
+            elif (event.type == pygame.KEYDOWN) and (self.game.powerup_activity == False) and not self.opponent_turn():
                 #grab the powerup list for current player
                 if self.game.current_player == Player.ONE:
                     powerups = self.game.player_2_board.get_powerups()
@@ -221,8 +383,7 @@ class PlayingScreen(Screen):
                         powerups[0] = False
                         # Audio.play_use()
                     else:
-                        self.message = "Not Available"
-                        self.message_timer = pygame.time.get_ticks()
+                        self.show_message("Not Available")
                         # Audio.play_error()
                 if event.key == pygame.K_2:
                     if powerups[1] == True:
@@ -231,8 +392,7 @@ class PlayingScreen(Screen):
                         powerups[1] = False
                         # Audio.play_use()
                     else:
-                        self.message = "Not Available"
-                        self.message_timer = pygame.time.get_ticks()
+                        self.show_message("Not Available")
                         # Audio.play_error()
                 if event.key == pygame.K_3:
                     if powerups[2] == True:
@@ -241,8 +401,7 @@ class PlayingScreen(Screen):
                         powerups[2] = False
                         # Audio.play_use()
                     else:
-                        self.message = "Not Available"
-                        self.message_timer = pygame.time.get_ticks()
+                        self.show_message("Not Available")
                         # Audio.play_error()
                 if event.key == pygame.K_4:
                     if powerups[3] == True:
@@ -251,8 +410,7 @@ class PlayingScreen(Screen):
                         powerups[3] = False
                         # Audio.play_use()
                     else:
-                        self.message = "Not Available"
-                        self.message_timer = pygame.time.get_ticks()
+                        self.show_message("Not Available")
                         # Audio.play_error()
                 if event.key == pygame.K_5:
                     if powerups[4] == True:
@@ -261,8 +419,7 @@ class PlayingScreen(Screen):
                         powerups[4] = False
                         # Audio.play_use()
                     else:
-                        self.message = "Not Available"
-                        self.message_timer = pygame.time.get_ticks()
+                        self.show_message("Not Available")
                         # Audio.play_error()
                         
                 #set the powerup list for current player so a selected powerup is consumed
@@ -1,36 +1,167 @@
 import pygame
 
 from ._screen import Screen
-from ..types  import Color, State, Player
-from ..config import SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE
+from ..types  import Button, Color, State, Player
+from ..config import SCREEN_WIDTH, SCREEN_HEIGHT
+from ..rules import require_fleet
+from ..ship import Ship
+
+# Arrow keys and the direction they move the ship being placed
+MOVE_KEYS = {
+    pygame.K_LEFT: "LEFT",
+    pygame.K_RIGHT: "RIGHT",
+    pygame.K_UP: "UP",
+    pygame.K_DOWN: "DOWN",
+}
 
 
 class SelectionScreen(Screen):
+    """
+    Lets each player place their fleet, largest ship first. Placement is driven by the game loop's events:
+    the screen keeps the ship being placed and the sizes still to place between frames.
+    """
+    tracks_dirty = True
+
     def __init__(self, game: "Game") -> None:
         super().__init__(game)
-        self.shipsToPlace = game.num_ships
+        self.board = None  # board of the player currently placing ships
+        self.ship = None  # ship being moved around, not placed yet
+        self.ship_sizes = []  # sizes of the ships still to place after the current one
+        self.random_button = None  # places the rest of the fleet at random, below the current player's instructions
 
-    def render(self, surface):
-        surface.fill(Color.BACKGROUND)
+    def current_board(self):
+        if self.game.current_player == Player.ONE:
+            return self.game.player_1_board
+        return self.game.player_2_board
 
-        self.place_ship_instructions(surface, self.game.current_player)
+    def start_placement(self):
+        """
+        Starts placing the current player's fleet if it is not already under way (or the boards were recreated)
+        """
+        if self.ship is not None and self.board is self.current_board():
+            return
+        self.board = self.current_board()
+        # Ships already on the board (in a loaded game) are not placed again
+        placed = {ship.length for ship in self.board.ships}
+        self.ship_sizes = [size for size in range(self.game.num_ships, 0, -1) if size not in placed]
+        self.random_button = Button('RANDOMIZE FLEET', SCREEN_WIDTH // 2, self.instructions_offset(self.game.current_player) + 190,
+                                    self.font_sm, Color.WHITE, Color.BUTTON_BG, Color.BUTTON_HOVER, True, False)
+        self.next_ship()
 
-        if self.game.current_player == Player.ONE:
-            self.game.player_1_board.spawnShip()
+    def next_ship(self):
+        """Brings up the next ship to place, or finishes placement once there are none left"""
+        if not self.ship_sizes:
+            self.finish_placement()
+            return
+        middle = self.board.board_size // 2
+        self.ship = Ship(middle, middle, self.ship_sizes.pop(0), "VERTICAL", self.board.board_size)
+        self.board.preview_ship(self.ship)
+
+    def randomize_fleet(self):
+        """
+        Places the ship being moved and every ship still to place at random around the ships already placed
+        """
+        size = self.board.board_size
+        occupied = bytearray(size * size)
+        for ship in self.board.ships:
+            for x, y in ship.coordinates:
+                occupied[y * size + x] = 1
+
+        try:
+            ships = require_fleet(size, [self.ship.length] + self.ship_sizes, self.game.streams.stream("fleet"), occupied)
+        except ValueError as error:
+            # The ships placed by hand can leave too little room, the player carries on placing by hand
+            print(f"Cannot randomize the fleet: {error}")
+            return
+        for ship in ships:
+            self.board.mark_ship_cells(ship)
+        self.ship_sizes = []
+        self.finish_placement()
+
+    def finish_placement(self):
+        """
+        Hands placement over to player two, or starts the game once both fleets are placed
+        """
+        self.board.preview_ship(None)
+        ships = self.board.ships
+        self.board = None
+        self.ship = None
+        if self.game.current_player == Player.ONE and self.game.remote is not None:
+            # The opponent places their fleet on their own screen, shooting waits until the server starts the game
+            self.game.remote.place(ships)
+            self.game.player_can_shoot = False
+            self.game.set_state(State.PLAYING)
+        elif self.game.current_player == Player.ONE and self.game.cpu is not None:
+            # The CPU placed its fleet when the game started, there is no one to pass the computer to
+            self.game.set_state(State.PLAYING)
+        elif self.game.current_player == Player.ONE:
             self.game.current_player = Player.TWO
+            self.game.dirty.mark_all()
         elif self.game.current_player == Player.TWO:
-            self.game.player_2_board.spawnShip()
             self.game.current_player = Player.ONE
             self.game.set_state(State.BEGIN_GAME)
 
-    def place_ship_instructions(self, surface: pygame.Surface, player: Player):
+    def handle_events(self, events):
+        self.start_placement()
+        for event in events:
+            if self.ship is None:
+                continue
+
+            if event.type == pygame.MOUSEMOTION and self.random_button.rect is not None:
+                # Redraw the button when the mouse moves on or off it
+                color = self.random_button.current_color
+                self.random_button.update(event.pos)
+                if self.random_button.current_color != color:
+                    self.game.dirty.mark(self.random_button.rect)
+                continue
+            if event.type == pygame.MOUSEBUTTONUP:
+                if self.random_button.is_clicked(event.pos):
+                    self.randomize_fleet()
+                continue
+            if event.type != pygame.KEYDOWN:
+                continue
+
+            if event.key in MOVE_KEYS:
+                self.ship.move(MOVE_KEYS[event.key])
+            elif event.key == pygame.K_r:
+                # cycle through the direction
+                new_direction = "HORIZONTAL" if self.ship.direction == "VERTICAL" else "VERTICAL"
+                if self.ship.isValidDirection(new_direction):
+                    self.ship.changeDirection(new_direction)
+            elif event.key == pygame.K_RETURN:
+                if self.board.isValidShipLocation(self.ship):
+                    self.board.mark_ship_cells(self.ship)
+                    self.next_ship()
+                    if self.ship is None:
+                        continue
+
+            self.board.preview_ship(self.ship)
+
+    def render(self, surface):
+        self.start_placement()
+        if self.board is None:
+            return  # every ship was already placed, the game has moved on
+
+        # Only the regions marked dirty since the last frame are redrawn (the whole screen when a player starts placing)
+        for region in self.game.dirty.take():
+            surface.set_clip(region)
+            surface.fill(Color.BACKGROUND, region)
+            self.place_ship_instructions(surface, self.game.current_player)
+            self.random_button.draw(surface)
+            self.board.draw_region(surface, region)
+        surface.set_clip(None)
+
+    def instructions_offset(self, player: Player) -> float:
+        """Returns the y position of the instructions, in the half of the screen without the player's board"""
         if player == Player.ONE:
             half_of_player_screen = SCREEN_HEIGHT / 4
-            initial_offset = half_of_player_screen - (half_of_player_screen / 2)
+            return half_of_player_screen - (half_of_player_screen / 2)
         elif player == Player.TWO:
             half_of_player_screen =  3 * SCREEN_HEIGHT / 4
-            initial_offset = half_of_player_screen - (half_of_player_screen / 6)
+            return half_of_player_screen - (half_of_player_screen / 6)
 
+    def place_ship_instructions(self, surface: pygame.Surface, player: Player):
+        initial_offset = self.instructions_offset(player)
         middle_of_screen = SCREEN_WIDTH // 2
 
         self.write('PLACE YOUR SHIPS', self.font_md, Color.WHITE, surface, middle_of_screen, initial_offset, True)
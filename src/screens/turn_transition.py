@@ -23,15 +23,13 @@ class TurnTransition(Screen):
         self.continue_button.draw(surface)
         self.continue_button.update(pygame.mouse.get_pos())
 
-        pygame.display.update()
-
     def other_player(self):
         return Player.TWO if self.game.current_player == Player.ONE else Player.ONE
 
     def handle_events(self, events: List[Event]):
         for event in events:
             if event.type == pygame.MOUSEBUTTONUP:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = event.pos
                 if self.continue_button.is_clicked(mouse_pos):
                     self.continue_button.is_checked = False
                     self.game.current_player = self.other_player()
@@ -0,0 +1,72 @@
+import pygame
+
+from typing import Dict, Tuple
+
+from .types import Color
+
+# Visual states a cell can be drawn in
+NEUTRAL = "neutral"
+SHIP = "ship"
+HIT = "hit"
+MISS = "miss"
+HIGHLIGHTED = "highlighted"
+ACTIVE = "active"
+
+# Pre-rendered cell surfaces per cell size and board backgrounds per board geometry. Both are keyed by
+# size, so a board with a different COL_SIZE gets its own surfaces rather than stale ones.
+_cell_sprites: Dict[Tuple[int, int], Dict[str, pygame.Surface]] = {}
+_backgrounds: Dict[Tuple, pygame.Surface] = {}
+
+
+def _new_surface(width: int, height: int) -> pygame.Surface:
+    surface = pygame.Surface((max(1, width), max(1, height)))
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    return surface
+
+
+def _draw_cell(state: str, width: int, height: int) -> pygame.Surface:
+    sprite = _new_surface(width, height)
+    center = (width / 2, height / 2)
+    if state == HIT:
+        sprite.fill(Color.RED)
+        pygame.draw.circle(sprite, Color.RED, center, 3)
+    elif state == MISS:
+        sprite.fill(Color.BACKGROUND)
+        pygame.draw.circle(sprite, Color.WHITE, center, 3)
+    elif state in (SHIP, ACTIVE):
+        sprite.fill(Color.GREEN)
+    elif state == HIGHLIGHTED:
+        sprite.fill(Color.YELLOW)
+    else:
+        sprite.fill(Color.CELL_NEUTRAL)
+    return sprite
+
+
+def cell_sprites(width: int, height: int) -> Dict[str, pygame.Surface]:
+    """
+    Returns the surface for every visual cell state at the given cell size, rendering them on first use
+    """
+    key = (int(width), int(height))
+    sprites = _cell_sprites.get(key)
+    if sprites is None:
+        sprites = _cell_sprites[key] = {state: _draw_cell(state, *key) for state in (NEUTRAL, SHIP, HIT, MISS, HIGHLIGHTED, ACTIVE)}
+    return sprites
+
+
+def board_background(board) -> pygame.Surface:
+    """
+    Returns a surface of the whole board with every cell neutral, rendering it on first use.
+    Boards only need to blit this and then the cells which are not neutral.
+    """
+    key = (board.board_size, board.col_size, board.cell_margin, board.cell_gutter)
+    background = _backgrounds.get(key)
+    if background is None:
+        size = round(board.board_size * board.col_size)
+        background = _backgrounds[key] = _new_surface(size, size)
+        background.fill(Color.BACKGROUND)
+        neutral = cell_sprites(board.col_size - board.cell_gutter, board.col_size - board.cell_gutter)[NEUTRAL]
+        for y in range(board.board_size):
+            for x in range(board.board_size):
+                background.blit(neutral, (x * board.col_size + board.cell_margin, y * board.col_size + board.cell_margin))
+    return background
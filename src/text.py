@@ -0,0 +1,74 @@
+import pygame
+
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+# Most rendered strings are static titles and labels, these bounds leave room for every screen's
+# text plus changing messages while keeping memory bounded
+TEXT_CACHE_SIZE = 256
+ICON_CACHE_SIZE = 64
+
+_fonts: Dict[Tuple[str, int], pygame.font.Font] = {}
+
+
+class LRUCache:
+    """A dictionary holding at most maxsize entries, dropping the least recently used first"""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+_text_cache = LRUCache(TEXT_CACHE_SIZE)
+_icon_cache = LRUCache(ICON_CACHE_SIZE)
+
+
+def get_font(name: str, size: int) -> pygame.font.Font:
+    """
+    Returns the system font with the given name and size, only searching for it the first time
+    """
+    key = (name.lower(), size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size)
+    return font
+
+
+def render_text(text: str, font: pygame.font.Font, color) -> pygame.Surface:
+    """
+    Returns the antialiased rendering of the text, reusing the surface if it was rendered recently
+    """
+    key = (text, font, tuple(pygame.Color(color)))
+    surface = _text_cache.get(key)
+    if surface is None:
+        surface = font.render(text, True, color)
+        _text_cache.put(key, surface)
+    return surface
+
+
+def render_icon(name: str, image: pygame.Surface, size: Tuple[int, int], tint) -> pygame.Surface:
+    """
+    Returns the image scaled to the size and multiplied by the tint color, reusing recent results
+    """
+    key = (name, size, tuple(pygame.Color(tint)))
+    icon = _icon_cache.get(key)
+    if icon is None:
+        icon = pygame.transform.scale(image, size)
+        icon.fill(tint, special_flags=pygame.BLEND_RGBA_MULT)
+        _icon_cache.put(key, icon)
+    return icon
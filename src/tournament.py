@@ -0,0 +1,300 @@
+"""
+Headless CPU tournament. Plays every pair of CPU strategies against each other on the rules engine, spread
+over a pool of worker processes, streams one JSON line per game to disk and prints a summary as JSON.
+
+    python -m src.tournament [--strategies easy,medium,density] [--games 1000] [--seed 1] [--output tournament.jsonl]
+
+Every game is seeded from the tournament seed, the two strategies and the game's number, so a game plays
+out the same however many workers there are or whichever one plays it.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Dict, List, Optional, Sequence
+
+from .ai import STRATEGIES, MoveTelemetry
+from .ai.montecarlo import SAMPLE_BUDGET, MonteCarloStrategy
+from .config import GRID_SIZE
+from .rules import Match, RandomStreams, ShotResult, require_fleet
+
+NUM_SHIPS = 5
+# Games a worker plays per task, small enough to keep every worker busy until the end
+CHUNK = 100
+# Seconds between progress lines on stderr
+PROGRESS_INTERVAL = 5.0
+# Moves timed at each worker count for the Monte Carlo sampler's throughput
+SAMPLER_MOVES = 5
+
+
+def make_strategy(name: str, size: int, lengths: Sequence[int], rng, samples: int):
+    if name == "monte_carlo":
+        # Games already run in parallel, the strategy samples in its worker's process
+        return STRATEGIES[name](size, lengths, rng, samples=samples, workers=0)
+    return STRATEGIES[name](size, lengths, rng)
+
+
+def sampler_throughput(size: int, lengths: Sequence[int], samples: int, seed: int) -> Dict:
+    """
+    Layouts per second the Monte Carlo sampler reaches on an empty board with no deadline, sampling in this
+    process (0 workers) and with pools of 1, 2, 4, ... workers up to the cores, and the speedup of each
+    pool over a single worker
+    """
+    cores = os.cpu_count() or 1
+    counts = sorted({0, cores} | {1 << i for i in range(cores.bit_length()) if 1 << i <= cores})
+    rates = {}
+    for workers in counts:
+        strategy = MonteCarloStrategy(size, lengths, RandomStreams(seed).stream("sampler"), samples=samples, workers=workers)
+        try:
+            strategy.start()
+            strategy.choose()  # the first move also imports the sampler in each worker
+            start = time.perf_counter()
+            for _ in range(SAMPLER_MOVES):
+                strategy.choose()
+            rates[workers] = samples * SAMPLER_MOVES / (time.perf_counter() - start)
+        finally:
+            strategy.close()
+    return {
+        "layouts_per_s": {str(workers): round(rate, 1) for workers, rate in rates.items()},
+        "speedup": {str(workers): round(rates[workers] / rates[1], 2) for workers in counts if workers},
+    }
+
+
+def play_game(size: int, lengths: Sequence[int], players: Sequence[str], seed: str, samples: int = SAMPLE_BUDGET,
+              budget_ms: Optional[float] = None) -> Dict:
+    """
+    Plays one game between two strategies, players[0] shooting first, one shot per turn, each move given
+    budget_ms to choose its shot. With a budget, games between anytime strategies depend on timing and no
+    longer replay exactly from their seed.
+
+    Returns:
+        Dict: The game's record, with the shots each player fired, the seconds each spent choosing and
+        recording them and how many of their moves were cut short at the deadline or went over the budget
+    """
+    # Fleets, powerup rolls and each strategy draw from streams of their own
+    streams = RandomStreams(seed)
+    match = Match(size, len(lengths), streams.stream("powerups"))
+    for player in (1, 2):
+        for ship in require_fleet(size, sorted(lengths, reverse=True), streams.stream(f"fleet:{player}")):
+            match.boards[player].place_ship(ship)
+    strategies = {player: make_strategy(name, size, lengths, streams.stream(f"cpu:{player}"), samples)
+                  for player, name in zip((1, 2), players)}
+    shots = {1: 0, 2: 0}
+    think = {1: 0.0, 2: 0.0}
+    telemetry = {1: MoveTelemetry(budget_ms), 2: MoveTelemetry(budget_ms)}
+
+    while match.winner is None:
+        player = match.current_player
+        strategy = strategies[player]
+        start = time.perf_counter()
+        coord = strategy.choose(telemetry[player].deadline(start))
+        elapsed = time.perf_counter() - start
+        telemetry[player].add(elapsed, strategy.cut_short)
+        think[player] += elapsed
+        if coord is None:
+            break  # nothing left to shoot at, only possible if the fleet could not all be placed
+
+        (coord, result), = match.fire(coord)
+        sunk = match.target().ship_at_coord(coord).coordinates if result == ShotResult.SINK else None
+        start = time.perf_counter()
+        strategy.record(coord, result, sunk)
+        think[player] += time.perf_counter() - start
+        shots[player] += 1
+        if match.winner is None:
+            match.end_turn()
+
+    return {
+        "seed": seed,
+        "players": list(players),
+        "winner": None if match.winner is None else players[match.winner - 1],
+        "shots": [shots[1], shots[2]],
+        "think_s": [round(think[1], 6), round(think[2], 6)],
+        "cut_short": [telemetry[1].cut_short, telemetry[2].cut_short],
+        "over_budget": [telemetry[1].over_budget, telemetry[2].over_budget],
+    }
+
+
+def play_games(size: int, lengths: Sequence[int], pair: Sequence[str], first: int, count: int, seed: int, samples: int,
+               budget_ms: Optional[float]) -> List[Dict]:
+    """Plays games first..first+count-1 between the pair, which of them shoots first alternating between games"""
+    records = []
+    for game in range(first, first + count):
+        players = pair if game % 2 == 0 else pair[::-1]
+        record = play_game(size, lengths, players, f"{seed}:{pair[0]}:{pair[1]}:{game}", samples, budget_ms)
+        record["game"] = game
+        records.append(record)
+    return records
+
+
+def percentile(counts: Counter, q: int) -> int:
+    """Nearest-rank percentile of the values counted"""
+    rank = max(1, -(-q * sum(counts.values()) // 100))
+    for value in sorted(counts):
+        rank -= counts[value]
+        if rank <= 0:
+            return value
+    return 0
+
+
+class Standings:
+    """Running totals of the games played so far, per strategy and per pairing"""
+
+    def __init__(self, names: Sequence[str]) -> None:
+        self.games = 0
+        self.draws = 0
+        self.played = Counter()
+        self.wins = Counter()
+        self.moves = Counter()
+        self.think = Counter()
+        self.cut_short = Counter()
+        self.over_budget = Counter()
+        self.shots_to_win = {name: Counter() for name in names}
+        self.pairings = {}  # (name, name) -> Counter of wins by name, and of wins by the first player
+
+    def add(self, record: Dict):
+        players = record["players"]
+        winner = record["winner"]
+        pair = self.pairings.setdefault(tuple(sorted(players)), Counter())
+        self.games += 1
+        pair["games"] += 1
+        for i, name in enumerate(players):
+            self.played[name] += 1
+            self.moves[name] += record["shots"][i]
+            self.think[name] += record["think_s"][i]
+            self.cut_short[name] += record["cut_short"][i]
+            self.over_budget[name] += record["over_budget"][i]
+        if winner is None:
+            self.draws += 1
+            return
+        self.wins[winner] += 1
+        self.shots_to_win[winner][record["shots"][players.index(winner)]] += 1
+        pair[winner] += 1
+        if winner == players[0]:
+            pair["first_player"] += 1
+
+    def summary(self) -> Dict:
+        strategies = {}
+        for name, counts in self.shots_to_win.items():
+            strategies[name] = {
+                "games": self.played[name],
+                "wins": self.wins[name],
+                "win_rate": round(self.wins[name] / self.played[name], 4) if self.played[name] else None,
+                "moves": self.moves[name],
+                "move_ms_mean": round(self.think[name] / self.moves[name] * 1000, 4) if self.moves[name] else None,
+                "cut_short_rate": round(self.cut_short[name] / self.moves[name], 4) if self.moves[name] else None,
+                "over_budget_rate": round(self.over_budget[name] / self.moves[name], 4) if self.moves[name] else None,
+                "shots_to_win": {
+                    "mean": round(sum(shots * n for shots, n in counts.items()) / sum(counts.values()), 2) if counts else None,
+                    **{f"p{q}": percentile(counts, q) for q in (10, 50, 90, 99)},
+                    "histogram": {str(shots): counts[shots] for shots in sorted(counts)},
+                },
+            }
+        pairings = []
+        for pair, counts in self.pairings.items():
+            pairings.append({
+                "players": list(pair),
+                "games": counts["games"],
+                "wins": {name: counts[name] for name in pair},
+                "first_player_wins": counts["first_player"],
+            })
+        return {"games": self.games, "draws": self.draws, "strategies": strategies, "pairings": pairings}
+
+
+def tasks(names: Sequence[str], games: int, chunk: int):
+    """Yields (pair, first game, games) for every chunk of every pairing's games"""
+    for pair in itertools.combinations(names, 2):
+        for first in range(0, games, chunk):
+            yield pair, first, min(chunk, games - first)
+
+
+def run(args, output) -> Dict:
+    names = list(dict.fromkeys(args.strategies.split(",")))
+    lengths = list(range(1, args.ships + 1))
+    standings = Standings(names)
+    total = len(names) * (len(names) - 1) // 2 * args.games
+    start = time.perf_counter()
+    last_progress = start
+
+    def collect(records):
+        nonlocal last_progress
+        for record in records:
+            output.write(json.dumps(record, separators=(",", ":")) + "\n")
+            standings.add(record)
+        now = time.perf_counter()
+        if now - last_progress >= PROGRESS_INTERVAL:
+            last_progress = now
+            print(f"{standings.games}/{total} games, {standings.games / (now - start):.1f} games/s", file=sys.stderr)
+
+    work = ((args.size, lengths, pair, first, count, args.seed, args.samples, args.budget_ms) for pair, first, count in tasks(names, args.games, args.chunk))
+    if args.workers <= 0:
+        for job in work:
+            collect(play_games(*job))
+    else:
+        # Only a few tasks are queued per worker at a time, millions of games never sit in memory at once
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            pending = set()
+            for job in work:
+                if len(pending) >= 2 * args.workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+                pending.add(executor.submit(play_games, *job))
+            for future in as_completed(pending):
+                collect(future.result())
+
+    wall = time.perf_counter() - start
+    # Timed after the games, so the sampler has the cores to itself
+    sampler = sampler_throughput(args.size, lengths, args.samples, args.seed) if "monte_carlo" in names else None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "size": args.size,
+        "ships": lengths,
+        "seed": args.seed,
+        "workers": args.workers,
+        "budget_ms": args.budget_ms,
+        "wall_s": round(wall, 3),
+        "games_per_s": round(standings.games / wall, 1) if wall else None,
+        **standings.summary(),
+        "sampler": sampler,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.tournament", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--strategies", default="easy,medium,density", help=f"comma separated, from {', '.join(STRATEGIES)}")
+    parser.add_argument("--games", type=int, default=1000, help="games per pair of strategies")
+    parser.add_argument("--size", type=int, default=GRID_SIZE, help="cells per board side")
+    parser.add_argument("--ships", type=int, default=NUM_SHIPS, help="ships per fleet, one of each length from 1")
+    parser.add_argument("--seed", type=int, default=1, help="tournament seed, every game is seeded from it")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes, 0 plays every game in this process")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="games per task sent to a worker")
+    parser.add_argument("--samples", type=int, default=SAMPLE_BUDGET, help="layouts sampled per move by monte_carlo")
+    parser.add_argument("--budget-ms", type=float, default=None, help="time each move may take, unlimited by default")
+    parser.add_argument("--output", default="tournament.jsonl", help="file every game's record is streamed to, one JSON line each")
+    parser.add_argument("--summary", default=None, help="write the summary JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.strategies.split(",") if name not in STRATEGIES]
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(unknown)}")
+
+    with open(args.output, "w") as output:
+        report = run(args, output)
+
+    if args.summary:
+        with open(args.summary, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
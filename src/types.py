@@ -1,9 +1,9 @@
 import pygame
 
-from typing import Tuple
 from enum import Enum
 
-Coordinate = Tuple[int, int]
+from .rules.types import Coordinate
+from .text import render_text
 
 
 class Color:
@@ -32,6 +32,8 @@ class State(Enum):
     PLAYING = 4
     END = 5
     BEGIN_GAME = 6
+    GAME_MODE = 7
+    AI_DIFFICULTY = 8
 
 
 class Player(Enum):
@@ -56,7 +58,7 @@ class Button:
         self.is_checked = False  # New attribute to track checked state
 
     def draw(self, surface: pygame.Surface):
-        text_surface = self.font.render(self.text, True, self.text_color)
+        text_surface = render_text(self.text, self.font, self.text_color)
         if self.rect is None:
             if self.center:
                 self.rect = text_surface.get_rect(center=(self.x, self.y))
@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.ai.density import DensityStrategy, TARGET_WEIGHT
+from src.ai.incremental import IncrementalDensityStrategy
+from src.rules import ShotResult, random_fleet
+
+
+def brute_force(strategy, targeting):
+    """Counts every distinct legal placement of the ships left one by one, weighted like DensityStrategy"""
+    size = strategy.size
+    blocked = strategy.misses | strategy.sunk
+    open_hits = strategy.hits & ~strategy.sunk
+    counts = np.zeros((size, size))
+    for length, ships in strategy.remaining.items():
+        placements = set()
+        for y in range(size):
+            for x in range(size):
+                for vertical in (False, True):
+                    cells = frozenset((x, y + i) if vertical else (x + i, y) for i in range(length))
+                    if all(cx < size and cy < size for cx, cy in cells):
+                        placements.add(cells)
+        for cells in placements:
+            if any(blocked[cy, cx] for cx, cy in cells):
+                continue
+            covered = sum(bool(open_hits[cy, cx]) for cx, cy in cells)
+            if targeting and not covered:
+                continue
+            weight = TARGET_WEIGHT ** covered if targeting else 1.0
+            for cx, cy in cells:
+                counts[cy, cx] += ships * weight
+    counts[strategy.hits | strategy.misses] = 0
+    return counts
+
+
+def play_shots(strategies, size, lengths, seed, shots):
+    """Fires random shots at a random fleet, telling every strategy what each one did"""
+    rng = random.Random(seed)
+    fleet = random_fleet(size, lengths, rng)
+    ship_at = {cell: ship for ship in fleet for cell in ship.coordinates}
+    hit = set()
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    rng.shuffle(cells)
+    for coord in cells[:shots]:
+        ship = ship_at.get(coord)
+        sunk = None
+        if ship is None:
+            result = ShotResult.MISS
+        else:
+            hit.add(coord)
+            if all(cell in hit for cell in ship.coordinates):
+                result, sunk = ShotResult.SINK, ship.coordinates
+            else:
+                result = ShotResult.HIT
+        for strategy in strategies:
+            strategy.record(coord, result, sunk)
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("shots", [0, 15, 40])
+def test_density_matches_brute_force(seed, shots):
+    size, lengths = 8, [1, 2, 3, 3, 4]
+    strategy = DensityStrategy(size, lengths)
+    play_shots([strategy], size, lengths, seed, shots)
+    assert np.allclose(strategy.density(targeting=False), brute_force(strategy, False))
+    assert np.allclose(strategy.density(targeting=True), brute_force(strategy, True))
+
+
+def test_single_cell_ship_counted_once():
+    strategy = DensityStrategy(3, [1])
+    assert np.array_equal(strategy.density(targeting=False), np.ones((3, 3)))
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("shots", [0, 15, 40])
+def test_incremental_matches_brute_force(seed, shots):
+    size, lengths = 8, [1, 2, 3, 3, 4]
+    strategy = IncrementalDensityStrategy(size, lengths, check_interval=0)
+    play_shots([strategy], size, lengths, seed, shots)
+    unshot = ~(strategy.hits | strategy.misses)
+    assert np.array_equal(strategy.score[unshot], brute_force(strategy, False)[unshot])
+    targeted = brute_force(strategy, True)
+    scores = strategy.target_scores()
+    for index, score in scores.items():
+        assert score == pytest.approx(targeted.flat[index])
+    assert np.count_nonzero(targeted) == len(scores)
+    assert strategy.check()
+
+
+def test_incremental_picks_like_density():
+    size, lengths = 10, [1, 2, 3, 4, 5]
+    density = DensityStrategy(size, lengths, random.Random(3))
+    incremental = IncrementalDensityStrategy(size, lengths, random.Random(3))
+    play_shots([density, incremental], size, lengths, 9, 30)
+    assert density.choose() == incremental.choose()
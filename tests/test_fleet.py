@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from src.rules import random_fleet, require_fleet, sample_fleet
+
+
+def cells(ship):
+    return set(ship.coordinates)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_fleet_fits_the_board(seed):
+    size, lengths = 10, [5, 4, 3, 2, 1]
+    ships = random_fleet(size, lengths, random.Random(seed))
+    assert sorted(ship.length for ship in ships) == sorted(lengths)
+    taken = set()
+    for ship in ships:
+        assert len(cells(ship)) == ship.length
+        assert all(0 <= x < size and 0 <= y < size for x, y in ship.coordinates)
+        assert not taken & cells(ship)
+        taken |= cells(ship)
+
+
+def test_random_fleet_is_reproducible():
+    first = random_fleet(10, [5, 4, 3], random.Random(7))
+    second = random_fleet(10, [5, 4, 3], random.Random(7))
+    assert [ship.coordinates for ship in first] == [ship.coordinates for ship in second]
+
+
+def test_random_fleet_avoids_occupied_cells():
+    size = 4
+    occupied = bytearray(size * size)
+    occupied[:size * 3] = b"\x01" * (size * 3)  # only the bottom row is free
+    ships = random_fleet(size, [3, 1], random.Random(1), occupied)
+    assert all(y == 3 for ship in ships for _, y in ship.coordinates)
+
+
+def test_crowded_grid_gives_none():
+    assert random_fleet(2, [2, 2, 2], random.Random(1)) is None
+    assert random_fleet(3, [4], random.Random(1)) is None
+
+
+def test_failed_placement_leaves_occupied_cells_alone():
+    occupied = bytearray(4)
+    assert sample_fleet(2, [2, 2, 2], random.Random(1), occupied) is None
+    assert occupied == bytearray(4)
+
+
+def test_require_fleet_names_grid_and_fleet():
+    with pytest.raises(ValueError, match=r"lengths 2, 2, 2 on a 2x2 grid"):
+        require_fleet(2, [2, 2, 2], random.Random(1))
+    assert len(require_fleet(10, [3, 2], random.Random(1))) == 2
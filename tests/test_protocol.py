@@ -0,0 +1,85 @@
+import pytest
+
+from src.net import protocol
+from src.rules import Ship
+
+
+def split(data):
+    """The kind and payload of a single frame"""
+    length, kind = protocol.FRAME.unpack_from(data)
+    assert len(data) == protocol.FRAME.size + length - 1
+    return kind, data[protocol.FRAME.size:]
+
+
+def test_place_round_trip():
+    ships = [Ship(0, 0, 5, "HORIZONTAL", 10), Ship(9, 9, 3, "VERTICAL", 10)]
+    kind, payload = split(protocol.encode_place(ships, 10))
+    assert kind == protocol.PLACE
+    decoded = protocol.decode_place(payload, 10)
+    assert [(ship.coordinates, ship.direction) for ship in decoded] == [(ship.coordinates, ship.direction) for ship in ships]
+
+
+def test_bad_place():
+    _, payload = split(protocol.encode_place([Ship(0, 0, 5, "HORIZONTAL", 10)], 10))
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_place(payload[:-1], 10)
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_place(payload, 2)
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_place(b"", 10)
+
+
+def test_fire_round_trip():
+    kind, payload = split(protocol.encode_fire("volley", [0, 11, 22, 99]))
+    assert kind == protocol.FIRE
+    assert protocol.decode_fire(payload) == ("volley", [0, 11, 22, 99])
+
+
+def test_bad_fire():
+    _, payload = split(protocol.encode_fire("single", [5]))
+    for bad in (payload[:1], payload[:-1], payload + b"\0", bytes([len(protocol.SELECTIONS)]) + payload[1:]):
+        with pytest.raises(protocol.ProtocolError):
+            protocol.decode_fire(bad)
+
+
+def test_result_round_trip():
+    results = [(3, 1), (4, 2)]
+    kind, payload = split(protocol.encode_result(2, "radar", 0b101, results, [7, 8]))
+    assert kind == protocol.RESULT
+    assert protocol.decode_result(payload) == (2, "radar", 0b101, results, [7, 8])
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_result(payload[:-1])
+
+
+def test_powerup_bits():
+    powerups = [True, False, False, True, False]
+    assert protocol.unpack_powerups(protocol.pack_powerups(powerups), len(powerups)) == powerups
+
+
+def test_frame_limit():
+    with pytest.raises(protocol.ProtocolError):
+        protocol.frame(protocol.ERROR, bytes(protocol.MAX_FRAME))
+
+
+class Transport:
+    def is_closing(self):
+        return False
+
+
+class Collector(protocol.FrameProtocol):
+    def __init__(self):
+        super().__init__()
+        self.frames = []
+
+    def frame_received(self, kind, payload):
+        self.frames.append((kind, payload))
+
+
+def test_frames_split_across_reads():
+    data = protocol.encode_fire("single", [5]) + protocol.frame(protocol.WAITING) + protocol.encode_fire("nuke", [6])
+    collector = Collector()
+    collector.transport = Transport()
+    for i in range(0, len(data), 4):
+        collector.data_received(data[i:i + 4])
+    assert [kind for kind, _ in collector.frames] == [protocol.FIRE, protocol.WAITING, protocol.FIRE]
+    assert protocol.decode_fire(collector.frames[2][1]) == ("nuke", [6])
@@ -0,0 +1,52 @@
+import pytest
+
+from src.rules import RandomStreams
+from src.rules.packing import SnapshotError, pack_varint, unpack_varint
+from src.rules.rng import SplitMix64
+
+
+def test_same_seed_same_draws():
+    assert [SplitMix64(5).random() for _ in range(3)] == [SplitMix64(5).random() for _ in range(3)]
+    assert SplitMix64("5").random() != SplitMix64(6).random()
+
+
+@pytest.mark.parametrize("count", [0, 1, 1234])
+def test_draws_give_the_state(count):
+    rng = SplitMix64(99)
+    for _ in range(count):
+        rng.next64()
+    assert rng.draws() == count
+    other = SplitMix64(99)
+    other.set_draws(count)
+    assert other.getstate() == rng.getstate()
+    assert other.random() == rng.random()
+
+
+def test_streams_are_independent():
+    streams = RandomStreams(3)
+    fleet = streams.stream("fleet").random()
+    other = RandomStreams(3)
+    for _ in range(10):
+        other.stream("powerups").random()
+    assert other.stream("fleet").random() == fleet
+    assert streams.stream("fleet") is streams.stream("fleet")
+    assert streams.spawn("cpu:1").stream("moves").random() == RandomStreams(3).spawn("cpu:1").stream("moves").random()
+
+
+def test_integer_seeds_are_64_bits():
+    assert RandomStreams(-1).seed == (1 << 64) - 1
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, (1 << 64) - 1])
+def test_varint_round_trip(value):
+    out = bytearray(b"x")
+    pack_varint(out, value)
+    assert len(out) - 1 == max(1, (value.bit_length() + 6) // 7)
+    assert unpack_varint(bytes(out), 1) == (value, len(out))
+
+
+def test_bad_varints():
+    with pytest.raises(SnapshotError, match="truncated"):
+        unpack_varint(b"\x80\x80", 0)
+    with pytest.raises(SnapshotError, match="too long"):
+        unpack_varint(b"\xff" * 11, 0)
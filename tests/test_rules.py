@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from src.rules import BitBoard, BoardState, Match, Ship, ShotResult, POWERUP_SHOTS, shot_pattern
+from src.rules import grant_powerup, roll_powerup, use_powerup
+from src.rules.bitboard import iter_bits
+from src.rules.packing import SnapshotError, pack_board, unpack_board
+from src.rules.powerups import NUKE, new_inventory
+
+
+def board_with(ships, size=10):
+    state = BoardState(size, len(ships))
+    for ship in ships:
+        assert state.can_place(ship)
+        state.place_ship(ship)
+    return state
+
+
+def test_iter_bits():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert list(iter_bits(1 << 1000)) == [1000]
+
+
+def test_bitboard_fire():
+    bits = BitBoard(4)
+    bits.add_ship([(1, 0), (2, 0)])
+    assert bits.has_ship((2, 0)) and not bits.has_ship((3, 0))
+    assert bits.fire((1, 0)) and bits.fire((0, 3))
+    assert not bits.fire((1, 0))
+    assert bits.hits == bits.bit((1, 0))
+    assert bits.misses == bits.bit((0, 3))
+    assert bits.is_shot((0, 3)) and not bits.is_shot((2, 0))
+
+
+def test_board_results():
+    state = board_with([Ship(0, 0, 2, "HORIZONTAL", 10), Ship(5, 5, 1, "VERTICAL", 10)])
+    assert state.fire((0, 0)) == ShotResult.HIT
+    assert state.fire((0, 0)) == ShotResult.REPEAT
+    assert state.fire((9, 9)) == ShotResult.MISS
+    assert state.fire((10, 0)) == ShotResult.INVALID
+    assert state.fire((1, 0)) == ShotResult.SINK
+    assert not state.all_ships_sunk()
+    assert state.fire((5, 5)) == ShotResult.SINK
+    assert state.all_ships_sunk()
+
+
+def test_placement_is_checked():
+    # Vertical ships run up from their head
+    state = board_with([Ship(0, 2, 3, "VERTICAL", 10)])
+    assert not state.can_place(Ship(0, 1, 2, "HORIZONTAL", 10))
+    assert not state.can_place(Ship(9, 0, 2, "HORIZONTAL", 10))
+    assert not state.can_place(Ship(5, 0, 2, "VERTICAL", 10))
+    assert state.can_place(Ship(1, 0, 2, "HORIZONTAL", 10))
+
+
+def test_set_shots_matches_firing():
+    ships = [(0, 0, 3, "HORIZONTAL"), (4, 4, 2, "VERTICAL")]
+    shots = [(0, 0), (1, 0), (2, 0), (4, 4), (7, 7)]
+    fired = board_with([Ship(*ship, 10) for ship in ships])
+    for shot in shots:
+        fired.fire(shot)
+    loaded = board_with([Ship(*ship, 10) for ship in ships])
+    loaded.set_shots(fired.bits.hits | fired.bits.misses)
+    assert (loaded.bits.hits, loaded.bits.misses, loaded.ships_afloat) == (fired.bits.hits, fired.bits.misses, 1)
+    assert [ship.remaining for ship in loaded.ships] == [0, 1]
+
+
+def test_shot_patterns():
+    assert shot_pattern("single", (3, 3)) == [(3, 3)]
+    assert shot_pattern("unknown", (3, 3)) == [(3, 3)]
+    nuke = shot_pattern("nuke", (3, 3))
+    assert nuke[0] == (3, 3) and set(nuke) == {(x, y) for x in range(2, 5) for y in range(2, 5)}
+    assert set(shot_pattern("run_v", (0, 0))) == {(0, y) for y in range(-2, 3)}
+
+
+def test_powerup_inventory():
+    powerups = new_inventory()
+    assert not use_powerup(powerups, NUKE)
+    assert grant_powerup(powerups, NUKE)
+    assert not grant_powerup(powerups, NUKE)
+    assert use_powerup(powerups, NUKE)
+    assert powerups == new_inventory()
+
+
+def test_roll_powerup():
+    rolls = [roll_powerup(random.Random(seed)) for seed in range(500)]
+    assert None in rolls
+    assert {roll for roll in rolls if roll is not None} <= set(range(len(POWERUP_SHOTS)))
+
+
+def test_match_plays_to_a_winner():
+    match = Match(4, 1, random.Random(1))
+    match.boards[1].place_ship(Ship(0, 0, 2, "HORIZONTAL", 4))
+    match.boards[2].place_ship(Ship(0, 3, 2, "HORIZONTAL", 4))
+    assert match.fire((0, 3)) == [((0, 3), ShotResult.HIT)]
+    match.end_turn()
+    assert match.fire((3, 3)) == [((3, 3), ShotResult.MISS)]
+    match.end_turn()
+    results = match.fire((1, 3), "nuke")
+    assert ((1, 3), ShotResult.SINK) in results
+    assert ((1, 4), ShotResult.INVALID) in results
+    assert match.winner == 1 and match.turns == 2
+
+
+def packed_board():
+    state = board_with([Ship(0, 0, 3, "HORIZONTAL", 10), Ship(4, 4, 2, "VERTICAL", 10)])
+    for shot in [(0, 0), (9, 9), (4, 3)]:
+        state.fire(shot)
+    grant_powerup(state.powerups, NUKE)
+    out = bytearray()
+    pack_board(out, state, [5, 17])
+    return state, bytes(out)
+
+
+def test_packed_board_round_trip():
+    state, data = packed_board()
+    loaded = BoardState(10, 2)
+    assert unpack_board(data, 0, loaded, highlights=True) == (len(data), 1 << 5 | 1 << 17)
+    assert [ship.coordinates for ship in loaded.ships] == [ship.coordinates for ship in state.ships]
+    assert (loaded.bits.hits, loaded.bits.misses, loaded.ships_afloat) == (state.bits.hits, state.bits.misses, 2)
+    assert loaded.powerups == state.powerups
+
+
+def test_packed_board_is_checked():
+    _, data = packed_board()
+    with pytest.raises(SnapshotError):
+        unpack_board(data[:-1], 0, BoardState(10, 2), highlights=True)
+    # Powerups, ship count, then each ship's head and length and the direction bits: put the second ship,
+    # horizontal, on top of the first
+    with pytest.raises(SnapshotError, match="overlap"):
+        unpack_board(data[:4] + data[2:4] + b"\0" + data[7:], 0, BoardState(10, 2), highlights=True)
@@ -0,0 +1,104 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from src import snapshot
+from src.game import Game
+from src.types import State
+
+
+@pytest.fixture(scope="module")
+def surface():
+    pygame.init()
+    yield pygame.display.set_mode((400, 800))
+    pygame.quit()
+
+
+@pytest.fixture
+def game(surface):
+    """A seeded 10x10 game against the medium CPU, fleets placed and ten CPU shots fired"""
+    game = Game(pygame.time.Clock(), surface, 10, seed=42)
+    game.set_num_ships(5)
+    game.ai_difficulty = "medium"
+    game.start_ai_game()
+    selection = game.screens[State.SELECTION]
+    selection.start_placement()
+    selection.randomize_fleet()
+    fire(game, 10)
+    yield game
+    game.close_cpu()
+
+
+def fire(game, count):
+    shots = []
+    for _ in range(count):
+        coordinate = game.cpu.choose_shot(game.cpu.strategy)
+        game.cpu.fire_at(coordinate, game.player_1_board)
+        shots.append(coordinate)
+    return shots
+
+
+def boards(game):
+    return [(board.state.bits.ships, board.state.bits.hits, board.state.bits.misses, tuple(board.get_powerups()))
+            for board in (game.player_1_board, game.player_2_board)]
+
+
+def test_round_trip(game, surface):
+    data = game.snapshot()
+    other = Game(pygame.time.Clock(), surface, 10, seed=7)
+    other.restore(data)
+    try:
+        assert other.snapshot() == data
+        assert boards(other) == boards(game)
+        assert other.cpu.shots == game.cpu.shots
+        assert other.rng.getstate() == game.rng.getstate()
+    finally:
+        other.close_cpu()
+
+
+def test_loaded_game_draws_what_the_saved_one_would(game, surface):
+    data = game.snapshot()
+    straight = fire(game, 15), game.rng.random(), game.streams.stream("fleet").random()
+    other = Game(pygame.time.Clock(), surface, 10, seed=7)
+    other.restore(data)
+    try:
+        assert (fire(other, 15), other.rng.random(), other.streams.stream("fleet").random()) == straight
+    finally:
+        other.close_cpu()
+
+
+def test_size_grows_by_a_byte_per_cpu_shot(game):
+    before = len(game.snapshot())
+    fire(game, 5)
+    assert len(game.snapshot()) == before + 5
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:-3],
+    lambda data: data + b"\0",
+    lambda data: b"XX" + data[2:],
+    lambda data: data[:2] + bytes([snapshot.VERSION + 1]) + data[3:],
+    lambda data: data[:snapshot.HEADER.size - 1],
+])
+def test_bad_data_leaves_the_game_alone(game, corrupt):
+    data = game.snapshot()
+    cpu = game.cpu
+    with pytest.raises(snapshot.SnapshotError):
+        game.restore(corrupt(data))
+    assert game.cpu is cpu
+    assert game.snapshot() == data
+
+
+def test_cpu_shots_are_checked(game):
+    data = game.snapshot()
+    # Each of the CPU's shots is one byte on a 10x10 grid, the last of them ends the snapshot
+    with pytest.raises(snapshot.SnapshotError, match="repeat"):
+        game.restore(data[:-1] + data[-2:-1])
+    with pytest.raises(snapshot.SnapshotError, match="off the board"):
+        game.restore(data[:-1] + bytes([100]))
+    game.restore(data)
+    assert len(game.cpu.shots) == 10